@@ -0,0 +1,35 @@
+"""devis reference counters
+
+Revision ID: 0a9d5e2c7f13
+Revises: f2a7c93e1b46
+Create Date: 2026-10-18 19:04:18.530662
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9d5e2c7f13'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c93e1b46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'devis_compteurs',
+        sa.Column('annee', sa.Integer(), nullable=False),
+        sa.Column('dernier_numero', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('annee'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('devis_compteurs', schema='fsbb')
@@ -0,0 +1,30 @@
+"""devis statut date_creation index
+
+Revision ID: 1c6e8b3f9a27
+Revises: 0a9d5e2c7f13
+Create Date: 2026-10-18 19:47:33.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c6e8b3f9a27'
+down_revision: Union[str, Sequence[str], None] = '0a9d5e2c7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_devis_statut_date_creation', 'devis', ['statut', 'date_creation', 'id'],
+        schema='fsbb', if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_devis_statut_date_creation', table_name='devis', schema='fsbb')
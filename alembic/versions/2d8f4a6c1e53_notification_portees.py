@@ -0,0 +1,54 @@
+"""topic notifications and per-user read state
+
+Revision ID: 2d8f4a6c1e53
+Revises: 1c6e8b3f9a27
+Create Date: 2026-10-18 21:12:08.417305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f4a6c1e53'
+down_revision: Union[str, Sequence[str], None] = '1c6e8b3f9a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'notifications',
+        sa.Column('portee', sa.String(length=20), nullable=False, server_default='user'),
+        schema='fsbb', if_not_exists=True,
+    )
+    op.add_column('notifications', sa.Column('portee_id', sa.Integer(), nullable=True), schema='fsbb', if_not_exists=True)
+    op.alter_column('notifications', 'user_id', existing_type=sa.Integer(), nullable=True, schema='fsbb')
+    op.create_index(
+        'ix_notifications_portee', 'notifications', ['portee', 'portee_id', 'created_at'],
+        schema='fsbb', if_not_exists=True,
+    )
+    op.create_table(
+        'notification_lectures',
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date_lecture', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['notification_id'], ['fsbb.notifications.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['fsbb.users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('notification_id', 'user_id'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_lectures', schema='fsbb')
+    op.drop_index('ix_notifications_portee', table_name='notifications', schema='fsbb')
+    op.execute("DELETE FROM fsbb.notifications WHERE user_id IS NULL")
+    op.alter_column('notifications', 'user_id', existing_type=sa.Integer(), nullable=False, schema='fsbb')
+    op.drop_column('notifications', 'portee_id', schema='fsbb')
+    op.drop_column('notifications', 'portee', schema='fsbb')
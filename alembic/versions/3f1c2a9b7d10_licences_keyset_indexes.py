@@ -0,0 +1,48 @@
+"""licences keyset indexes
+
+date_creation renseignée pour les licences existantes puis rendue obligatoire.
+
+Revision ID: 3f1c2a9b7d10
+Revises: ad0c2b62bb6c
+Create Date: 2026-10-18 09:12:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d10'
+down_revision: Union[str, Sequence[str], None] = 'ad0c2b62bb6c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pagination par clé (date_creation, id) : une date NULL donnerait un curseur inutilisable
+    op.execute(
+        "UPDATE fsbb.licences"
+        " SET date_creation = COALESCE(date_soumission, date_validation, now() AT TIME ZONE 'utc')"
+        " WHERE date_creation IS NULL"
+    )
+    op.alter_column('licences', 'date_creation', existing_type=sa.DateTime(), nullable=False, schema='fsbb')
+    op.create_index(
+        'ix_licences_club_saison_statut_date', 'licences',
+        ['club_id', 'saison_id', 'statut', 'date_creation'],
+        schema='fsbb', if_not_exists=True,
+    )
+    op.create_index(
+        'ix_licences_date_creation_id', 'licences',
+        ['date_creation', 'id'],
+        schema='fsbb', if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_licences_date_creation_id', table_name='licences', schema='fsbb')
+    op.drop_index('ix_licences_club_saison_statut_date', table_name='licences', schema='fsbb')
+    op.alter_column('licences', 'date_creation', existing_type=sa.DateTime(), nullable=True, schema='fsbb')
@@ -0,0 +1,72 @@
+"""notification inbox index and unread counters
+
+Revision ID: 4b1e7c9d2a68
+Revises: 2d8f4a6c1e53
+Create Date: 2026-10-18 22:03:51.772914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1e7c9d2a68'
+down_revision: Union[str, Sequence[str], None] = '2d8f4a6c1e53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_notifications_user_read_created', 'notifications', ['user_id', 'read', sa.text('created_at DESC')],
+        schema='fsbb', if_not_exists=True,
+    )
+    op.create_table(
+        'notification_compteurs',
+        sa.Column('sujet', sa.String(length=40), nullable=False),
+        sa.Column('publiees', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('sujet'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+    op.create_table(
+        'notification_compteurs_lus',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('sujet', sa.String(length=40), nullable=False),
+        sa.Column('lues', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['fsbb.users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'sujet'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+    # Compteurs initialisés à partir des notifications existantes
+    op.execute("""
+        INSERT INTO fsbb.notification_compteurs (sujet, publiees)
+        SELECT CASE WHEN portee = 'user' THEN 'user:' || user_id ELSE portee || ':' || portee_id END, count(*)
+        FROM fsbb.notifications
+        GROUP BY 1
+        ON CONFLICT (sujet) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO fsbb.notification_compteurs_lus (user_id, sujet, lues)
+        SELECT user_id, 'user:' || user_id, count(*)
+        FROM fsbb.notifications
+        WHERE portee = 'user' AND read
+        GROUP BY user_id
+        UNION ALL
+        SELECT l.user_id, n.portee || ':' || n.portee_id, count(*)
+        FROM fsbb.notification_lectures l
+        JOIN fsbb.notifications n ON n.id = l.notification_id
+        GROUP BY l.user_id, n.portee, n.portee_id
+        ON CONFLICT (user_id, sujet) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_compteurs_lus', schema='fsbb')
+    op.drop_table('notification_compteurs', schema='fsbb')
+    op.drop_index('ix_notifications_user_read_created', table_name='notifications', schema='fsbb')
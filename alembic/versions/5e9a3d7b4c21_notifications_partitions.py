@@ -0,0 +1,119 @@
+"""partition notifications by month and add the archive table
+
+Revision ID: 5e9a3d7b4c21
+Revises: 4b1e7c9d2a68
+Create Date: 2026-10-18 23:18:40.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a3d7b4c21'
+down_revision: Union[str, Sequence[str], None] = '4b1e7c9d2a68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_fsbb_notifications_id', ['id']),
+    ('ix_notifications_portee', ['portee', 'portee_id', 'created_at']),
+    ('ix_notifications_user_read_created', ['user_id', 'read', sa.text('created_at DESC')]),
+)
+
+
+def _create_notifications(partitioned: bool) -> None:
+    op.execute(f"""
+        CREATE TABLE fsbb.notifications (
+            id integer NOT NULL DEFAULT nextval('fsbb.notifications_id_seq'::regclass),
+            user_id integer REFERENCES fsbb.users (id),
+            portee varchar(20) NOT NULL DEFAULT 'user',
+            portee_id integer,
+            titre varchar NOT NULL,
+            message varchar NOT NULL,
+            type varchar NOT NULL,
+            lien varchar,
+            read boolean,
+            created_at timestamp without time zone NOT NULL,
+            PRIMARY KEY ({'id, created_at' if partitioned else 'id'})
+        ){' PARTITION BY RANGE (created_at)' if partitioned else ''}
+    """)
+    op.execute("ALTER SEQUENCE fsbb.notifications_id_seq OWNED BY fsbb.notifications.id")
+
+
+def _replace_notifications(partitioned: bool) -> None:
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS fsbb.{name}")
+    op.execute("ALTER TABLE fsbb.notifications RENAME TO notifications_ancienne")
+    op.execute("ALTER TABLE fsbb.notifications_ancienne DROP CONSTRAINT notifications_pkey")
+    op.execute("ALTER SEQUENCE fsbb.notifications_id_seq OWNED BY NONE")
+    _create_notifications(partitioned)
+
+    if partitioned:
+        # Une partition par mois couvert par les données, jusqu'au mois courant + 3
+        op.execute("CREATE TABLE fsbb.notifications_defaut PARTITION OF fsbb.notifications DEFAULT")
+        op.execute("""
+            DO $$
+            DECLARE
+                mois date;
+            BEGIN
+                FOR mois IN
+                    SELECT generate_series(
+                        date_trunc('month', LEAST(COALESCE(min(created_at), now()), now()))::date,
+                        (date_trunc('month', now()) + interval '3 months')::date,
+                        interval '1 month'
+                    )::date
+                    FROM fsbb.notifications_ancienne
+                LOOP
+                    EXECUTE format(
+                        'CREATE TABLE fsbb.%I PARTITION OF fsbb.notifications FOR VALUES FROM (%L) TO (%L)',
+                        'notifications_p' || to_char(mois, 'YYYY_MM'), mois, (mois + interval '1 month')::date
+                    );
+                END LOOP;
+            END $$
+        """)
+
+    op.execute("""
+        INSERT INTO fsbb.notifications (id, user_id, portee, portee_id, titre, message, type, lien, read, created_at)
+        SELECT id, user_id, portee, portee_id, titre, message, type, lien, read, COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM fsbb.notifications_ancienne
+    """)
+    op.execute("DROP TABLE fsbb.notifications_ancienne")
+    for name, columns in INDEXES:
+        op.create_index(name, 'notifications', columns, schema='fsbb')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Une clé étrangère ne peut pas viser l'id seul d'une table partitionnée
+    op.execute("ALTER TABLE fsbb.notification_lectures DROP CONSTRAINT IF EXISTS notification_lectures_notification_id_fkey")
+    _replace_notifications(partitioned=True)
+    op.create_table(
+        'notification_archives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('motif', sa.String(length=20), nullable=False),
+        sa.Column('premiere_date', sa.DateTime(), nullable=False),
+        sa.Column('derniere_date', sa.DateTime(), nullable=False),
+        sa.Column('nombre', sa.Integer(), nullable=False),
+        sa.Column('donnees', sa.LargeBinary(), nullable=False),
+        sa.Column('date_archivage', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_archives', schema='fsbb')
+    _replace_notifications(partitioned=False)
+    op.execute("""
+        DELETE FROM fsbb.notification_lectures l
+        WHERE NOT EXISTS (SELECT 1 FROM fsbb.notifications n WHERE n.id = l.notification_id)
+    """)
+    op.create_foreign_key(
+        'notification_lectures_notification_id_fkey', 'notification_lectures', 'notifications',
+        ['notification_id'], ['id'], source_schema='fsbb', referent_schema='fsbb', ondelete='CASCADE',
+    )
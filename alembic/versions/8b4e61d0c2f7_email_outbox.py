@@ -0,0 +1,51 @@
+"""email outbox
+
+Revision ID: 8b4e61d0c2f7
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 11:03:27.504912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e61d0c2f7'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('destinataire', sa.String(), nullable=False),
+        sa.Column('sujet', sa.String(), nullable=False),
+        sa.Column('corps_html', sa.String(), nullable=False),
+        sa.Column('corps_texte', sa.String(), nullable=True),
+        sa.Column('statut', sa.String(length=20), nullable=False),
+        sa.Column('tentatives', sa.Integer(), nullable=False),
+        sa.Column('prochaine_tentative', sa.DateTime(), nullable=False),
+        sa.Column('derniere_erreur', sa.String(), nullable=True),
+        sa.Column('date_creation', sa.DateTime(), nullable=True),
+        sa.Column('date_envoi', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+    op.create_index('ix_fsbb_email_outbox_id', 'email_outbox', ['id'], schema='fsbb', if_not_exists=True)
+    op.create_index(
+        'ix_email_outbox_statut_prochaine', 'email_outbox', ['statut', 'prochaine_tentative'],
+        schema='fsbb', if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_statut_prochaine', table_name='email_outbox', schema='fsbb')
+    op.drop_index('ix_fsbb_email_outbox_id', table_name='email_outbox', schema='fsbb')
+    op.drop_table('email_outbox', schema='fsbb')
@@ -0,0 +1,420 @@
+"""initial schema
+
+Tables du dépôt avant la première migration (jusqu'ici créées par create_all).
+
+Revision ID: ad0c2b62bb6c
+Revises: 
+Create Date: 2026-10-18 01:25:17.211554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad0c2b62bb6c'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_categories_id'), 'categories', ['id'], unique=False, schema='fsbb')
+    op.create_table('clubs_infos_type',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('valeur', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('valeur'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_clubs_infos_type_id'), 'clubs_infos_type', ['id'], unique=False, schema='fsbb')
+    op.create_table('devis',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reference', sa.String(length=20), nullable=False),
+    sa.Column('statut', sa.Enum('nouveau', 'en_cours', 'accepte', 'refuse', name='statut_devis'), nullable=False),
+    sa.Column('nom_contact', sa.String(), nullable=False),
+    sa.Column('email_contact', sa.String(), nullable=False),
+    sa.Column('telephone_contact', sa.String(), nullable=True),
+    sa.Column('nom_organisation', sa.String(), nullable=True),
+    sa.Column('type_organisation', sa.String(), nullable=True),
+    sa.Column('message', sa.String(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.Column('date_traitement', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_devis_id'), 'devis', ['id'], unique=False, schema='fsbb')
+    op.create_index(op.f('ix_fsbb_devis_reference'), 'devis', ['reference'], unique=True, schema='fsbb')
+    op.create_table('federation_type',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    sa.UniqueConstraint('name'),
+    schema='fsbb'
+    )
+    op.create_table('offres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('description_courte', sa.String(), nullable=True),
+    sa.Column('prix_mensuel', sa.Integer(), nullable=True),
+    sa.Column('prix_annuel', sa.Integer(), nullable=True),
+    sa.Column('devise', sa.String(length=3), nullable=True),
+    sa.Column('fonctionnalites', sa.JSON(), nullable=True),
+    sa.Column('badge', sa.String(), nullable=True),
+    sa.Column('populaire', sa.Boolean(), nullable=True),
+    sa.Column('actif', sa.Boolean(), nullable=True),
+    sa.Column('ordre', sa.Integer(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_offres_id'), 'offres', ['id'], unique=False, schema='fsbb')
+    op.create_table('roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('description', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name'),
+    schema='fsbb'
+    )
+    op.create_table('types_fichier',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_types_fichier_id'), 'types_fichier', ['id'], unique=False, schema='fsbb')
+    op.create_table('devis_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('devis_id', sa.Integer(), nullable=False),
+    sa.Column('offre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['devis_id'], ['fsbb.devis.id'], ),
+    sa.ForeignKeyConstraint(['offre_id'], ['fsbb.offres.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_devis_items_id'), 'devis_items', ['id'], unique=False, schema='fsbb')
+    op.create_table('federations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('type', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['type'], ['fsbb.federation_type.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    sa.UniqueConstraint('name'),
+    schema='fsbb'
+    )
+    op.create_table('competitions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+    sa.Column('description', sa.String(length=300), nullable=True),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_table('federation_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['categorie_id'], ['fsbb.categories.id'], ),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('federation_id', 'categorie_id', name='uq_fed_cat'),
+    schema='fsbb'
+    )
+    op.create_table('ligues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=10), nullable=False),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code', 'federation_id', name='uq_ligue_code_fed'),
+    schema='fsbb'
+    )
+    op.create_table('saisons',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=9), nullable=False),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.Column('date_debut', sa.Date(), nullable=False),
+    sa.Column('date_fin', sa.Date(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code', 'federation_id', name='_unique_saison_par_fede'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_saisons_id'), 'saisons', ['id'], unique=False, schema='fsbb')
+    op.create_table('clubs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('raison_sociale', sa.String(), nullable=True),
+    sa.Column('division', sa.String(), nullable=True),
+    sa.Column('adresse', sa.String(), nullable=True),
+    sa.Column('telephone', sa.String(), nullable=True),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('logo_url', sa.String(), nullable=True),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.Column('ligue_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.ForeignKeyConstraint(['ligue_id'], ['fsbb.ligues.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_clubs_email'), 'clubs', ['email'], unique=True, schema='fsbb')
+    op.create_index(op.f('ix_fsbb_clubs_id'), 'clubs', ['id'], unique=False, schema='fsbb')
+    op.create_table('adherents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('prenom', sa.String(), nullable=False),
+    sa.Column('date_naissance', sa.Date(), nullable=False),
+    sa.Column('genre', sa.String(length=10), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('telephone', sa.String(), nullable=True),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.Column('actif', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['categorie_id'], ['fsbb.categories.id'], ),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom', 'prenom', 'date_naissance', 'club_id', name='_unique_adherent_club'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_adherents_id'), 'adherents', ['id'], unique=False, schema='fsbb')
+    op.create_table('affiliations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('federation_id', sa.Integer(), nullable=False),
+    sa.Column('competition_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('requested_at', sa.DateTime(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['competition_id'], ['fsbb.competitions.id'], ),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('club_id', 'federation_id', 'competition_id', name='uq_affiliation'),
+    schema='fsbb'
+    )
+    op.create_table('clubs_infos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('id_type', sa.Integer(), nullable=False),
+    sa.Column('valeur', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['id_type'], ['fsbb.clubs_infos_type.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('club_id', 'id_type', name='uq_club_info_unique'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_clubs_infos_id'), 'clubs_infos', ['id'], unique=False, schema='fsbb')
+    op.create_table('invitations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.Column('club_id', sa.Integer(), nullable=True),
+    sa.Column('federation_id', sa.Integer(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('used', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_invitations_id'), 'invitations', ['id'], unique=False, schema='fsbb')
+    op.create_index(op.f('ix_fsbb_invitations_token'), 'invitations', ['token'], unique=True, schema='fsbb')
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('prenom', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('role', sa.String(), nullable=True),
+    sa.Column('avatar_url', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('club_id', sa.Integer(), nullable=True),
+    sa.Column('federation_id', sa.Integer(), nullable=True),
+    sa.Column('ligue_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['federation_id'], ['fsbb.federations.id'], ),
+    sa.ForeignKeyConstraint(['ligue_id'], ['fsbb.ligues.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_users_email'), 'users', ['email'], unique=True, schema='fsbb')
+    op.create_index(op.f('ix_fsbb_users_id'), 'users', ['id'], unique=False, schema='fsbb')
+    op.create_table('licences',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero', sa.String(length=10), nullable=True),
+    sa.Column('statut', sa.Enum('brouillon', 'soumise', 'en_cours', 'validee', 'refusee', 'en_verification', name='statut_demande'), nullable=False),
+    sa.Column('type_demande', sa.String(), nullable=False),
+    sa.Column('nom', sa.String(), nullable=False),
+    sa.Column('prenom', sa.String(), nullable=False),
+    sa.Column('date_naissance', sa.Date(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=False),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('saison_id', sa.Integer(), nullable=False),
+    sa.Column('adherent_id', sa.Integer(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.Column('date_soumission', sa.DateTime(), nullable=True),
+    sa.Column('date_validation', sa.DateTime(), nullable=True),
+    sa.Column('date_refus', sa.DateTime(), nullable=True),
+    sa.Column('commentaire_refus', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['adherent_id'], ['fsbb.adherents.id'], ),
+    sa.ForeignKeyConstraint(['categorie_id'], ['fsbb.categories.id'], ),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['saison_id'], ['fsbb.saisons.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('adherent_id', 'saison_id', name='_unique_licence_par_saison'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_licences_id'), 'licences', ['id'], unique=False, schema='fsbb')
+    op.create_index(op.f('ix_fsbb_licences_numero'), 'licences', ['numero'], unique=True, schema='fsbb')
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('titre', sa.String(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('lien', sa.String(), nullable=True),
+    sa.Column('read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['fsbb.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_notifications_id'), 'notifications', ['id'], unique=False, schema='fsbb')
+    op.create_table('user_roles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('granted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['role_id'], ['fsbb.roles.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['fsbb.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'role_id', name='uq_user_role'),
+    schema='fsbb'
+    )
+    op.create_table('demandes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('statut', sa.String(), nullable=False),
+    sa.Column('date_creation', sa.DateTime(), nullable=True),
+    sa.Column('date_modification', sa.DateTime(), nullable=True),
+    sa.Column('date_soumission', sa.DateTime(), nullable=True),
+    sa.Column('date_validation', sa.DateTime(), nullable=True),
+    sa.Column('date_refus', sa.DateTime(), nullable=True),
+    sa.Column('utilisateur_id', sa.Integer(), nullable=False),
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('licence_id', sa.Integer(), nullable=True),
+    sa.Column('commentaires', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['club_id'], ['fsbb.clubs.id'], ),
+    sa.ForeignKeyConstraint(['licence_id'], ['fsbb.licences.id'], ),
+    sa.ForeignKeyConstraint(['utilisateur_id'], ['fsbb.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_demandes_id'), 'demandes', ['id'], unique=False, schema='fsbb')
+    op.create_table('fichiers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom_fichier', sa.String(), nullable=False),
+    sa.Column('chemin', sa.String(), nullable=False),
+    sa.Column('taille', sa.Integer(), nullable=True),
+    sa.Column('date_upload', sa.DateTime(), nullable=True),
+    sa.Column('id_licence', sa.Integer(), nullable=False),
+    sa.Column('id_type', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_licence'], ['fsbb.licences.id'], ),
+    sa.ForeignKeyConstraint(['id_type'], ['fsbb.types_fichier.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id_licence', 'id_type', name='uq_licence_fichier_unique'),
+    schema='fsbb'
+    )
+    op.create_index(op.f('ix_fsbb_fichiers_id'), 'fichiers', ['id'], unique=False, schema='fsbb')
+    op.create_table('demandes_historique',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('demande_id', sa.Integer(), nullable=False),
+    sa.Column('ancien_statut', sa.String(), nullable=True),
+    sa.Column('nouveau_statut', sa.String(), nullable=True),
+    sa.Column('date_changement', sa.DateTime(), nullable=True),
+    sa.Column('modifie_par_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['demande_id'], ['fsbb.demandes.id'], ),
+    sa.ForeignKeyConstraint(['modifie_par_id'], ['fsbb.users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='fsbb'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('demandes_historique', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_fichiers_id'), table_name='fichiers', schema='fsbb')
+    op.drop_table('fichiers', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_demandes_id'), table_name='demandes', schema='fsbb')
+    op.drop_table('demandes', schema='fsbb')
+    op.drop_table('user_roles', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_notifications_id'), table_name='notifications', schema='fsbb')
+    op.drop_table('notifications', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_licences_numero'), table_name='licences', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_licences_id'), table_name='licences', schema='fsbb')
+    op.drop_table('licences', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_users_id'), table_name='users', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_users_email'), table_name='users', schema='fsbb')
+    op.drop_table('users', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_invitations_token'), table_name='invitations', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_invitations_id'), table_name='invitations', schema='fsbb')
+    op.drop_table('invitations', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_clubs_infos_id'), table_name='clubs_infos', schema='fsbb')
+    op.drop_table('clubs_infos', schema='fsbb')
+    op.drop_table('affiliations', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_adherents_id'), table_name='adherents', schema='fsbb')
+    op.drop_table('adherents', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_clubs_id'), table_name='clubs', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_clubs_email'), table_name='clubs', schema='fsbb')
+    op.drop_table('clubs', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_saisons_id'), table_name='saisons', schema='fsbb')
+    op.drop_table('saisons', schema='fsbb')
+    op.drop_table('ligues', schema='fsbb')
+    op.drop_table('federation_categories', schema='fsbb')
+    op.drop_table('competitions', schema='fsbb')
+    op.drop_table('federations', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_devis_items_id'), table_name='devis_items', schema='fsbb')
+    op.drop_table('devis_items', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_types_fichier_id'), table_name='types_fichier', schema='fsbb')
+    op.drop_table('types_fichier', schema='fsbb')
+    op.drop_table('roles', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_offres_id'), table_name='offres', schema='fsbb')
+    op.drop_table('offres', schema='fsbb')
+    op.drop_table('federation_type', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_devis_reference'), table_name='devis', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_devis_id'), table_name='devis', schema='fsbb')
+    op.drop_table('devis', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_clubs_infos_type_id'), table_name='clubs_infos_type', schema='fsbb')
+    op.drop_table('clubs_infos_type', schema='fsbb')
+    op.drop_index(op.f('ix_fsbb_categories_id'), table_name='categories', schema='fsbb')
+    op.drop_table('categories', schema='fsbb')
+    sa.Enum(name='statut_demande').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='statut_devis').drop(op.get_bind(), checkfirst=True)
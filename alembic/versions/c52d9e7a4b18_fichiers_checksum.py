@@ -0,0 +1,30 @@
+"""fichiers checksum and per-type size limit
+
+Revision ID: c52d9e7a4b18
+Revises: 8b4e61d0c2f7
+Create Date: 2026-10-18 14:12:05.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52d9e7a4b18'
+down_revision: Union[str, Sequence[str], None] = '8b4e61d0c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('fichiers', sa.Column('checksum', sa.String(length=64), nullable=True), schema='fsbb', if_not_exists=True)
+    op.add_column('types_fichier', sa.Column('taille_max', sa.Integer(), nullable=True), schema='fsbb', if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('types_fichier', 'taille_max', schema='fsbb')
+    op.drop_column('fichiers', 'checksum', schema='fsbb')
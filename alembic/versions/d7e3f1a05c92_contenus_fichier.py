@@ -0,0 +1,40 @@
+"""contenus_fichier content-addressed store
+
+Revision ID: d7e3f1a05c92
+Revises: c52d9e7a4b18
+Create Date: 2026-10-18 15:40:51.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3f1a05c92'
+down_revision: Union[str, Sequence[str], None] = 'c52d9e7a4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'contenus_fichier',
+        sa.Column('checksum', sa.String(length=64), nullable=False),
+        sa.Column('chemin', sa.String(), nullable=False),
+        sa.Column('taille', sa.Integer(), nullable=False),
+        sa.Column('taille_stockee', sa.Integer(), nullable=False),
+        sa.Column('compression', sa.String(length=10), nullable=True),
+        sa.Column('nb_references', sa.Integer(), nullable=False),
+        sa.Column('date_creation', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('checksum'),
+        schema='fsbb',
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('contenus_fichier', schema='fsbb')
@@ -0,0 +1,30 @@
+"""fichiers miniature and apercu
+
+Revision ID: e81b4c6f2d35
+Revises: d7e3f1a05c92
+Create Date: 2026-10-18 17:05:12.648391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b4c6f2d35'
+down_revision: Union[str, Sequence[str], None] = 'd7e3f1a05c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('fichiers', sa.Column('miniature', sa.String(), nullable=True), schema='fsbb', if_not_exists=True)
+    op.add_column('fichiers', sa.Column('apercu', sa.String(), nullable=True), schema='fsbb', if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('fichiers', 'apercu', schema='fsbb')
+    op.drop_column('fichiers', 'miniature', schema='fsbb')
@@ -0,0 +1,28 @@
+"""licence numero sequence
+
+Revision ID: f2a7c93e1b46
+Revises: e81b4c6f2d35
+Create Date: 2026-10-18 18:22:40.117204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c93e1b46'
+down_revision: Union[str, Sequence[str], None] = 'e81b4c6f2d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('licence_numero_seq', schema='fsbb'), if_not_exists=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('licence_numero_seq', schema='fsbb'), if_exists=True))
@@ -1,32 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+from typing import Literal
 
 from app.db import models
-from app.db.database import get_db
-from app.schemas.adherent_schema import AdherentCreate, AdherentUpdate, AdherentOut, AdherentCreateOut
+from app.db.database import get_async_db
+from app.schemas.adherent_schema import AdherentCreate, AdherentUpdate, AdherentOut, AdherentCreateOut, AdherentImportReport
 from app.api.v1.routes.users import get_current_user
+from app.services.adherent_import import import_adherents
+from app.services.exports import export_response
 
 router = APIRouter(prefix="/clubs/{club_id}", tags=["Adherents"])
 
 
+# ------------------ Utils ------------------
+def check_club_access(club, current_user):
+    """Opérations en masse : membres du club, ou administrateur de la fédération du club."""
+    if current_user.get("role") == "admin_federation":
+        if not current_user.get("federation"):
+            raise HTTPException(status_code=403, detail="Aucune fédération assignée.")
+        if club.federation_id != current_user["federation"]["id"]:
+            raise HTTPException(status_code=403, detail="Accès interdit à cette fédération.")
+    elif current_user.get("club_id") != club.id:
+        raise HTTPException(status_code=403, detail="Accès interdit à ce club.")
+
+
 # ------------------ Liste des adhérents ------------------
 @router.get("/adherents", response_model=list[AdherentOut])
-def list_adherents(club_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    club = db.query(models.Club).filter(models.Club.id == club_id).first()
+async def list_adherents(club_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    club = await db.get(models.Club, club_id)
     if not club:
         raise HTTPException(status_code=404, detail="Club introuvable")
 
-    adherents = (
-        db.query(models.Adherent)
+    result = await db.execute(
+        select(models.Adherent)
         .options(
             joinedload(models.Adherent.licences),
             joinedload(models.Adherent.categorie),
         )
         .filter(models.Adherent.club_id == club_id)
-        .all()
     )
+    adherents = result.unique().scalars().all()
     return [
         AdherentOut(
             id=ad.id,
@@ -47,10 +64,54 @@ def list_adherents(club_id: int, db: Session = Depends(get_db), user=Depends(get
     ]
 
 
+# ------------------ Export des adhérents ------------------
+@router.get("/adherents/export")
+async def export_adherents(
+    club_id: int,
+    request: Request,
+    format: Literal["csv", "xlsx"] = "csv",
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+):
+    """Même périmètre que la liste, envoyé en flux ; numéro de la dernière licence de chaque adhérent."""
+    club = await db.get(models.Club, club_id)
+    if not club:
+        raise HTTPException(status_code=404, detail="Club introuvable")
+    check_club_access(club, user)
+
+    A = models.Adherent
+    derniere_licence = (
+        select(models.Licence.numero)
+        .filter(models.Licence.adherent_id == A.id)
+        .order_by(models.Licence.date_creation.desc(), models.Licence.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = (
+        select(
+            A.id,
+            A.nom,
+            A.prenom,
+            A.date_naissance,
+            A.genre,
+            A.email,
+            A.telephone,
+            A.actif,
+            models.Categorie.nom.label("categorie"),
+            derniere_licence.label("licence_numero"),
+            A.date_creation,
+        )
+        .outerjoin(models.Categorie, models.Categorie.id == A.categorie_id)
+        .filter(A.club_id == club_id)
+        .order_by(A.nom, A.prenom, A.id)
+    )
+    return export_response(request, query, format, f"adherents_club_{club_id}_{datetime.utcnow():%Y%m%d}")
+
+
 # ------------------ Créer un adhérent ------------------
 @router.post("/adherents", response_model=AdherentCreateOut, status_code=status.HTTP_201_CREATED)
-def create_adherent(club_id: int, data: AdherentCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    club = db.query(models.Club).filter(models.Club.id == club_id).first()
+async def create_adherent(club_id: int, data: AdherentCreate, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    club = await db.get(models.Club, club_id)
     if not club:
         raise HTTPException(status_code=404, detail="Club introuvable")
 
@@ -59,10 +120,10 @@ def create_adherent(club_id: int, data: AdherentCreate, db: Session = Depends(ge
     db.add(adherent)
 
     try:
-        db.commit()
-        db.refresh(adherent)
+        await db.commit()
+        await db.refresh(adherent)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=409,
             detail="Un adhérent avec ce nom, prénom et cette date de naissance existe déjà dans ce club."
@@ -83,18 +144,38 @@ def create_adherent(club_id: int, data: AdherentCreate, db: Session = Depends(ge
     )
 
 
+# ------------------ Import CSV ------------------
+@router.post("/adherents/import", response_model=AdherentImportReport)
+async def import_adherents_csv(
+    club_id: int,
+    fichier: UploadFile = File(...),
+    mettre_a_jour: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+):
+    """Import en masse : adhérents déjà présents dans le club ignorés, ou mis à jour avec `mettre_a_jour`."""
+    club = await db.get(models.Club, club_id)
+    if not club:
+        raise HTTPException(status_code=404, detail="Club introuvable")
+    check_club_access(club, user)
+
+    rapport = await import_adherents(db, club_id, fichier, mettre_a_jour)
+    await db.commit()
+    return rapport
+
+
 # ------------------ Détails d’un adhérent ------------------
 @router.get("/adherents/{adherent_id}", response_model=AdherentOut)
-def get_adherent(adherent_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    adherent = (
-        db.query(models.Adherent)
+async def get_adherent(adherent_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    result = await db.execute(
+        select(models.Adherent)
         .options(
             joinedload(models.Adherent.licences),
             joinedload(models.Adherent.categorie),
         )
         .filter(models.Adherent.id == adherent_id)
-        .first()
     )
+    adherent = result.unique().scalars().first()
     if not adherent:
         raise HTTPException(status_code=404, detail="Adhérent introuvable")
 
@@ -117,16 +198,16 @@ def get_adherent(adherent_id: int, db: Session = Depends(get_db), user=Depends(g
 
 # ------------------ Modifier un adhérent ------------------
 @router.put("/adherents/{adherent_id}", response_model=AdherentCreateOut)
-def update_adherent(adherent_id: int, data: AdherentUpdate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    adherent = db.query(models.Adherent).filter(models.Adherent.id == adherent_id).first()
+async def update_adherent(adherent_id: int, data: AdherentUpdate, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    adherent = await db.get(models.Adherent, adherent_id)
     if not adherent:
         raise HTTPException(status_code=404, detail="Adhérent introuvable")
 
     for field, value in data.dict(exclude_unset=True).items():
         setattr(adherent, field, value)
 
-    db.commit()
-    db.refresh(adherent)
+    await db.commit()
+    await db.refresh(adherent)
 
     return AdherentCreateOut(
         id=adherent.id,
@@ -145,10 +226,10 @@ def update_adherent(adherent_id: int, data: AdherentUpdate, db: Session = Depend
 
 # ------------------ Supprimer un adhérent ------------------
 @router.delete("/adherents/{adherent_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_adherent(adherent_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    adherent = db.query(models.Adherent).filter(models.Adherent.id == adherent_id).first()
+async def delete_adherent(adherent_id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    adherent = await db.get(models.Adherent, adherent_id)
     if not adherent:
         raise HTTPException(status_code=404, detail="Adhérent introuvable")
 
-    db.delete(adherent)
-    db.commit()
\ No newline at end of file
+    await db.delete(adherent)
+    await db.commit()
\ No newline at end of file
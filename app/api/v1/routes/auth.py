@@ -6,6 +6,8 @@ from app.db import models
 from app.db.database import get_db
 from app.schemas.user_schema import InvitationRequest, UserCreate, UserResponse
 from app.core import security
+from app.core.config import settings
+from app.api.v1.routes.users import build_principal
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -20,6 +22,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             joinedload(models.User.club),
             joinedload(models.User.federation),
             joinedload(models.User.ligue),
+            joinedload(models.User.roles).joinedload(models.UserRole.role),
         )
         .filter(models.User.email == form_data.username)
         .first()
@@ -33,7 +36,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ce compte est désactivé. Veuillez contacter l'administrateur.")
 
     print('BBBBBBBBBBBBB')
-    access_token = security.create_access_token({
+    claims = {
             "id": user.id,
             "nom": user.nom,
             "prenom": user.prenom,
@@ -50,7 +53,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             } if user.club else None,
             "federation": user.federation.name if user.federation else None,
             "ligue": user.ligue.name if user.ligue else None,
-        })
+        }
+    # Principal complet seulement en mode sans état : sinon il alourdirait chaque token pour rien
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        claims["principal"] = build_principal(user)
+    access_token = security.create_access_token(claims)
     print(access_token)
     return {
         "access_token": access_token,
@@ -79,25 +86,24 @@ def create_invitation(invite: InvitationRequest, db: Session = Depends(get_db)):
     )
 
     db.add(invitation)
-    db.commit()
-    db.refresh(invitation)
 
     from app.services import email_service
+    from app.services.email_queue import email_worker
     # URL de production du frontend
     frontend_url = "https://licencia-7a28e.firebaseapp.com"
     invitation_link = f"{frontend_url}/register?token={token}"
 
-    try:
-        email_service.send_invitation_email(
-            to_email=invite.email,
-            invitation_link=invitation_link,
-            role=invite.role
-        )
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        # On continue quand même la création de l'invitation en DB
-        # ou on pourrait lever une erreur si on veut que l'envoi soit bloquant
-        pass
+    # L'email est mis en file avec l'invitation : il part même si le SMTP est lent ou en panne
+    email_service.send_invitation_email(
+        db,
+        to_email=invite.email,
+        invitation_link=invitation_link,
+        role=invite.role
+    )
+
+    db.commit()
+    db.refresh(invitation)
+    email_worker.wake()
 
     return {
         "id": invitation.id,
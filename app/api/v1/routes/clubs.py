@@ -2,13 +2,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from typing import List
-from sqlalchemy import func, distinct
+from sqlalchemy import func, false
 from datetime import date
 
 from app.db import models
 from app.db.database import get_db
 from app.schemas.club_schema import ClubOut, ClubDetail, ClubCreate, ClubInfoTypeBase
 from app.api.v1.routes.users import get_current_user
+from app.core.principal_cache import principal_cache
+from app.services.reference_data import reference_data
 
 router = APIRouter(prefix="/clubs", tags=["Clubs"])
 
@@ -98,6 +100,7 @@ def update_club(
 
     db.commit()
     db.refresh(club)
+    principal_cache.invalidate_club(club_id)
     return club
 
 
@@ -117,6 +120,7 @@ def delete_club(
 
     db.delete(club)
     db.commit()
+    principal_cache.invalidate_club(club_id)
     return {"message": "Club supprimé"}
 
 
@@ -162,9 +166,8 @@ def update_club_infos(
 
 
 @router.get("/clubs_infos_type", response_model=List[ClubInfoTypeBase])
-def get_all_infos_types(db: Session = Depends(get_db)):
-    types = db.query(models.ClubInfoType).all()
-    return types
+def get_all_infos_types():
+    return reference_data.get().club_info_types
 
 
 @router.get("/{club_id}/stats")
@@ -182,43 +185,53 @@ def get_club_stats(
     if not club:
         raise HTTPException(status_code=404, detail="Club non trouvé")
 
-    # Saison courante
-    saison_courante = (
+    # Saisons de la fédération du club : la courante et la précédente
+    saisons = (
         db.query(models.Saison)
-        .filter(models.Saison.active == True)
-        .first()
+        .filter(models.Saison.federation_id == club.federation_id)
+        .order_by(models.Saison.date_debut.desc())
+        .all()
     )
+    saison_courante = next((s for s in saisons if s.active), None)
 
     if not saison_courante:
         raise HTTPException(status_code=400, detail="Aucune saison active")
 
-    # Licences saison courante
-    licences_saison = (
-        db.query(models.Licence)
-        .filter(models.Licence.club_id == club_id)
-        .filter(models.Licence.saison_id == saison_courante.id)
+    saison_precedente = next(
+        (s for s in saisons if s.date_debut < saison_courante.date_debut), None
     )
+    saison_ids = [saison_courante.id] + ([saison_precedente.id] if saison_precedente else [])
 
-    licences_valides = licences_saison.filter(
-        models.Licence.statut == "validee"
-    ).count()
-
-    licences_attente = licences_saison.filter(
-        models.Licence.statut == "soumise"
-    ).count()
+    # Agrégation conditionnelle en une passe : une ligne par adhérent, puis les totaux
+    licence = models.Licence
+    courante = licence.saison_id == saison_courante.id
+    precedente = licence.saison_id == saison_precedente.id if saison_precedente else false()
+    validee = licence.statut == "validee"
 
-    licences_refusees = licences_saison.filter(
-        models.Licence.statut == "refusee"
-    ).count()
-
-    # Adhérents distincts
-    adherents = (
-        db.query(distinct(models.Licence.adherent_id))
-        .filter(models.Licence.club_id == club_id)
-        .filter(models.Licence.saison_id == saison_courante.id)
-        .count()
+    par_adherent = (
+        db.query(
+            func.count(licence.id).filter(courante & validee).label("valides"),
+            func.count(licence.id).filter(courante & (licence.statut == "soumise")).label("attente"),
+            func.count(licence.id).filter(courante & (licence.statut == "refusee")).label("refusees"),
+            func.bool_or(courante).label("actuel"),
+            func.bool_or(precedente & validee).label("ancien"),
+            func.bool_or(courante & validee).label("renouvele"),
+        )
+        .filter(licence.club_id == club_id)
+        .filter(licence.saison_id.in_(saison_ids))
+        .group_by(licence.adherent_id)
+        .subquery()
     )
 
+    totaux = db.query(
+        func.coalesce(func.sum(par_adherent.c.valides), 0).label("valides"),
+        func.coalesce(func.sum(par_adherent.c.attente), 0).label("attente"),
+        func.coalesce(func.sum(par_adherent.c.refusees), 0).label("refusees"),
+        func.count().filter(par_adherent.c.actuel).label("adherents"),
+        func.count().filter(par_adherent.c.ancien).label("anciens"),
+        func.count().filter(par_adherent.c.ancien & par_adherent.c.renouvele).label("renouveles"),
+    ).one()
+
     # Licences par catégorie
     par_categorie = (
         db.query(
@@ -239,43 +252,17 @@ def get_club_stats(
     ]
 
     # Taux de renouvellement
-    saison_precedente = (
-        db.query(models.Saison)
-        .filter(models.Saison.id != saison_courante.id)
-        .order_by(models.Saison.date_debut.desc())
-        .first()
-    )
-
     taux_renouvellement = "0%"
-
-    if saison_precedente:
-        anciens = (
-            db.query(distinct(models.Licence.adherent_id))
-            .filter(models.Licence.club_id == club_id)
-            .filter(models.Licence.saison_id == saison_precedente.id)
-            .filter(models.Licence.statut == "validee")
-        )
-
-        nouveaux = (
-            db.query(distinct(models.Licence.adherent_id))
-            .filter(models.Licence.club_id == club_id)
-            .filter(models.Licence.saison_id == saison_courante.id)
-            .filter(models.Licence.statut == "validee")
-        )
-
-        total_anciens = anciens.count()
-        renouveles = anciens.intersect(nouveaux).count()
-
-        if total_anciens > 0:
-            taux = round((renouveles / total_anciens) * 100)
-            taux_renouvellement = f"{taux}%"
+    if totaux.anciens > 0:
+        taux = round((totaux.renouveles / totaux.anciens) * 100)
+        taux_renouvellement = f"{taux}%"
 
     # Réponse API
     return {
-        "adherents": adherents,
-        "licencesValides": licences_valides,
-        "licencesEnAttente": licences_attente,
-        "licencesExpirees": licences_refusees,
+        "adherents": totaux.adherents,
+        "licencesValides": int(totaux.valides),
+        "licencesEnAttente": int(totaux.attente),
+        "licencesExpirees": int(totaux.refusees),
         "tauxRenouvellement": taux_renouvellement,
         "parCategorie": licences_par_categorie
     }
\ No newline at end of file
@@ -1,8 +1,6 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.database import get_db
-from app.db import models
+from fastapi import APIRouter
 from app.schemas.club_schema import ClubInfoTypeBase
+from app.services.reference_data import reference_data
 from typing import List
 
 router = APIRouter(
@@ -11,5 +9,5 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[ClubInfoTypeBase])
-def get_all_clubs_infos_type(db: Session = Depends(get_db)):
-    return db.query(models.ClubInfoType).all()
+def get_all_clubs_infos_type():
+    return reference_data.get().club_info_types
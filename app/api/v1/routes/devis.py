@@ -1,30 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Integer, cast, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Literal, Optional
 from datetime import datetime
 
 from app.db import models
 from app.db.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.schemas.devis_schema import DevisCreate, DevisResponse, DevisItemResponse, DevisStatusUpdate
 from app.services.email_service import send_devis_confirmation
+from app.services.email_queue import email_worker
 
 router = APIRouter(prefix="/devis", tags=["Devis"])
 
 
 def generate_reference(db: Session) -> str:
-    """Génère une référence unique pour le devis : DEV-2026-0001."""
+    """Génère une référence unique pour le devis : DEV-2026-0001.
+
+    Le compteur de l'année est incrémenté par un UPDATE ... RETURNING : la ligne reste
+    verrouillée jusqu'au commit, deux demandes simultanées ne peuvent pas obtenir le même numéro.
+    """
     year = datetime.utcnow().year
-    last_devis = (
-        db.query(models.Devis)
-        .filter(models.Devis.reference.like(f"DEV-{year}-%"))
-        .order_by(models.Devis.id.desc())
-        .first()
-    )
-    if last_devis:
-        last_num = int(last_devis.reference.split("-")[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
+    compteur = models.DevisCompteur
+    new_num = db.execute(
+        update(compteur)
+        .where(compteur.annee == year)
+        .values(dernier_numero=compteur.dernier_numero + 1)
+        .returning(compteur.dernier_numero)
+    ).scalar()
+
+    if new_num is None:
+        # Premier devis de l'année (ou compteur pas encore créé) : on repart des références existantes
+        existant = (
+            select(func.coalesce(func.max(cast(func.split_part(models.Devis.reference, "-", 3), Integer)), 0))
+            .where(models.Devis.reference.like(f"DEV-{year}-%"))
+            .scalar_subquery()
+        )
+        new_num = db.execute(
+            pg_insert(compteur)
+            .values(annee=year, dernier_numero=existant + 1)
+            .on_conflict_do_update(
+                index_elements=[compteur.annee],
+                set_={"dernier_numero": compteur.dernier_numero + 1},
+            )
+            .returning(compteur.dernier_numero)
+        ).scalar_one()
+
     return f"DEV-{year}-{new_num:04d}"
 
 
@@ -44,51 +66,79 @@ def create_devis(devis_in: DevisCreate, db: Session = Depends(get_db)):
         message=devis_in.message,
     )
     db.add(devis)
-    db.flush()  # pour obtenir l'id
 
-    # Ajouter les items (offres choisies)
+    # Ajouter les items (offres choisies) : toutes les offres en une requête IN
+    offres = {}
+    if devis_in.offre_ids:
+        offres = {
+            o.id: o for o in db.query(models.Offre).filter(models.Offre.id.in_(set(devis_in.offre_ids)))
+        }
     offres_noms = []
     for offre_id in devis_in.offre_ids:
-        offre = db.query(models.Offre).filter(models.Offre.id == offre_id).first()
+        offre = offres.get(offre_id)
         if offre:
-            item = models.DevisItem(devis_id=devis.id, offre_id=offre.id)
-            db.add(item)
+            devis.items.append(models.DevisItem(offre=offre))
             offres_noms.append(offre.nom)
+    db.flush()  # ids et date_creation pour la réponse
 
-    db.commit()
-    db.refresh(devis)
-
-    # Envoi email de confirmation (non bloquant)
-    try:
-        send_devis_confirmation(
-            to_email=devis.email_contact,
-            nom_contact=devis.nom_contact,
-            reference=devis.reference,
-            offres=offres_noms,
-        )
-    except Exception as e:
-        print(f"[EMAIL] Erreur envoi email: {e}")
+    # Email de confirmation mis en file dans la même transaction (envoyé par le worker)
+    send_devis_confirmation(
+        db,
+        to_email=devis.email_contact,
+        nom_contact=devis.nom_contact,
+        reference=devis.reference,
+        offres=offres_noms,
+    )
 
-    # Construire la réponse
-    return _devis_to_response(devis, db)
+    # Réponse construite avant le commit, à partir des objets déjà en mémoire
+    response = _devis_to_response(devis)
+    db.commit()
+    email_worker.wake()
+    return response
 
 
 @router.get("", response_model=List[DevisResponse])
-def list_devis(db: Session = Depends(get_db)):
-    """Lister tous les devis (endpoint admin)."""
-    devis_list = (
-        db.query(models.Devis)
-        .options(joinedload(models.Devis.items).joinedload(models.DevisItem.offre))
-        .order_by(models.Devis.date_creation.desc())
-        .all()
+def list_devis(
+    response: Response,
+    db: Session = Depends(get_db),
+    statut: Optional[Literal["nouveau", "en_cours", "accepte", "refuse"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Lister les devis (endpoint admin), du plus récent au plus ancien.
+
+    Avec `limit`, la page suivante s'obtient en repassant l'en-tête X-Next-Cursor dans `cursor`.
+    """
+    query = db.query(models.Devis).options(
+        selectinload(models.Devis.items).joinedload(models.DevisItem.offre)
     )
-    return [_devis_to_response(d, db) for d in devis_list]
+    if statut:
+        query = query.filter(models.Devis.statut == statut)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(tuple_(models.Devis.date_creation, models.Devis.id) < tuple_(cursor_date, cursor_id))
+
+    query = query.order_by(models.Devis.date_creation.desc(), models.Devis.id.desc())
+    if limit:
+        query = query.limit(limit + 1)
+    devis_list = query.all()
+    if limit and len(devis_list) > limit:
+        devis_list = devis_list[:limit]
+        last = devis_list[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date_creation, last.id)
+
+    return [_devis_to_response(d) for d in devis_list]
 
 
 @router.patch("/{devis_id}/statut", response_model=DevisResponse)
 def update_devis_statut(devis_id: int, status_in: DevisStatusUpdate, db: Session = Depends(get_db)):
     """Changer le statut d'un devis (endpoint admin)."""
-    devis = db.query(models.Devis).filter(models.Devis.id == devis_id).first()
+    devis = (
+        db.query(models.Devis)
+        .options(selectinload(models.Devis.items).joinedload(models.DevisItem.offre))
+        .filter(models.Devis.id == devis_id)
+        .first()
+    )
     if not devis:
         raise HTTPException(status_code=404, detail="Devis non trouvé")
 
@@ -100,21 +150,21 @@ def update_devis_statut(devis_id: int, status_in: DevisStatusUpdate, db: Session
     if status_in.statut in ["accepte", "refuse"]:
         devis.date_traitement = datetime.utcnow()
 
+    response = _devis_to_response(devis)
     db.commit()
-    db.refresh(devis)
-    return _devis_to_response(devis, db)
+    return response
 
 
-def _devis_to_response(devis: models.Devis, db: Session) -> DevisResponse:
-    """Convertit un modèle Devis en DevisResponse."""
-    items = []
-    for item in devis.items:
-        offre = db.query(models.Offre).filter(models.Offre.id == item.offre_id).first()
-        items.append(DevisItemResponse(
+def _devis_to_response(devis: models.Devis) -> DevisResponse:
+    """Convertit un modèle Devis en DevisResponse (items et offres doivent être préchargés)."""
+    items = [
+        DevisItemResponse(
             id=item.id,
             offre_id=item.offre_id,
-            offre_nom=offre.nom if offre else None,
-        ))
+            offre_nom=item.offre.nom if item.offre else None,
+        )
+        for item in devis.items
+    ]
 
     return DevisResponse(
         id=devis.id,
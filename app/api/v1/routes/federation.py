@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session, joinedload
 from app.db.database import get_db
 from app.api.v1.routes.users import get_current_user
 from app.db import models
+from app.services.reference_data import reference_data
 from pydantic import BaseModel
 from typing import List
 
@@ -20,21 +21,16 @@ class CategorieResponse(BaseModel):
 @router.get("/{federation_id}/categories", response_model=List[CategorieResponse])
 def get_categories_federation(
     federation_id: int,
-    db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     if not federation_id:
         raise HTTPException(status_code=400, detail="Utilisateur sans fédération assignée")
-    
-    federation = db.query(models.Federation).filter(
-        models.Federation.id == federation_id
-    ).first()
-    
-    if not federation:
+
+    referentiel = reference_data.get()
+    if federation_id not in referentiel.federation_ids:
         raise HTTPException(status_code=404, detail="Fédération non trouvée")
-    
-    categories = [fc.categorie for fc in federation.federation_categories]
-    return categories
+
+    return referentiel.categories_by_federation.get(federation_id, [])
 
 
 @router.get("/{federation_id}")
@@ -0,0 +1,47 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.database import async_engine, engine
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+def pool_status(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "recycle": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+@router.get("/db")
+def health_db():
+    """État de la base et du pool de connexions (checkouts en cours, overflow...)."""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        # Endpoint public : le détail (hôte, base, utilisateur...) reste dans les logs
+        print(f"[DB] Health check en échec : {e.__cause__ or e}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "detail": "database unavailable", "pool": pool_status(engine.pool)},
+        )
+
+    return {
+        "status": "ok",
+        "latence_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pool": pool_status(engine.pool),
+        "pool_async": pool_status(async_engine.pool),
+    }
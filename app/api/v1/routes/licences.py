@@ -1,18 +1,34 @@
-from app.services.notification_service import notify_user
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
-from sqlalchemy.orm import Session, joinedload
+from app.services.notification_service import add_notifications, notify_user
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Form, UploadFile, File, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import Integer, String, column, false, func, select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from sqlalchemy.exc import IntegrityError
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
+from urllib.parse import quote
+import mimetypes
 
 from app.db import models
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.core.config import settings
+from app.core.http_cache import etag_matches, not_modified, strong_etag
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.services.document_previews import VARIANTS, preview_pipeline
+from app.services.exports import export_response
+from app.services.reference_data import reference_data
+from app.services.document_storage import (
+    add_reference_stmt, compression_of, fichier_path, iter_content, max_size_for, release_reference_stmts, store_upload
+)
 from app.schemas.licence_schema import (
-    LicenceCreate, LicenceUpdate, LicenceResponse, LicenceSubmit, StatutUpdateSchema
+    LicenceCreate, LicenceUpdate, LicenceResponse, LicenceSubmit, StatutUpdateSchema,
+    LicenceBulkAction, LicenceBulkResponse,
 )
 from app.api.v1.routes.users import get_current_user
-import random, string
 
 router = APIRouter(prefix="/licences/demandes_licence", tags=["Licences"])
 
@@ -24,60 +40,100 @@ def admin_required(current_user=Depends(get_current_user)):
     return current_user
 
 
-def get_current_saison(db: Session, federation_id: int):
-    return db.query(models.Saison).filter(
-        models.Saison.federation_id == federation_id, models.Saison.active == True
-    ).first()
+async def get_current_saison(federation_id: int):
+    return (await reference_data.aget()).saison_active(federation_id)
+
+
+def check_licence_access(licence, current_user):
+    user_role = current_user.get("role")
+    if user_role == "admin_federation":
+        if not current_user.get("federation"):
+            raise HTTPException(status_code=403, detail="Aucune fédération assignée.")
+        federation_id = current_user["federation"]["id"]
+        if licence.saison.federation_id != federation_id:
+            raise HTTPException(status_code=403, detail="Accès interdit à cette fédération.")
+    elif current_user.get("club_id") != licence.club_id:
+        raise HTTPException(status_code=403, detail="Accès interdit à ce club.")
+
+
+def fichier_urls(licence_id: int, fichier) -> dict:
+    url = f"{router.prefix}/{licence_id}/fichiers/{fichier.id}"
+    return {
+        "url": url,
+        "miniature_url": f"{url}/miniature" if fichier.miniature else None,
+        "apercu_url": f"{url}/apercu" if fichier.apercu else None,
+    }
 
 
-def get_licence_or_404(licence_id: int, db: Session):
-    licence = (
-        db.query(models.Licence)
+async def get_licence_or_404(licence_id: int, db: AsyncSession, for_update: bool = False):
+    query = (
+        select(models.Licence)
         .options(
             joinedload(models.Licence.fichiers).joinedload(models.Fichier.type),
             joinedload(models.Licence.categorie),
             joinedload(models.Licence.adherent),
             joinedload(models.Licence.club),
+            joinedload(models.Licence.saison),
         )
         .filter(models.Licence.id == licence_id)
-        .first()
     )
+    if for_update:
+        # Ligne de la licence seule : les jointures externes ne peuvent pas être verrouillées
+        query = query.with_for_update(of=models.Licence)
+    result = await db.execute(query)
+    licence = result.unique().scalars().first()
     if not licence:
         raise HTTPException(status_code=404, detail="Licence non trouvée.")
     return licence
 
 
-def generer_numero_licence():
-    lettres_chiffres = string.ascii_uppercase + string.digits
-    return "LC" + "".join(random.choices(lettres_chiffres, k=6))
+NUMERO_LICENCE_FORMAT = "LC{:08d}"
+
+
+async def allouer_numeros_licence(db: AsyncSession, nombre: int) -> List[str]:
+    """Réserve `nombre` numéros sur la séquence fsbb.licence_numero_seq en un aller-retour.
+
+    Une séquence ne distribue jamais deux fois la même valeur : pas de collision ni de
+    nouvelle tentative, même avec des validations concurrentes (des trous sont possibles
+    si une transaction est annulée).
+    """
+    if nombre <= 0:
+        return []
+    result = await db.execute(
+        select(models.licence_numero_seq.next_value()).select_from(func.generate_series(1, nombre))
+    )
+    return [NUMERO_LICENCE_FORMAT.format(n) for n in sorted(result.scalars())]
 
 
 # ------------------ Création ------------------
 @router.post("/", response_model=LicenceResponse, status_code=201)
-def create_licence(data: LicenceCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def create_licence(data: LicenceCreate, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
     if current_user['club_id'] != data.club_id:
         raise HTTPException(status_code=403, detail="Accès interdit à ce club.")
 
     if not current_user.get("federation"):
         raise HTTPException(status_code=403, detail="Aucune fédération assignée.")
 
-    saison_active = get_current_saison(db, current_user['federation']['id'])
+    saison_active = await get_current_saison(current_user['federation']['id'])
     if not saison_active:
         raise HTTPException(status_code=400, detail="Aucune saison active.")
 
     # Chercher ou créer l'adhérent
     adherent = None
     if data.adherent:
-        adherent = db.query(models.Adherent).filter(models.Adherent.id == data.adherent).first()
+        adherent = await db.get(models.Adherent, data.adherent)
         if not adherent:
             raise HTTPException(status_code=404, detail="Adhérent introuvable.")
     else:
-        adherent = db.query(models.Adherent).filter(
-            models.Adherent.nom.ilike(data.nom.strip()),
-            models.Adherent.prenom.ilike(data.prenom.strip()),
-            models.Adherent.date_naissance == data.date_naissance,
-            models.Adherent.club_id == data.club_id
-        ).first()
+        result = await db.execute(
+            select(models.Adherent).filter(
+                models.Adherent.nom.ilike(data.nom.strip()),
+                models.Adherent.prenom.ilike(data.prenom.strip()),
+                models.Adherent.date_naissance == data.date_naissance,
+                models.Adherent.club_id == data.club_id
+            )
+        )
+        adherent = result.scalars().first()
         if not adherent:
             adherent = models.Adherent(
                 nom=data.nom.strip(),
@@ -88,8 +144,8 @@ def create_licence(data: LicenceCreate, db: Session = Depends(get_db), current_u
                 actif=True
             )
             db.add(adherent)
-            db.commit()
-            db.refresh(adherent)
+            await db.commit()
+            await db.refresh(adherent)
 
     # Créer licence
     licence = models.Licence(
@@ -107,11 +163,12 @@ def create_licence(data: LicenceCreate, db: Session = Depends(get_db), current_u
 
     db.add(licence)
     try:
-        db.commit()
-        db.refresh(licence)
+        await db.commit()
+        await db.refresh(licence)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=409, detail="Licence déjà existante pour cet adhérent cette saison.")
+    categorie = (await reference_data.aget()).categorie(licence.categorie_id)
 
     return LicenceResponse(
         id=licence.id,
@@ -119,7 +176,7 @@ def create_licence(data: LicenceCreate, db: Session = Depends(get_db), current_u
         nom=licence.nom,
         prenom=licence.prenom,
         date_naissance=licence.date_naissance,
-        categorie=licence.categorie.nom if licence.categorie else None,
+        categorie=categorie.nom if categorie else None,
         statut=licence.statut,
         documents=[],
         motif_rejet=None,
@@ -130,8 +187,8 @@ def create_licence(data: LicenceCreate, db: Session = Depends(get_db), current_u
 
 # ------------------ Soumission ------------------
 @router.post("/{licence_id}/submit", response_model=LicenceResponse)
-def submit_licence(licence_id: int, _: LicenceSubmit, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    licence = get_licence_or_404(licence_id, db)
+async def submit_licence(licence_id: int, _: LicenceSubmit, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    licence = await get_licence_or_404(licence_id, db)
     if licence.club_id != current_user['club_id']:
         raise HTTPException(status_code=403, detail="Accès interdit.")
     if licence.statut != "brouillon":
@@ -139,72 +196,175 @@ def submit_licence(licence_id: int, _: LicenceSubmit, db: Session = Depends(get_
 
     licence.statut = "soumise"
     licence.date_soumission = datetime.utcnow()
-    db.commit()
-    db.refresh(licence)
-    return licence
+    await db.commit()
+    return licence_detail_response(licence)
 
 
 # ------------------ Validation ------------------
 @router.post("/{licence_id}/valider", response_model=LicenceResponse)
-async def validate_licence(licence_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    licence = get_licence_or_404(licence_id, db)
-    licence.statut = "validée"
-    licence.numero = generer_numero_licence()
+async def validate_licence(licence_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    # Verrou : une validation concurrente (unitaire ou lot) attend, puis voit le numéro déjà posé
+    licence = await get_licence_or_404(licence_id, db, for_update=True)
+    licence.statut = "validee"
+    if not licence.numero:
+        licence.numero = (await allouer_numeros_licence(db, 1))[0]
     licence.date_validation = datetime.utcnow()
-    db.commit()
-    db.refresh(licence)
-    return licence
+    await db.commit()
+    return licence_detail_response(licence)
 
 
 # ------------------ Rejet ------------------
 @router.post("/{licence_id}/rejeter", response_model=LicenceResponse)
-def reject_licence(licence_id: int, motif: str = Form(...), db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    licence = get_licence_or_404(licence_id, db)
-    licence.statut = "rejetée"
-    licence.motif_rejet = motif
+async def reject_licence(licence_id: int, motif: str = Form(...), db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    licence = await get_licence_or_404(licence_id, db)
+    licence.statut = "refusee"
+    licence.commentaire_refus = motif
     licence.date_refus = datetime.utcnow()
-    db.commit()
-    db.refresh(licence)
-    return licence
+    await db.commit()
+    return licence_detail_response(licence)
+
+
+# ------------------ Validation / rejet en masse ------------------
+STATUTS_A_TRAITER = ("soumise", "en_cours", "en_verification")
+
+
+@router.post("/bulk", response_model=LicenceBulkResponse)
+async def bulk_statut(data: LicenceBulkAction, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    """Valide ou rejette un lot de licences (ids ou filtre) en une transaction."""
+    if not data.ids and not data.filtre:
+        raise HTTPException(status_code=400, detail="Fournir une liste d'ids ou un filtre.")
+    if data.action == "rejeter" and not data.motif:
+        raise HTTPException(status_code=400, detail="Le motif de rejet est obligatoire.")
+    if not current_user.get("federation"):
+        raise HTTPException(status_code=403, detail="Aucune fédération assignée.")
+    federation_id = current_user["federation"]["id"]
+
+    # Sélection verrouillée : une validation unitaire concurrente attend la fin du lot
+    query = (
+        select(models.Licence.id, models.Licence.club_id, models.Licence.statut, models.Licence.numero, models.Saison.federation_id)
+        .join(models.Saison, models.Licence.saison_id == models.Saison.id)
+        .order_by(models.Licence.id)
+        .with_for_update(of=models.Licence)
+    )
+    if data.ids:
+        query = query.filter(models.Licence.id.in_(data.ids))
+    else:
+        query = query.filter(models.Saison.federation_id == federation_id, models.Licence.statut == data.filtre.statut)
+        if data.filtre.club_id:
+            query = query.filter(models.Licence.club_id == data.filtre.club_id)
+        if data.filtre.saison_id:
+            query = query.filter(models.Licence.saison_id == data.filtre.saison_id)
+    rows = (await db.execute(query)).all()
+
+    resultats = {}
+    eligibles = []
+    for row in rows:
+        if row.federation_id != federation_id:
+            resultats[row.id] = {"id": row.id, "resultat": "interdit"}
+        elif row.statut not in STATUTS_A_TRAITER:
+            resultats[row.id] = {"id": row.id, "resultat": "statut_invalide"}
+        else:
+            eligibles.append(row)
+
+    now = datetime.utcnow()
+    ids = [row.id for row in eligibles]
+    if data.action == "valider":
+        statut, titre, libelle = "validee", "Licences validées", "validée(s)"
+    else:
+        statut, titre, libelle = "refusee", "Licences refusées", "refusée(s)"
+
+    if ids:
+        if data.action == "valider":
+            await db.execute(
+                update(models.Licence)
+                .where(models.Licence.id.in_(ids))
+                .values(statut=statut, date_validation=now)
+                .execution_options(synchronize_session=False)
+            )
+            # Numéros alloués en bloc et posés par un seul UPDATE ... FROM (VALUES ...)
+            sans_numero = [row.id for row in eligibles if not row.numero]
+            numeros = dict(zip(sans_numero, await allouer_numeros_licence(db, len(sans_numero))))
+            if numeros:
+                nouveaux = values(column("id", Integer), column("numero", String), name="nouveaux").data(list(numeros.items()))
+                await db.execute(
+                    update(models.Licence)
+                    .where(models.Licence.id == nouveaux.c.id)
+                    .values(numero=nouveaux.c.numero)
+                    .execution_options(synchronize_session=False)
+                )
+        else:
+            numeros = {}
+            await db.execute(
+                update(models.Licence)
+                .where(models.Licence.id.in_(ids))
+                .values(statut=statut, date_refus=now, commentaire_refus=data.motif)
+                .execution_options(synchronize_session=False)
+            )
+
+        for row in eligibles:
+            resultats[row.id] = {"id": row.id, "resultat": statut, "numero": numeros.get(row.id, row.numero if statut == "validee" else None)}
+
+    # Une notification agrégée de portée club (une seule ligne par club), envoyée avec le lot
+    par_club = Counter(row.club_id for row in eligibles)
+    await add_notifications(db, [
+        {
+            "portee": "club",
+            "portee_id": club_id,
+            "titre": titre,
+            "message": f"{nombre} licence(s) {libelle}" + (f" : {data.motif}" if data.action == "rejeter" else ""),
+            "type": "licence",
+            "lien": f"/clubs/{club_id}/licences?status={statut}",
+        }
+        for club_id, nombre in par_club.items()
+    ])
+    await db.commit()
+
+    ordre = data.ids or [row.id for row in rows]
+    sortie = [resultats.get(licence_id, {"id": licence_id, "resultat": "introuvable"}) for licence_id in dict.fromkeys(ordre)]
+    return {"traitees": len(eligibles), "ignorees": len(sortie) - len(eligibles), "resultats": sortie}
 
 
 # ------------------ Modifier licence ------------------
 @router.put("/{licence_id}", response_model=LicenceResponse)
-def update_licence(licence_id: int, data: LicenceUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    licence = get_licence_or_404(licence_id, db)
+async def update_licence(licence_id: int, data: LicenceUpdate, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    licence = await get_licence_or_404(licence_id, db)
     if licence.club_id != current_user['club_id']:
         raise HTTPException(status_code=403, detail="Accès interdit.")
     if licence.statut not in ["brouillon", "en attente"]:
         raise HTTPException(status_code=400, detail="Licence non modifiable à ce stade.")
 
-    for key, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(licence, key, value)
 
-    db.commit()
-    db.refresh(licence)
-    return licence
+    await db.commit()
+    if "categorie_id" in changes:
+        # Chargement explicite : pas de lazy load sur une session async
+        await db.refresh(licence, ["categorie"])
+    return licence_detail_response(licence)
 
 
 # ------------------ Supprimer licence ------------------
 @router.delete("/{licence_id}", status_code=204)
-def delete_licence(licence_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    licence = get_licence_or_404(licence_id, db)
+async def delete_licence(licence_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    licence = await get_licence_or_404(licence_id, db)
     if licence.club_id != current_user['club_id']:
         raise HTTPException(status_code=403, detail="Accès interdit.")
-    db.delete(licence)
-    db.commit()
+    for stmt in release_reference_stmts(f.checksum for f in licence.fichiers):
+        await db.execute(stmt)
+    await db.delete(licence)
+    await db.commit()
 
 
 # ------------------ Patch statut ------------------
 @router.patch("/{licence_id}/statut")
-async def update_statut(licence_id: int, data: StatutUpdateSchema, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    licence = get_licence_or_404(licence_id, db)
+async def update_statut(licence_id: int, data: StatutUpdateSchema, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    licence = await get_licence_or_404(licence_id, db)
     if licence.club_id != current_user['club_id'] and current_user['role'] not in ["admin_ligue", "admin_federation"]:
         raise HTTPException(status_code=403, detail="Accès interdit.")
     licence.statut = data.statut
-    db.commit()
-    db.refresh(licence)
     if data.statut == "validee":
+        # Même transaction que le changement de statut ; l'envoi temps réel suit le commit
         await notify_user(
             db,
             user_id=current_user["id"],
@@ -213,47 +373,92 @@ async def update_statut(licence_id: int, data: StatutUpdateSchema, db: Session =
             type="licence",
             lien=f"/clubs/{licence.club_id}/licences?status=validee"
         )
+    await db.commit()
+    await db.refresh(licence)
     return {"id": licence.id, "statut": licence.statut, "message": "Statut mis à jour avec succès."}
 
 
 # ------------------ Liste licences ------------------
-@router.get("/", response_model=List[LicenceResponse])
-def get_licences(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
-    club_id: Optional[int] = None,
-    statut: Optional[str] = None,
-    saison_id: Optional[int] = None,
-    adherent_id: Optional[int] = None,
-):
-    query = db.query(models.Licence).options(
-        joinedload(models.Licence.categorie),
-        joinedload(models.Licence.club),
-        joinedload(models.Licence.adherent),
-        joinedload(models.Licence.fichiers).joinedload(models.Fichier.type),
-    )
-
+def licence_filters(current_user, club_id=None, statut=None, saison_id=None, adherent_id=None) -> Optional[list]:
+    """Critères communs à la liste et à l'export ; None si l'utilisateur n'a aucune licence visible."""
     if current_user["role"] == "admin_federation":
         if not current_user.get("federation"):
-            return []
+            return None
         federation_id = current_user["federation"]["id"]
-        print(federation_id)
-        query = query.join(models.Saison).filter(models.Saison.federation_id == federation_id)
+        criteres = [models.Licence.saison_id.in_(
+            select(models.Saison.id).filter(models.Saison.federation_id == federation_id)
+        )]
     elif current_user["club_id"]:
-        query = query.filter(models.Licence.club_id == current_user["club_id"])
+        criteres = [models.Licence.club_id == current_user["club_id"]]
     else:
         raise HTTPException(status_code=403, detail="Accès non autorisé.")
 
     if club_id:
-        query = query.filter(models.Licence.club_id == club_id)
+        criteres.append(models.Licence.club_id == club_id)
     if statut:
-        query = query.filter(models.Licence.statut == statut)
+        criteres.append(models.Licence.statut == statut)
     if saison_id:
-        query = query.filter(models.Licence.saison_id == saison_id)
+        criteres.append(models.Licence.saison_id == saison_id)
     if adherent_id:
-        query = query.filter(models.Licence.adherent_id == adherent_id)
+        criteres.append(models.Licence.adherent_id == adherent_id)
+    return criteres
 
-    licences = query.order_by(models.Licence.date_creation.desc()).all()
+
+@router.get("/", response_model=List[LicenceResponse])
+async def get_licences(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+    club_id: Optional[int] = None,
+    statut: Optional[str] = None,
+    saison_id: Optional[int] = None,
+    adherent_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    # Seules les colonnes sérialisées dans LicenceResponse sont chargées
+    query = select(models.Licence).options(
+        load_only(
+            models.Licence.id,
+            models.Licence.numero,
+            models.Licence.nom,
+            models.Licence.prenom,
+            models.Licence.date_naissance,
+            models.Licence.statut,
+            models.Licence.commentaire_refus,
+            models.Licence.club_id,
+            models.Licence.date_creation,
+        ),
+        joinedload(models.Licence.categorie).load_only(models.Categorie.nom),
+        selectinload(models.Licence.fichiers)
+            .load_only(
+                models.Fichier.id, models.Fichier.nom_fichier, models.Fichier.chemin, models.Fichier.id_licence,
+                models.Fichier.miniature, models.Fichier.apercu,
+            )
+            .joinedload(models.Fichier.type)
+            .load_only(models.TypeFichier.nom),
+    )
+
+    criteres = licence_filters(current_user, club_id, statut, saison_id, adherent_id)
+    if criteres is None:
+        return []
+    query = query.filter(*criteres)
+
+    # Pagination par clé (date_creation, id) : le curseur est renvoyé dans l'en-tête X-Next-Cursor
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Licence.date_creation, models.Licence.id) < tuple_(cursor_date, cursor_id)
+        )
+
+    query = query.order_by(models.Licence.date_creation.desc(), models.Licence.id.desc())
+    if limit:
+        query = query.limit(limit + 1)
+    licences = (await db.execute(query)).scalars().all()
+    if limit and len(licences) > limit:
+        licences = licences[:limit]
+        last = licences[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date_creation, last.id)
 
     return [
         LicenceResponse(
@@ -264,7 +469,7 @@ def get_licences(
             date_naissance=l.date_naissance,
             categorie=l.categorie.nom if l.categorie else None,
             statut=l.statut,
-            documents=[{"id": f.id, "nom_fichier": f.nom_fichier, "type": f.type.nom, "chemin": f.chemin} for f in l.fichiers] if l.fichiers else [],
+            documents=[{"id": f.id, "nom_fichier": f.nom_fichier, "type": f.type.nom, "chemin": f.chemin, **fichier_urls(l.id, f)} for f in l.fichiers] if l.fichiers else [],
             motif_rejet=l.commentaire_refus,
             club_id=l.club_id,
             date_creation=l.date_creation,
@@ -273,22 +478,56 @@ def get_licences(
     ]
 
 
+# ------------------ Export licences ------------------
+@router.get("/export")
+async def export_licences(
+    request: Request,
+    current_user=Depends(get_current_user),
+    format: Literal["csv", "xlsx"] = "csv",
+    club_id: Optional[int] = None,
+    statut: Optional[str] = None,
+    saison_id: Optional[int] = None,
+    adherent_id: Optional[int] = None,
+):
+    """Mêmes filtres que la liste ; lignes envoyées au fil de la lecture (curseur côté serveur)."""
+    L = models.Licence
+    criteres = licence_filters(current_user, club_id, statut, saison_id, adherent_id)
+    query = (
+        select(
+            L.id,
+            L.numero,
+            L.nom,
+            L.prenom,
+            L.date_naissance,
+            models.Categorie.nom.label("categorie"),
+            L.statut,
+            L.club_id,
+            models.Club.nom.label("club"),
+            models.Saison.code.label("saison"),
+            L.commentaire_refus.label("motif_rejet"),
+            L.date_creation,
+        )
+        .join(models.Club, models.Club.id == L.club_id)
+        .join(models.Saison, models.Saison.id == L.saison_id)
+        .outerjoin(models.Categorie, models.Categorie.id == L.categorie_id)
+        .filter(*(criteres if criteres is not None else [false()]))
+        .order_by(L.date_creation.desc(), L.id.desc())
+    )
+    return export_response(request, query, format, f"licences_{datetime.utcnow():%Y%m%d}")
+
+
 # ------------------ Détail licence ------------------
 @router.get("/{licence_id}", response_model=LicenceResponse)
-def get_licence(licence_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    licence = get_licence_or_404(licence_id, db)
+async def get_licence(licence_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user)):
+    licence = await get_licence_or_404(licence_id, db)
 
     # Vérification droits d'accès
-    user_role = current_user.get("role")
-    if user_role == "admin_federation":
-        if not current_user.get("federation"):
-            raise HTTPException(status_code=403, detail="Aucune fédération assignée.")
-        federation_id = current_user["federation"]["id"]
-        if licence.saison.federation_id != federation_id:
-            raise HTTPException(status_code=403, detail="Accès interdit à cette fédération.")
-    elif current_user.get("club_id") != licence.club_id:
-        raise HTTPException(status_code=403, detail="Accès interdit à ce club.")
+    check_licence_access(licence, current_user)
 
+    return licence_detail_response(licence)
+
+
+def licence_detail_response(licence) -> LicenceResponse:
     return LicenceResponse(
         id=licence.id,
         numero=licence.numero,
@@ -297,7 +536,7 @@ def get_licence(licence_id: int, db: Session = Depends(get_db), current_user=Dep
         date_naissance=licence.date_naissance,
         categorie=licence.categorie.nom if licence.categorie else None,
         statut=licence.statut,
-        documents=[{"id": f.id, "nom_fichier": f.nom_fichier, "type": f.type.nom if f.type else "Document", "chemin": f.chemin} for f in licence.fichiers] if licence.fichiers else [],
+        documents=[{"id": f.id, "nom_fichier": f.nom_fichier, "type": f.type.nom if f.type else "Document", "chemin": f.chemin, **fichier_urls(licence.id, f)} for f in licence.fichiers] if licence.fichiers else [],
         motif_rejet=licence.commentaire_refus,
         club_id=licence.club_id,
         date_creation=licence.date_creation,
@@ -307,51 +546,133 @@ def get_licence(licence_id: int, db: Session = Depends(get_db), current_user=Dep
 @router.post("/{licence_id}/upload")
 async def upload_fichier(
     licence_id: int,
+    background_tasks: BackgroundTasks,
     org_id: int = Form(...),
     club_id: int = Form(...),
     file: UploadFile = File(...),
     type: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    licence = get_licence_or_404(licence_id, db)
+    licence = await get_licence_or_404(licence_id, db)
 
     # Vérification des droits
     if licence.club_id != current_user['club_id'] and current_user['role'] != "admin_federation":
         raise HTTPException(status_code=403, detail="Accès interdit.")
 
     # Vérifier le type de fichier
-    type_obj = db.query(models.TypeFichier).filter(models.TypeFichier.nom == type).first()
+    type_obj = (await reference_data.aget()).type_fichier(type)
     if not type_obj:
         raise HTTPException(status_code=400, detail="Type de fichier invalide.")
 
-    # Répertoire sécurisé
-    import os
-    upload_dir = os.getenv("UPLOAD_DIR") or "/tmp/ged"
-    base_path = Path(f"{upload_dir}/{org_id}/{club_id}/{type}")
-    base_path.mkdir(parents=True, exist_ok=True)
-
+    # Upload en streaming (taille + SHA-256 au fil de l'eau) vers le stockage par contenu :
+    # un document déjà connu (même scan, même formulaire) n'est pas stocké une seconde fois
+    stored = await store_upload(file, max_size_for(type_obj))
 
-    # Création en base
     nouveau_fichier = models.Fichier(
         nom_fichier=file.filename,
-        chemin=str(base_path),
-        taille=0,
+        chemin=stored.chemin,
+        taille=stored.taille,
+        checksum=stored.checksum,
         id_licence=licence_id,
         id_type=type_obj.id,
         date_upload=datetime.utcnow()
     )
     db.add(nouveau_fichier)
-    db.commit()
-    db.refresh(nouveau_fichier)
+    try:
+        await db.execute(add_reference_stmt(stored))
+        await db.commit()
+    except IntegrityError:
+        # Un contenu nouveau resté sans référence est supprimé par le ramasse-miettes
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Un document de ce type existe déjà pour cette licence.")
+
+    # Miniature / aperçu générés après la réponse, dans le pool de processus
+    background_tasks.add_task(preview_pipeline.generate, nouveau_fichier.id, stored.chemin, file.filename)
+
+    return {
+        "message": "Fichier uploadé avec succès.",
+        "fichier_id": nouveau_fichier.id,
+        "taille": nouveau_fichier.taille,
+        "checksum": nouveau_fichier.checksum,
+    }
+
+
+# ------------------ Téléchargement document ------------------
+async def get_fichier_for_user(licence_id: int, fichier_id: int, db: AsyncSession, current_user):
+    result = await db.execute(
+        select(models.Fichier)
+        .filter(models.Fichier.id == fichier_id, models.Fichier.id_licence == licence_id)
+        .options(joinedload(models.Fichier.licence).joinedload(models.Licence.saison))
+    )
+    fichier = result.scalars().first()
+    if not fichier:
+        raise HTTPException(status_code=404, detail="Fichier introuvable.")
+    check_licence_access(fichier.licence, current_user)
+    return fichier
 
-    # Nom de fichier unique
-    filename = f"{nouveau_fichier.id}"
-    filepath = base_path / filename
 
-    # Écriture du fichier
-    with open(filepath, "wb") as f:
-        contents = await file.read()
-        f.write(contents)
+@router.get("/{licence_id}/fichiers/{fichier_id}")
+async def download_fichier(
+    licence_id: int,
+    fichier_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    fichier = await get_fichier_for_user(licence_id, fichier_id, db, current_user)
+
+    # Le contenu d'un Fichier ne change jamais : ETag fort = SHA-256, le navigateur garde sa copie
+    cache_control = f"private, max-age={settings.DOCUMENT_CACHE_MAX_AGE}"
+    headers = {"Cache-Control": cache_control}
+    if fichier.checksum:
+        etag = strong_etag(fichier.checksum)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, cache_control)
+        headers["ETag"] = etag
+
+    path = await run_in_threadpool(fichier_path, fichier)
+    if not await run_in_threadpool(path.is_file):
+        raise HTTPException(status_code=404, detail="Fichier absent du stockage.")
+
+    media_type = mimetypes.guess_type(fichier.nom_fichier)[0] or "application/octet-stream"
+    if compression_of(path):
+        # Contenu compressé sur disque : restitué décompressé en flux, sans Range
+        headers["Content-Disposition"] = f"inline; filename*=utf-8''{quote(fichier.nom_fichier)}"
+        return StreamingResponse(iter_content(path), media_type=media_type, headers=headers)
+
+    # FileResponse gère Range / If-Range et l'envoi zéro-copie (pathsend) si le serveur le permet
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=fichier.nom_fichier,
+        content_disposition_type="inline",
+        headers=headers,
+    )
+
 
-    return {"message": "Fichier uploadé avec succès.", "fichier_id": nouveau_fichier.id}
+@router.get("/{licence_id}/fichiers/{fichier_id}/{variant}")
+async def download_fichier_derive(
+    licence_id: int,
+    fichier_id: int,
+    variant: Literal["miniature", "apercu"],
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """Miniature (WebP) ou aperçu de la première page (JPEG) d'un document."""
+    fichier = await get_fichier_for_user(licence_id, fichier_id, db, current_user)
+    chemin = getattr(fichier, variant)
+    if not chemin:
+        raise HTTPException(status_code=404, detail="Aperçu non disponible.")
+
+    cache_control = f"private, max-age={settings.DOCUMENT_CACHE_MAX_AGE}"
+    etag = strong_etag(f"{fichier.checksum or fichier.id}-{variant}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control)
+
+    # Dérivé supprimé ou jamais écrit (job d'aperçu en échec, autre volume) : 404 et non 500
+    if not await run_in_threadpool(Path(chemin).is_file):
+        raise HTTPException(status_code=404, detail="Aperçu absent du stockage.")
+
+    return FileResponse(chemin, media_type=VARIANTS[variant][2], headers={"Cache-Control": cache_control, "ETag": etag})
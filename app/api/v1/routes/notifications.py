@@ -1,75 +1,117 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.db import models
-from app.schemas.notification_schema import NotificationOut, NotificationCreate
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.schemas.notification_schema import NotificationOut, NotificationCreate, NotificationAnnonce
 from app.api.v1.routes.users import get_current_user
+from app.services.notification_service import (
+    add_topic_notification, inbox_filter, inbox_page, mark_all_read, mark_read,
+    push_unread_count, unread_count,
+)
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+
 @router.get("/", response_model=List[NotificationOut])
-def get_my_notifications(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+async def get_my_notifications(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    non_lues: bool = False,
 ):
-    return (
-        db.query(models.Notification)
-        .order_by(models.Notification.created_at.desc())
-        .limit(20)
-        .all()
-    )
+    # Pagination par clé (created_at, id) : le curseur est renvoyé dans l'en-tête X-Next-Cursor
+    notifications = await inbox_page(db, current_user, limit + 1, decode_cursor(cursor) if cursor else None, non_lues)
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["id"])
+    return notifications
 
 
 @router.get("/unread-count")
-def unread_notifications_count(
-    db: Session = Depends(get_db),
+async def unread_notifications_count(
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user)
 ):
-    count = (
-        db.query(models.Notification)
-        .filter(
-            models.Notification.user_id == current_user["id"],
-            models.Notification.read == False
-        )
-        .count()
+    """Compteur maintenu à l'écriture ; aussi poussé sur le WebSocket ({"type": "unread_count"})."""
+    return {"count": await unread_count(db, current_user)}
+
+
+@router.post("/annonces", response_model=NotificationOut, status_code=201)
+async def create_annonce(
+    data: NotificationAnnonce,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user)
+):
+    """Annonce à tout un club, une ligue ou une fédération : une seule ligne, quel que soit le nombre de membres."""
+    role = current_user.get("role")
+    federation_id = (current_user.get("federation") or {}).get("id")
+    portee_id = data.portee_id
+
+    if role == "admin_federation" and federation_id:
+        if data.portee == "federation":
+            portee_id = portee_id or federation_id
+            autorise = portee_id == federation_id
+        else:
+            modele = models.Club if data.portee == "club" else models.Ligue
+            autorise = portee_id is not None and await db.scalar(
+                select(modele.federation_id).filter(modele.id == portee_id)
+            ) == federation_id
+    elif role == "admin_ligue" and current_user.get("ligue") and data.portee == "ligue":
+        portee_id = portee_id or current_user["ligue"]["id"]
+        autorise = portee_id == current_user["ligue"]["id"]
+    elif current_user.get("club_id") and data.portee == "club":
+        portee_id = portee_id or current_user["club_id"]
+        autorise = role == "admin_club" and portee_id == current_user["club_id"]
+    else:
+        autorise = False
+    if not autorise:
+        raise HTTPException(status_code=403, detail="Accès interdit à cette portée.")
+
+    notification = await add_topic_notification(
+        db, data.portee, portee_id, data.titre, data.message, data.type, data.lien
     )
-    return {"count": count}
+    await db.commit()
+    return notification["message"]
 
 
 @router.patch("/{notification_id}/read")
-def mark_as_read(
+async def mark_as_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user)
 ):
-    notif = (
-        db.query(models.Notification)
+    result = await db.execute(
+        select(models.Notification)
         .filter(
             models.Notification.id == notification_id,
+            inbox_filter(current_user),
         )
-        .first()
     )
+    notif = result.scalars().first()
 
     if not notif:
         raise HTTPException(status_code=404, detail="Notification introuvable")
 
-    notif.read = True
-    db.commit()
+    if await mark_read(db, current_user, notif):
+        push_unread_count(db, current_user["id"], await unread_count(db, current_user))
+        await db.commit()
 
     return {"message": "Notification marquée comme lue"}
 
 
 @router.patch("/read-all")
-def mark_all_as_read(
-    db: Session = Depends(get_db),
+async def mark_all_as_read(
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user)
 ):
-    db.query(models.Notification).filter(
-        models.Notification.user_id == current_user["id"],
-        models.Notification.read == False
-    ).update({models.Notification.read: True})
-
-    db.commit()
+    if await mark_all_read(db, current_user):
+        push_unread_count(db, current_user["id"], await unread_count(db, current_user))
+        await db.commit()
     return {"message": "Toutes les notifications ont été lues"}
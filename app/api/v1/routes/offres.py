@@ -1,30 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List
 
-from app.db import models
-from app.db.database import get_db
+from app.core.config import settings
+from app.core.http_cache import etag_matches, not_modified
 from app.schemas.offre_schema import OffreResponse
+from app.services.offres_cache import CachedBody, offres_cache
 
 router = APIRouter(prefix="/offres", tags=["Offres"])
 
 
-@router.get("", response_model=List[OffreResponse])
-def list_offres(db: Session = Depends(get_db)):
-    """Liste toutes les offres actives (endpoint public)."""
-    offres = (
-        db.query(models.Offre)
-        .filter(models.Offre.actif == True)
-        .order_by(models.Offre.ordre)
-        .all()
+def _cached_response(request: Request, cached: CachedBody) -> Response:
+    cache_control = f"public, max-age={settings.OFFRES_HTTP_MAX_AGE}"
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return not_modified(cached.etag, cache_control)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers={"ETag": cached.etag, "Cache-Control": cache_control},
     )
-    return offres
+
+
+@router.get("", response_model=List[OffreResponse])
+def list_offres(request: Request):
+    """Liste toutes les offres actives (endpoint public, servi depuis le cache)."""
+    return _cached_response(request, offres_cache.catalogue())
 
 
 @router.get("/{offre_id}", response_model=OffreResponse)
-def get_offre(offre_id: int, db: Session = Depends(get_db)):
-    """Détail d'une offre (endpoint public)."""
-    offre = db.query(models.Offre).filter(models.Offre.id == offre_id).first()
-    if not offre:
+def get_offre(offre_id: int, request: Request):
+    """Détail d'une offre (endpoint public, servi depuis le cache)."""
+    cached = offres_cache.offre(offre_id)
+    if not cached:
         raise HTTPException(status_code=404, detail="Offre non trouvée")
-    return offre
+    return _cached_response(request, cached)
@@ -6,6 +6,7 @@ from app.core.config import settings
 from app.db import models
 from app.db.database import get_db
 from app.core import security
+from app.core.principal_cache import principal_cache
 from app.schemas.user_schema import UserResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -26,27 +27,8 @@ async def get_current_user_ws(
         await websocket.close(code=1008)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserResponse:
-    print('AAAAAAAAAAAAAA')
-    payload = security.decode_access_token(token)
-    if not payload or "email" not in payload:
-        raise HTTPException(status_code=401, detail="Token invalide")
-    print('AAAAAAAAAAAAAA')
-    # 🔹 Chargement complet avec toutes les relations nécessaires
-    user = (
-        db.query(models.User)
-        .options(
-            joinedload(models.User.club),
-            joinedload(models.User.federation),
-            joinedload(models.User.ligue),
-            joinedload(models.User.roles).joinedload(models.UserRole.role)
-        )
-        .filter(models.User.email == payload["email"])
-        .first()
-    )
-
-    if not user:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+def build_principal(user: models.User) -> dict:
+    """Construit le dict utilisateur exposé par get_current_user (et embarqué dans le token)."""
     role_name = user.roles[0].role.name if user.roles else user.role
 
     return {
@@ -75,6 +57,43 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         }
 
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserResponse:
+    payload = security.decode_access_token(token)
+    if not payload or "email" not in payload:
+        raise HTTPException(status_code=401, detail="Token invalide")
+
+    # 🔹 Mode sans état : le token signé porte déjà l'utilisateur complet
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and payload.get("principal"):
+        return payload["principal"]
+
+    cache_key = (payload["email"], payload.get("iat"))
+    principal = principal_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    # 🔹 Chargement complet avec toutes les relations nécessaires
+    user = (
+        db.query(models.User)
+        .options(
+            joinedload(models.User.club),
+            joinedload(models.User.federation),
+            joinedload(models.User.ligue),
+            joinedload(models.User.roles).joinedload(models.UserRole.role)
+        )
+        .filter(models.User.email == payload["email"])
+        .first()
+    )
+
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    if getattr(user, "is_active", None) is False:
+        raise HTTPException(status_code=403, detail="Ce compte est désactivé. Veuillez contacter l'administrateur.")
+
+    principal = build_principal(user)
+    principal_cache.set(cache_key, principal)
+    return principal
+
+
 def admin_required(current_user=Depends(get_current_user)):
     if current_user['role'] != "admin_federation":
         raise HTTPException(
@@ -167,6 +186,7 @@ def toggle_user_status(
     user.is_active = not getattr(user, "is_active", True)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.id)
     
     return {
         "message": f"Utilisateur {'activé' if user.is_active else 'désactivé'} avec succès",
@@ -1,20 +1,34 @@
-from fastapi import APIRouter, WebSocket, Depends
+from fastapi import APIRouter, WebSocket, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from app.core.websocket_manager import manager
-from app.api.v1.routes.users import get_current_user_ws
+from app.db.database import AsyncSessionLocal, SessionLocal
+from app.api.v1.routes.users import get_current_user, get_current_user_ws
+from app.services.notification_service import unread_count, unread_count_message, user_topics
 
 router = APIRouter()
 
+
+def _load_principal(token: str) -> dict:
+    with SessionLocal() as db:
+        return get_current_user(token, db)
+
+
 @router.websocket("/ws/notifications")
 async def websocket_notifications(
     websocket: WebSocket,
+    token: str = Query(...),
     current_user=Depends(get_current_user_ws),
 ):
-    print(current_user)
-    user_id = current_user["id"]
-    await manager.connect(user_id, websocket)
-
+    if not current_user:
+        return  # token invalide : connexion déjà fermée
     try:
-        while True:
-            await websocket.receive_text()  # keep alive
-    except:
-        manager.disconnect(user_id, websocket)
+        # Club, ligue et fédération de l'utilisateur (cache des principals)
+        principal = await run_in_threadpool(_load_principal, token)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    # Le client reçoit son nombre de non lues à la connexion puis à chaque changement : plus de polling
+    async with AsyncSessionLocal() as db:
+        initial = unread_count_message(await unread_count(db, principal))
+    # Heartbeat, file d'envoi et détection de déconnexion gérés par le manager
+    await manager.serve(principal["id"], websocket, user_topics(principal), initial=[initial])
@@ -2,16 +2,91 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+
+    # Pool de connexions SQLAlchemy
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # secondes d'attente d'une connexion libre
+    DB_POOL_RECYCLE: int = 1800  # secondes avant de recycler une connexion
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = pas de statement_timeout côté serveur
+
+    # Démarrage : False = aucun DDL au boot, le schéma est géré par Alembic
+    DB_CREATE_ALL_ON_STARTUP: bool = True
+    DB_CHECK_SCHEMA_ON_STARTUP: bool = False
+    DB_POOL_WARMUP: int = 1  # connexions ouvertes dans chaque pool au démarrage
+
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Résolution de l'utilisateur courant (get_current_user)
+    PRINCIPAL_CACHE_MAXSIZE: int = 2048
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # 0 = cache désactivé
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False  # True = aucune requête DB, on se fie au claim "principal"
+
     # SMTP (Gmail)
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USER: str = "morfaye15@gmail.com"
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = "morfaye15@gmail.com"
+    SMTP_STARTTLS: bool = True  # False pour un serveur SMTP local de test
+    SMTP_TIMEOUT: int = 30
+
+    # File d'envoi des emails (table fsbb.email_outbox)
+    EMAIL_BACKEND: str = "smtp"  # smtp | memory (tests)
+    EMAIL_WORKER_ENABLED: bool = True
+    EMAIL_WORKER_POLL_SECONDS: int = 5
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: int = 30  # délai doublé à chaque nouvel échec
+    EMAIL_CLAIM_LEASE_SECONDS: int = 600  # un lot réservé non terminé repart en file après ce délai
+
+    # Stockage des documents de licence
+    UPLOAD_DIR: str = "/tmp/ged"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # octets lus / écrits par bloc
+    UPLOAD_MAX_SIZE: int = 20 * 1024 * 1024  # limite par défaut si le type n'en définit pas
+    DOCUMENT_COMPRESSION: str = "none"  # none | gzip | zstd (types compressibles seulement)
+    DOCUMENT_GC_GRACE_SECONDS: int = 3600  # âge minimal d'un contenu orphelin avant suppression
+    DOCUMENT_CACHE_MAX_AGE: int = 86400  # Cache-Control des téléchargements (contenu immuable par fichier)
+    DOCUMENT_PREVIEWS_ENABLED: bool = True  # miniatures / aperçus générés après l'upload
+    DOCUMENT_PREVIEW_WORKERS: int = 2  # processus du pool de génération
+    DOCUMENT_THUMBNAIL_SIZE: int = 320  # px, plus grand côté (WebP)
+    DOCUMENT_PREVIEW_SIZE: int = 1200  # px, plus grand côté (JPEG, première page)
+    UPLOAD_PUBLIC_MOUNT: bool = False  # True = ancien montage /uploads sans authentification (legacy, à éviter)
+
+    # Catalogue public des offres (/offres)
+    OFFRES_CACHE_TTL_SECONDS: int = 300  # rechargement périodique (modifications hors de ce processus)
+    OFFRES_HTTP_MAX_AGE: int = 60  # Cache-Control côté navigateur / CDN
+
+    # Référentiel en mémoire (types de fichier, catégories, saisons actives...)
+    REFERENCE_DATA_TTL_SECONDS: int = 300
+
+    # Notifications temps réel (WebSocket)
+    WS_BACKPLANE: str = "local"  # local (un seul worker) ou postgres (LISTEN/NOTIFY entre instances)
+    WS_NOTIFY_CHANNEL: str = "ws_notifications"
+    WS_SEND_QUEUE_SIZE: int = 100  # messages en attente par connexion
+    WS_OVERFLOW_POLICY: str = "disconnect"  # disconnect ou drop quand la file est pleine
+    WS_SEND_TIMEOUT_SECONDS: float = 10
+    WS_HEARTBEAT_SECONDS: float = 25
+
+    # Rétention des notifications (table partitionnée par mois)
+    NOTIFICATIONS_HOT_MONTHS: int = 3  # mois lus en premier par la boîte de réception
+    NOTIFICATIONS_ARCHIVE_READ_AFTER_DAYS: int = 90  # notifications personnelles lues archivées au-delà
+    NOTIFICATIONS_RETENTION_MONTHS: int = 12  # partitions plus anciennes archivées puis supprimées
+    NOTIFICATIONS_PARTITIONS_AHEAD: int = 3  # partitions mensuelles créées à l'avance
+    NOTIFICATIONS_ARCHIVE_BATCH_SIZE: int = 5000  # notifications par lot compressé
+    NOTIFICATIONS_RETENTION_ENABLED: bool = True
+    NOTIFICATIONS_RETENTION_INTERVAL_HOURS: float = 24
+    NOTIFICATIONS_PUSH_BATCH_SIZE: int = 500  # messages temps réel publiés par lot après commit
+
+    # Exports CSV / XLSX en flux
+    EXPORT_YIELD_PER: int = 2000  # lignes lues par lot sur le curseur côté serveur
+
+    # Import CSV des adhérents
+    ADHERENT_IMPORT_BATCH_SIZE: int = 1000  # lignes validées puis écrites par requête
+    ADHERENT_IMPORT_MAX_ROWS: int = 20000
 
     class Config:
         env_file = ".env"
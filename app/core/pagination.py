@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(date_creation: datetime, row_id: int) -> str:
+    """Curseur opaque de pagination par clé (date_creation, id)."""
+    raw = json.dumps([date_creation.isoformat() if date_creation else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_creation, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(date_creation), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide.")
@@ -0,0 +1,73 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from app.core.config import settings
+
+
+class PrincipalCache:
+    """Cache LRU borné, avec TTL, des utilisateurs résolus par get_current_user.
+
+    Les entrées sont indexées par (email, iat) : un nouveau token donne une
+    nouvelle entrée, et les modifications côté admin passent par les méthodes
+    invalidate_*. Le cache est local au processus ; le TTL borne la durée
+    pendant laquelle un autre worker peut servir une donnée périmée.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Copie : l'appelant peut modifier le principal sans altérer le cache
+        return copy.deepcopy(principal)
+
+    def set(self, key: Hashable, principal: dict) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(principal))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._invalidate_where(lambda p: p.get("id") == user_id)
+
+    def invalidate_club(self, club_id: int) -> None:
+        self._invalidate_where(lambda p: p.get("club_id") == club_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate_where(self, predicate) -> None:
+        with self._lock:
+            stale = [key for key, (_, principal) in self._entries.items() if predicate(principal)]
+            for key in stale:
+                del self._entries[key]
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
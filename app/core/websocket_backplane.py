@@ -0,0 +1,123 @@
+"""Diffusion des messages WebSocket entre workers / instances.
+
+Un message publié est livré par chaque processus à ses propres connexions
+(app.core.websocket_manager). Deux backends, choisis par WS_BACKPLANE :
+
+- "local" : livraison directe dans le processus (un seul worker, tests) ;
+- "postgres" : NOTIFY sur WS_NOTIFY_CHANNEL, chaque processus écoute (LISTEN) sur une
+  connexion dédiée et livre ce qu'il reçoit, y compris ses propres publications.
+
+Les messages perdus pendant une reconnexion du LISTEN ne sont pas rejoués : les
+notifications restent en base et le client les relit à la reconnexion.
+"""
+import asyncio
+import json
+from typing import List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.websocket_manager import manager
+from app.db.database import async_engine
+
+# NOTIFY refuse les charges de 8000 octets et plus
+NOTIFY_MAX_BYTES = 7900
+
+
+class LocalBackplane:
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish_many(self, deliveries: List[dict]) -> None:
+        manager.deliver_many(deliveries)
+
+
+class PostgresBackplane:
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            manager.deliver_many(json.loads(payload))
+        except Exception as e:
+            print(f"[WS] Message du backplane ignoré : {e}")
+
+    async def _listen_forever(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                delay = 1
+                await lost.wait()
+                print("[WS] Connexion LISTEN perdue, reconnexion")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[WS] LISTEN {self.channel} impossible : {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    def _payloads(self, deliveries: List[dict]) -> List[str]:
+        """Regroupe les livraisons en charges NOTIFY de moins de NOTIFY_MAX_BYTES."""
+        payloads, batch, size = [], [], 2
+        for delivery in deliveries:
+            encoded = json.dumps(delivery, separators=(",", ":"))
+            length = len(encoded.encode())
+            if length + 2 > NOTIFY_MAX_BYTES:
+                print(f"[WS] Message trop volumineux pour NOTIFY, livré localement ({delivery['topic']})")
+                manager.deliver_many([delivery])
+                continue
+            if batch and size + length + 1 > NOTIFY_MAX_BYTES:
+                payloads.append("[" + ",".join(batch) + "]")
+                batch, size = [], 2
+            batch.append(encoded)
+            size += length + 1
+        if batch:
+            payloads.append("[" + ",".join(batch) + "]")
+        return payloads
+
+    async def publish_many(self, deliveries: List[dict]) -> None:
+        payloads = self._payloads(deliveries)
+        if not payloads:
+            return
+        async with async_engine.connect() as conn:
+            for payload in payloads:
+                await conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+            await conn.commit()
+
+
+def get_backplane():
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane(settings.WS_NOTIFY_CHANNEL)
+    return LocalBackplane()
+
+
+backplane = get_backplane()
+
+
+async def publish(topic: str, message: dict) -> None:
+    await backplane.publish_many([{"topic": topic, "message": message}])
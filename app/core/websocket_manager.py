@@ -1,22 +1,135 @@
-from typing import Dict, List
-from fastapi import WebSocket
+"""Connexions WebSocket tenues par ce processus.
+
+Chaque connexion a sa propre file d'envoi bornée et sa tâche d'émission : un client
+lent ne retarde pas les autres, et une diffusion se limite à déposer le message
+(sérialisé une seule fois) dans les files. File pleine : le message est abandonné ou
+la connexion fermée, selon WS_OVERFLOW_POLICY. Un heartbeat applicatif ({"type":
+"ping"}) passe par la même file et détecte les connexions mortes.
+
+Les connexions sont indexées par sujet ("user:5", "club:12", "federation:1"...) :
+un message de portée club atteint toutes les connexions abonnées à ce club.
+
+Pour atteindre les connexions des autres workers / instances, publier via
+app.core.websocket_backplane plutôt qu'appeler send_personal_message directement.
+"""
+import asyncio
+import json
+from typing import Dict, Iterable, List, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.config import settings
+
+HEARTBEAT = json.dumps({"type": "ping"})
+
+
+class Connection:
+    def __init__(self, user_id: int, websocket: WebSocket, topics: Iterable[str]):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.topics = tuple(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.closed = asyncio.Event()
+
+    def offer(self, text: str) -> bool:
+        """Dépose un message sans attendre ; False si la file est pleine."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _send_loop(self) -> None:
+        # Condition sur `closed` : sous Python 3.11, wait_for peut avaler l'annulation si
+        # l'envoi se termine au même moment, la boucle doit donc s'arrêter d'elle-même
+        while not self.closed.is_set():
+            text = await self.queue.get()
+            await asyncio.wait_for(self.websocket.send_text(text), settings.WS_SEND_TIMEOUT_SECONDS)
+
+    async def _receive_loop(self) -> None:
+        # Les messages du client sont ignorés ; la lecture sert à voir la déconnexion tout de suite
+        try:
+            while True:
+                await self.websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_SECONDS)
+            if not self.offer(HEARTBEAT):
+                return  # file toujours pleine après un intervalle complet : client bloqué
+
+    async def run(self) -> None:
+        tasks = [
+            asyncio.create_task(self._send_loop()),
+            asyncio.create_task(self._receive_loop()),
+            asyncio.create_task(self._heartbeat_loop()),
+            asyncio.create_task(self.closed.wait()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.closed.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        self.closed.set()
+
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Set[Connection]] = {}
 
-    async def connect(self, user_id: int, websocket: WebSocket):
-        print('MMMMMMMMMMMMMMMMMM')
+    async def serve(self, user_id: int, websocket: WebSocket, topics: Iterable[str], initial: Iterable[dict] = ()) -> None:
+        """Accepte la connexion et la tient ouverte jusqu'à déconnexion, erreur d'envoi ou débordement."""
         await websocket.accept()
-        self.active_connections.setdefault(user_id, []).append(websocket)
+        connection = Connection(user_id, websocket, topics)
+        for message in initial:
+            connection.offer(json.dumps(message))
+        for topic in connection.topics:
+            self.active_connections.setdefault(topic, set()).add(connection)
+        try:
+            await connection.run()
+        finally:
+            self.disconnect(connection)
+            try:
+                await websocket.close()
+            except Exception:
+                pass
 
-    def disconnect(self, user_id: int, websocket: WebSocket):
-        self.active_connections[user_id].remove(websocket)
-        if not self.active_connections[user_id]:
-            del self.active_connections[user_id]
+    def disconnect(self, connection: Connection) -> None:
+        for topic in connection.topics:
+            connections = self.active_connections.get(topic)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self.active_connections[topic]
+
+    def _deliver(self, topic: str, text: str) -> None:
+        for connection in list(self.active_connections.get(topic, ())):
+            if connection.closed.is_set() or connection.offer(text):
+                continue
+            if settings.WS_OVERFLOW_POLICY == "disconnect":
+                print(f"[WS] File d'envoi pleine, déconnexion de l'utilisateur {connection.user_id}")
+                connection.close()
 
     async def send_personal_message(self, user_id: int, message: dict):
-        for ws in self.active_connections.get(user_id, []):
-            await ws.send_json(message)
+        """Livraison aux connexions locales uniquement."""
+        self._deliver(f"user:{user_id}", json.dumps(message))
+
+    def deliver_many(self, deliveries: List[dict]) -> None:
+        """[{"topic": ..., "message": {...}}] : chaque message est sérialisé une seule fois."""
+        for delivery in deliveries:
+            if delivery["topic"] in self.active_connections:
+                self._deliver(delivery["topic"], json.dumps(delivery["message"]))
+
+    def close_all(self) -> None:
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                connection.close()
+
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
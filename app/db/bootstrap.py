@@ -0,0 +1,116 @@
+"""Initialisation de la base au démarrage de l'API.
+
+Deux modes :
+- historique (DB_CREATE_ALL_ON_STARTUP=true) : CREATE SCHEMA + create_all au démarrage ;
+- démarrage rapide (DB_CREATE_ALL_ON_STARTUP=false) : aucun DDL, le schéma est géré
+  par Alembic (`alembic upgrade head`) et on peut vérifier la révision appliquée avec
+  `python -m app.db.bootstrap --check-schema`.
+
+Mise en place du schéma avec Alembic :
+- base vide : `alembic upgrade head` (la révision initiale ad0c2b62bb6c crée les tables) ;
+- base créée par create_all sans table alembic_version : l'aligner sur la révision
+  correspondant à son contenu avant de migrer, `alembic stamp ad0c2b62bb6c` si elle date
+  d'avant les migrations, `alembic stamp head` si elle a été créée par le code actuel,
+  puis `alembic upgrade head`.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from sqlalchemy import text
+
+from app.db import models
+from app.db.database import async_engine, engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
+
+def create_schema() -> None:
+    """Mode historique : crée le schéma fsbb et les tables manquantes."""
+    with engine.connect() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS fsbb"))
+        conn.commit()
+
+    models.Base.metadata.create_all(bind=engine)
+
+    # Les notifications sont partitionnées : il faut au moins les partitions courantes.
+    # create_all ne transforme pas une table existante : une base plus ancienne doit
+    # passer par la migration. Sous le verrou du job de rétention, une seule instance
+    # crée les partitions ; si le verrou est pris, l'autre instance s'en charge.
+    from app.services.notification_retention import ensure_partitions, is_partitioned, try_lock
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            print("[DB] fsbb.notifications n'est pas partitionnée : lancer `alembic upgrade head` (partitions non créées)")
+            return
+        if try_lock(conn):
+            ensure_partitions(conn)
+
+
+def expected_schema_versions() -> set:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+
+
+def check_schema_version() -> str:
+    """Compare la révision Alembic appliquée aux têtes du dépôt (une seule requête)."""
+    with engine.connect() as conn:
+        current = set(conn.execute(text("SELECT version_num FROM fsbb.alembic_version")).scalars())
+
+    expected = expected_schema_versions()
+    if current != expected:
+        raise RuntimeError(
+            f"Schéma non à jour : révision(s) en base {sorted(current)}, attendue(s) {sorted(expected)}. "
+            "Lancer `alembic upgrade head`."
+        )
+    return ", ".join(sorted(current))
+
+
+async def warm_up_pools(connections: int) -> None:
+    """Ouvre quelques connexions dans chaque pool pour que les premières requêtes n'attendent pas."""
+    if connections <= 0:
+        return
+
+    async def ping_async():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def ping_sync():
+        # Les connexions sont rendues au pool ensemble, pour en garder plusieurs ouvertes
+        conns = [engine.connect() for _ in range(connections)]
+        try:
+            for conn in conns:
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in conns:
+                conn.close()
+
+    await asyncio.gather(
+        asyncio.to_thread(ping_sync),
+        *(ping_async() for _ in range(connections)),
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Initialisation / vérification du schéma fsbb")
+    parser.add_argument("--check-schema", action="store_true", help="vérifie que la base est à la révision Alembic attendue")
+    parser.add_argument("--create-all", action="store_true", help="crée le schéma et les tables manquantes (mode historique)")
+    args = parser.parse_args(argv)
+
+    if args.create_all:
+        create_schema()
+        print("Schéma fsbb créé / complété.")
+    if args.check_schema:
+        try:
+            print(f"Schéma à jour (révision {check_schema_version()}).")
+        except Exception as e:
+            print(f"ERREUR : {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
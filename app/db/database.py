@@ -1,10 +1,45 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _engine_options(asyncio: bool = False) -> dict:
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        if asyncio:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def _async_database_url(url: str):
+    """postgresql://... (psycopg2) -> postgresql+asyncpg://... pour le moteur async."""
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+    # asyncpg ne comprend pas le paramètre libpq sslmode
+    if "sslmode" in async_url.query:
+        async_url = async_url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": async_url.query["sslmode"]}
+        )
+    return async_url
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Moteur async (asyncpg) : les routes async n'exécutent jamais d'I/O DB bloquante sur la boucle
+async_engine = create_async_engine(_async_database_url(settings.DATABASE_URL), **_engine_options(asyncio=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -13,3 +48,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
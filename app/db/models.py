@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean, DateTime, UniqueConstraint, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean, DateTime, UniqueConstraint, Date, Index, Sequence, LargeBinary, text
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from datetime import datetime
@@ -71,10 +71,16 @@ class User(Base):
 # ----------------------------
 # LICENCES
 # ----------------------------
+# Numéros de licence (LC + 8 chiffres) : valeurs uniques sans vérification ni retry
+licence_numero_seq = Sequence("licence_numero_seq", schema="fsbb", metadata=Base.metadata)
+
+
 class Licence(Base):
     __tablename__ = "licences"
     __table_args__ = (
         UniqueConstraint('adherent_id', 'saison_id', name='_unique_licence_par_saison'),
+        Index('ix_licences_club_saison_statut_date', 'club_id', 'saison_id', 'statut', 'date_creation'),
+        Index('ix_licences_date_creation_id', 'date_creation', 'id'),
         {'schema': 'fsbb'}
     )
 
@@ -91,7 +97,7 @@ class Licence(Base):
     saison_id = Column(Integer, ForeignKey("fsbb.saisons.id"), nullable=False)
     adherent_id = Column(Integer, ForeignKey("fsbb.adherents.id"), nullable=False)
 
-    date_creation = Column(DateTime, default=datetime.utcnow)
+    date_creation = Column(DateTime, default=datetime.utcnow, nullable=False)
     date_soumission = Column(DateTime, nullable=True)
     date_validation = Column(DateTime, nullable=True)
     date_refus = Column(DateTime, nullable=True)
@@ -132,6 +138,7 @@ class TypeFichier(Base):
     id = Column(Integer, primary_key=True, index=True)
     nom = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True)
+    taille_max = Column(Integer, nullable=True)  # octets ; NULL = UPLOAD_MAX_SIZE
 
     fichiers = relationship("Fichier", back_populates="type")
 
@@ -150,6 +157,9 @@ class Fichier(Base):
     nom_fichier = Column(String, nullable=False)
     chemin = Column(String, nullable=False)
     taille = Column(Integer, nullable=True)
+    checksum = Column(String(64), nullable=True)  # SHA-256 hexadécimal
+    miniature = Column(String, nullable=True)  # chemin de la miniature WebP
+    apercu = Column(String, nullable=True)  # chemin de l'aperçu JPEG (première page)
     date_upload = Column(DateTime, default=datetime.utcnow)
 
     id_licence = Column(Integer, ForeignKey("fsbb.licences.id"), nullable=False)
@@ -159,6 +169,22 @@ class Fichier(Base):
     type = relationship("TypeFichier", back_populates="fichiers")
 
 
+# ----------------------------
+# CONTENUS DE FICHIERS (stockage adressé par contenu)
+# ----------------------------
+class ContenuFichier(Base):
+    __tablename__ = "contenus_fichier"
+    __table_args__ = {'schema': 'fsbb'}
+
+    checksum = Column(String(64), primary_key=True)  # SHA-256 du contenu original
+    chemin = Column(String, nullable=False)
+    taille = Column(Integer, nullable=False)
+    taille_stockee = Column(Integer, nullable=False)
+    compression = Column(String(10), nullable=True)  # NULL, gzip, zstd
+    nb_references = Column(Integer, default=0, nullable=False)  # nombre de Fichier pointant ce contenu
+    date_creation = Column(DateTime, default=datetime.utcnow)
+
+
 # ----------------------------
 # INVITATIONS
 # ----------------------------
@@ -462,12 +488,28 @@ class Saison(Base):
         return f"<Saison {self.code}>"
     
 
+# Portée "user" : une ligne par destinataire (user_id, état de lecture dans `read`).
+# Portées "club", "ligue", "federation" : une seule ligne par événement (portee_id),
+# l'état de lecture de chaque utilisateur est dans notification_lectures.
+PORTEES_NOTIFICATION = ("user", "club", "ligue", "federation")
+
+
+# Table partitionnée par mois sur created_at (partitions gérées par
+# app.services.notification_retention) : la clé primaire inclut created_at.
 class Notification(Base):
     __tablename__ = "notifications"
-    __table_args__ = {"schema": "fsbb"}
+    __table_args__ = (
+        Index('ix_notifications_portee', 'portee', 'portee_id', 'created_at'),
+        # Boîte de réception et non lues d'un utilisateur
+        Index('ix_notifications_user_read_created', 'user_id', 'read', text('created_at DESC')),
+        {"schema": "fsbb", "postgresql_partition_by": "RANGE (created_at)"}
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("fsbb.users.id"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    user_id = Column(Integer, ForeignKey("fsbb.users.id"), nullable=True)
+    portee = Column(String(20), nullable=False, default="user", server_default="user")
+    portee_id = Column(Integer, nullable=True)
 
     titre = Column(String, nullable=False)
     message = Column(String, nullable=False)
@@ -475,11 +517,53 @@ class Notification(Base):
     lien = Column(String, nullable=True)
 
     read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     user = relationship("User", back_populates="notifications")
 
 
+class NotificationLecture(Base):
+    __tablename__ = "notification_lectures"
+    __table_args__ = {"schema": "fsbb"}
+
+    # Pas de clé étrangère vers une table partitionnée : les lectures sont purgées avec les notifications archivées
+    notification_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("fsbb.users.id", ondelete="CASCADE"), primary_key=True)
+    date_lecture = Column(DateTime, default=datetime.utcnow)
+
+
+# Compteurs de non lues, par sujet ("user:5", "club:12"...) : non lues = publiées - lues
+class NotificationCompteur(Base):
+    __tablename__ = "notification_compteurs"
+    __table_args__ = {"schema": "fsbb"}
+
+    sujet = Column(String(40), primary_key=True)
+    publiees = Column(Integer, nullable=False, default=0)
+
+
+class NotificationCompteurLu(Base):
+    __tablename__ = "notification_compteurs_lus"
+    __table_args__ = {"schema": "fsbb"}
+
+    user_id = Column(Integer, ForeignKey("fsbb.users.id", ondelete="CASCADE"), primary_key=True)
+    sujet = Column(String(40), primary_key=True)
+    lues = Column(Integer, nullable=False, default=0)
+
+
+# Notifications sorties de la table chaude : lots JSON compressés (gzip)
+class NotificationArchive(Base):
+    __tablename__ = "notification_archives"
+    __table_args__ = {"schema": "fsbb"}
+
+    id = Column(Integer, primary_key=True)
+    motif = Column(String(20), nullable=False)  # lues | partition
+    premiere_date = Column(DateTime, nullable=False)
+    derniere_date = Column(DateTime, nullable=False)
+    nombre = Column(Integer, nullable=False)
+    donnees = Column(LargeBinary, nullable=False)
+    date_archivage = Column(DateTime, default=datetime.utcnow)
+
+
 # ----------------------------
 # OFFRES (Plans tarifaires)
 # ----------------------------
@@ -515,7 +599,10 @@ class Offre(Base):
 # ----------------------------
 class Devis(Base):
     __tablename__ = "devis"
-    __table_args__ = {'schema': 'fsbb'}
+    __table_args__ = (
+        Index('ix_devis_statut_date_creation', 'statut', 'date_creation', 'id'),
+        {'schema': 'fsbb'}
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reference = Column(String(20), unique=True, index=True, nullable=False)
@@ -534,6 +621,17 @@ class Devis(Base):
     items = relationship("DevisItem", back_populates="devis", cascade="all, delete-orphan")
 
 
+# ----------------------------
+# COMPTEURS DE RÉFÉRENCES DEVIS (un par année)
+# ----------------------------
+class DevisCompteur(Base):
+    __tablename__ = "devis_compteurs"
+    __table_args__ = {'schema': 'fsbb'}
+
+    annee = Column(Integer, primary_key=True)
+    dernier_numero = Column(Integer, nullable=False, default=0)
+
+
 # ----------------------------
 # DEVIS ITEMS (Liaison devis ↔ offre)
 # ----------------------------
@@ -547,3 +645,28 @@ class DevisItem(Base):
 
     devis = relationship("Devis", back_populates="items")
     offre = relationship("Offre", back_populates="devis_items")
+
+
+# ----------------------------
+# EMAIL OUTBOX (file d'envoi persistante)
+# ----------------------------
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index('ix_email_outbox_statut_prochaine', 'statut', 'prochaine_tentative'),
+        {'schema': 'fsbb'}
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    destinataire = Column(String, nullable=False)
+    sujet = Column(String, nullable=False)
+    corps_html = Column(String, nullable=False)
+    corps_texte = Column(String, nullable=True)
+
+    statut = Column(String(20), default="en_attente", nullable=False)  # en_attente, envoi_en_cours, envoye, echec
+    tentatives = Column(Integer, default=0, nullable=False)
+    prochaine_tentative = Column(DateTime, default=datetime.utcnow, nullable=False)
+    derniere_erreur = Column(String, nullable=True)
+
+    date_creation = Column(DateTime, default=datetime.utcnow)
+    date_envoi = Column(DateTime, nullable=True)
\ No newline at end of file
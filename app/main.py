@@ -1,19 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-from app.db import models
-from app.db.database import engine
-from app.api.v1.routes import auth, users, licences, clubs, clubs_infos_type, federation, demande, adherents, notifications, ws, offres, devis
-from sqlalchemy import text
+from app.core.config import settings
+from app.core.websocket_backplane import backplane
+from app.core.websocket_manager import manager
+from app.db import bootstrap
+from app.db.database import async_engine, engine
+from app.services.document_previews import preview_pipeline
+from app.services.email_queue import email_worker
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_retention import retention_job
+from app.api.v1.routes import auth, users, licences, clubs, clubs_infos_type, federation, demande, adherents, notifications, ws, offres, devis, health
 
-with engine.connect() as conn:
-    conn.execute(text("CREATE SCHEMA IF NOT EXISTS fsbb"))
-    conn.commit()
+import os
 
-models.Base.metadata.create_all(bind=engine)
 
-import os
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aucun accès DB à l'import : le DDL éventuel et le préchauffage se font ici
+    if settings.DB_CREATE_ALL_ON_STARTUP:
+        await run_in_threadpool(bootstrap.create_schema)
+    if settings.DB_CHECK_SCHEMA_ON_STARTUP:
+        revision = await run_in_threadpool(bootstrap.check_schema_version)
+        print(f"[DB] Schéma à jour (révision {revision})")
+    try:
+        await asyncio.wait_for(bootstrap.warm_up_pools(settings.DB_POOL_WARMUP), timeout=10)
+    except Exception as e:
+        # Les connexions seront ouvertes à la demande
+        print(f"[DB] Préchauffage du pool impossible : {e}")
+    if settings.EMAIL_WORKER_ENABLED:
+        email_worker.start()
+    if settings.DOCUMENT_PREVIEWS_ENABLED:
+        preview_pipeline.start()
+    await backplane.start()
+    await notification_outbox.start()
+    if settings.NOTIFICATIONS_RETENTION_ENABLED:
+        retention_job.start()
+
+    yield
+
+    if settings.NOTIFICATIONS_RETENTION_ENABLED:
+        await run_in_threadpool(retention_job.stop)
+    await notification_outbox.stop()
+    await backplane.stop()
+    manager.close_all()
+
+    if settings.EMAIL_WORKER_ENABLED:
+        await run_in_threadpool(email_worker.stop)
+    await run_in_threadpool(preview_pipeline.stop)
+    await async_engine.dispose()
+    engine.dispose()
+
 
 # Configuration CORS
 production_origins = [
@@ -29,7 +70,7 @@ localhost_origins = [
 env_origins = os.getenv("FRONTEND_URLS", "").split(",")
 origins = list(set([url.strip() for url in production_origins + localhost_origins + env_origins if url.strip()]))
 
-app = FastAPI(title="FSBB API")
+app = FastAPI(title="FSBB API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,10 +87,13 @@ print(f"DEBUG: Allowed Origins: {origins}")
 import os
 
 # Create the uploads directory if it doesn't exist
-UPLOAD_DIR = os.getenv("UPLOAD_DIR") or "/tmp/ged"
+UPLOAD_DIR = settings.UPLOAD_DIR
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+# Accès direct historique, sans contrôle d'accès (y compris /uploads/cas/...) : désactivé par défaut,
+# les documents passent par /licences/demandes_licence/{id}/fichiers/{fichier_id}
+if settings.UPLOAD_PUBLIC_MOUNT:
+    app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Inclure les routes
 app.include_router(auth.router)
@@ -63,4 +107,5 @@ app.include_router(adherents.router)
 app.include_router(notifications.router)
 app.include_router(ws.router)
 app.include_router(offres.router)
-app.include_router(devis.router)
\ No newline at end of file
+app.include_router(devis.router)
+app.include_router(health.router)
\ No newline at end of file
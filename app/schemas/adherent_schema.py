@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class CategorieBase(BaseModel):
     id: int
@@ -39,4 +39,19 @@ class AdherentOut(AdherentBase):
     licence_numero: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AdherentImportLigne(BaseModel):
+    ligne: int
+    statut: str  # cree, existant, mis_a_jour, doublon, erreur
+    id: Optional[int] = None
+    erreurs: List[str] = []
+
+class AdherentImportReport(BaseModel):
+    total: int
+    cree: int
+    existant: int
+    mis_a_jour: int
+    doublon: int
+    erreur: int
+    lignes: List[AdherentImportLigne]
@@ -44,6 +44,9 @@ class LicenceFichier(BaseModel):
     nom_fichier: str
     type: Optional[str] = None
     chemin: str
+    url: Optional[str] = None  # téléchargement authentifié
+    miniature_url: Optional[str] = None
+    apercu_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -77,4 +80,29 @@ class LicenceResponse(BaseModel):
 # 🔄 Changement de statut
 # -------------------------------------------------------------------
 class StatutUpdateSchema(BaseModel):
-    statut: Literal["brouillon", "soumise", "en_verification", "validee", "refusee"]
\ No newline at end of file
+    statut: Literal["brouillon", "soumise", "en_verification", "validee", "refusee"]
+
+# -------------------------------------------------------------------
+# 📦 Validation / rejet en masse
+# -------------------------------------------------------------------
+class LicenceBulkFiltre(BaseModel):
+    """Sélection par critères (ex. toutes les licences soumises d'un club)."""
+    club_id: Optional[int] = None
+    saison_id: Optional[int] = None
+    statut: Literal["soumise", "en_cours", "en_verification"] = "soumise"
+
+class LicenceBulkAction(BaseModel):
+    action: Literal["valider", "rejeter"]
+    ids: Optional[List[int]] = Field(None, max_length=5000)
+    filtre: Optional[LicenceBulkFiltre] = None
+    motif: Optional[str] = None  # obligatoire pour un rejet
+
+class LicenceBulkResultat(BaseModel):
+    id: int
+    resultat: Literal["validee", "refusee", "introuvable", "interdit", "statut_invalide"]
+    numero: Optional[str] = None
+
+class LicenceBulkResponse(BaseModel):
+    traitees: int
+    ignorees: int
+    resultats: List[LicenceBulkResultat]
@@ -1,7 +1,7 @@
 # app/schemas/notification_schema.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 class NotificationOut(BaseModel):
     id: int
@@ -10,6 +10,7 @@ class NotificationOut(BaseModel):
     type: str
     lien: Optional[str]
     read: bool
+    portee: str = "user"
     created_at: datetime
 
     class Config:
@@ -22,3 +23,12 @@ class NotificationCreate(BaseModel):
     message: str
     type: str
     lien: Optional[str] = None
+
+
+class NotificationAnnonce(BaseModel):
+    portee: Literal["club", "ligue", "federation"]
+    portee_id: Optional[int] = None  # par défaut : le club / la ligue / la fédération de l'émetteur
+    titre: str
+    message: str
+    type: str = "system"
+    lien: Optional[str] = None
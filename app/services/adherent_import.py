@@ -0,0 +1,160 @@
+"""Import en masse des adhérents d'un club depuis un CSV.
+
+Le fichier est lu en flux par lots de ADHERENT_IMPORT_BATCH_SIZE lignes ; chaque ligne
+est validée avec AdherentCreate, et chaque lot est écrit en un seul
+INSERT ... ON CONFLICT ON CONSTRAINT _unique_adherent_club : quelques requêtes pour
+des milliers d'adhérents, dans une seule transaction. Les colonnes reconnues sont
+celles de AdherentCreate ; les autres (id, categorie, licence_numero... d'un export)
+sont ignorées, un export peut donc être réimporté tel quel.
+"""
+import csv
+import io
+import re
+from datetime import date
+from itertools import islice
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db import models
+from app.schemas.adherent_schema import AdherentCreate
+from app.services.reference_data import reference_data
+
+COLONNES = tuple(AdherentCreate.model_fields)
+OBLIGATOIRES = ("nom", "prenom", "date_naissance")
+CONTRAINTE = "_unique_adherent_club"
+BOOLEENS = {"oui": True, "non": False, "o": True, "n": False}
+DATE_FR = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+Cle = Tuple[str, str, date]
+
+
+def _reader(fichier: UploadFile):
+    """csv.DictReader sur le flux du fichier ; séparateur ; ou , détecté sur la ligne d'en-tête."""
+    texte = io.TextIOWrapper(fichier.file, encoding="utf-8-sig", newline="")
+    try:
+        entete = texte.readline()
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Fichier illisible : encodage UTF-8 attendu.")
+    separateur = ";" if entete.count(";") >= entete.count(",") else ","
+    colonnes = [c.strip().lower() for c in next(csv.reader([entete], delimiter=separateur), [])]
+    manquantes = [c for c in OBLIGATOIRES if c not in colonnes]
+    if manquantes:
+        raise HTTPException(status_code=400, detail=f"Colonnes obligatoires manquantes : {', '.join(manquantes)}")
+    return csv.DictReader(texte, fieldnames=colonnes, delimiter=separateur)
+
+
+def _read_batch(reader, taille: int) -> List[dict]:
+    try:
+        return list(islice(reader, taille))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Fichier illisible : encodage UTF-8 attendu.")
+
+
+def _normalize(ligne: dict) -> dict:
+    """Cellules vides -> absentes, oui/non -> booléen, JJ/MM/AAAA -> AAAA-MM-JJ."""
+    donnees = {}
+    for colonne in COLONNES:
+        valeur = (ligne.get(colonne) or "").strip()
+        if not valeur:
+            continue
+        if colonne == "actif":
+            valeur = BOOLEENS.get(valeur.lower(), valeur)
+        elif colonne == "date_naissance":
+            match = DATE_FR.fullmatch(valeur)
+            if match:
+                jour, mois, annee = match.groups()
+                valeur = f"{annee}-{int(mois):02d}-{int(jour):02d}"
+        donnees[colonne] = valeur
+    return donnees
+
+
+def _errors(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc'])} : {e['msg']}" for e in exc.errors()]
+
+
+async def _write_batch(db, club_id: int, valides: List[Tuple[int, dict]], mettre_a_jour: bool) -> Dict[Cle, Tuple[int, str]]:
+    """Écrit un lot en une requête ; renvoie {clé: (id, statut)} pour chaque adhérent du lot."""
+    A = models.Adherent
+    stmt = pg_insert(A).values([donnees for _, donnees in valides])
+    if mettre_a_jour:
+        stmt = stmt.on_conflict_do_update(
+            constraint=CONTRAINTE,
+            set_={c: stmt.excluded[c] for c in ("genre", "email", "telephone", "actif", "categorie_id")},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint=CONTRAINTE)
+    # xmax = 0 : ligne insérée par cette requête (et non mise à jour)
+    result = await db.execute(stmt.returning(A.id, A.nom, A.prenom, A.date_naissance, literal_column("xmax = 0")))
+    statuts = {
+        (nom, prenom, date_naissance): (id, "cree" if inseree else "mis_a_jour")
+        for id, nom, prenom, date_naissance, inseree in result
+    }
+
+    # ON CONFLICT DO NOTHING ne renvoie pas les lignes existantes : une requête pour leurs id
+    existantes = [(d["nom"], d["prenom"], d["date_naissance"]) for _, d in valides if (d["nom"], d["prenom"], d["date_naissance"]) not in statuts]
+    if existantes:
+        result = await db.execute(
+            select(A.id, A.nom, A.prenom, A.date_naissance)
+            .filter(A.club_id == club_id, tuple_(A.nom, A.prenom, A.date_naissance).in_(existantes))
+        )
+        for id, nom, prenom, date_naissance in result:
+            statuts[(nom, prenom, date_naissance)] = (id, "existant")
+    return statuts
+
+
+async def import_adherents(db, club_id: int, fichier: UploadFile, mettre_a_jour: bool = False) -> dict:
+    """Importe le CSV dans la transaction de `db` (sans commit) et renvoie le rapport ligne par ligne.
+
+    Statuts : cree, existant (déjà dans le club, ignoré), mis_a_jour (si `mettre_a_jour`),
+    doublon (même adhérent plus haut dans le fichier), erreur (ligne rejetée, voir `erreurs`)."""
+    referentiel = await reference_data.aget()
+    reader = await run_in_threadpool(_reader, fichier)
+    lignes: List[dict] = []
+    vues: Dict[Cle, int] = {}
+    numero = 1  # ligne d'en-tête
+
+    while True:
+        lot = await run_in_threadpool(_read_batch, reader, settings.ADHERENT_IMPORT_BATCH_SIZE)
+        if not lot:
+            break
+        if numero - 1 + len(lot) > settings.ADHERENT_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Fichier trop volumineux : {settings.ADHERENT_IMPORT_MAX_ROWS} adhérents au maximum par import.",
+            )
+
+        valides: List[Tuple[int, dict]] = []
+        rapports: Dict[int, dict] = {}
+        for ligne in lot:
+            numero += 1
+            try:
+                adherent = AdherentCreate.model_validate(_normalize(ligne))
+            except ValidationError as e:
+                rapports[numero] = {"ligne": numero, "statut": "erreur", "erreurs": _errors(e)}
+                continue
+            if adherent.categorie_id is not None and referentiel.categorie(adherent.categorie_id) is None:
+                rapports[numero] = {"ligne": numero, "statut": "erreur", "erreurs": [f"categorie_id : catégorie {adherent.categorie_id} inconnue"]}
+                continue
+            donnees = {**adherent.model_dump(), "date_naissance": adherent.date_naissance.date(), "club_id": club_id}
+            cle = (donnees["nom"], donnees["prenom"], donnees["date_naissance"])
+            if cle in vues:
+                rapports[numero] = {"ligne": numero, "statut": "doublon", "erreurs": [f"Même adhérent qu'à la ligne {vues[cle]}"]}
+                continue
+            vues[cle] = numero
+            valides.append((numero, donnees))
+
+        if valides:
+            statuts = await _write_batch(db, club_id, valides, mettre_a_jour)
+            for numero_ligne, donnees in valides:
+                id, statut = statuts[(donnees["nom"], donnees["prenom"], donnees["date_naissance"])]
+                rapports[numero_ligne] = {"ligne": numero_ligne, "statut": statut, "id": id}
+        lignes.extend(rapports[n] for n in sorted(rapports))
+
+    compte = {statut: sum(1 for l in lignes if l["statut"] == statut) for statut in ("cree", "existant", "mis_a_jour", "doublon", "erreur")}
+    return {"total": len(lignes), **compte, "lignes": lignes}
@@ -0,0 +1,168 @@
+"""Miniatures et aperçus des documents de licence.
+
+Après le commit d'un upload, la génération est confiée à un pool de processus
+(décodage d'image et rendu PDF sont coûteux en CPU) : une miniature WebP et un
+aperçu JPEG de la première page, écrits à côté du contenu original
+(`<sha256>.miniature.webp`, `<sha256>.apercu.jpg`). Un contenu déjà connu réutilise
+ses dérivés. Les chemins sont ensuite enregistrés sur le Fichier.
+
+Rattrapage des documents existants :
+    python -m app.services.document_previews --backfill
+"""
+import argparse
+import asyncio
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db import models
+from app.services.document_storage import SUFFIXES, fichier_path, iter_content
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+VARIANTS = {
+    "miniature": ("webp", "WEBP", "image/webp"),
+    "apercu": ("jpg", "JPEG", "image/jpeg"),
+}
+
+
+def derivative_path(original: Path, variant: str) -> Path:
+    name = original.name
+    for suffix in SUFFIXES.values():
+        if suffix and name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return original.with_name(f"{name}.{variant}.{VARIANTS[variant][0]}")
+
+
+def _first_page(data: bytes, nom_fichier: str, max_size: int):
+    from PIL import Image
+
+    if data.startswith(b"%PDF") or nom_fichier.lower().endswith(".pdf"):
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(data)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            # Rendu directement à la taille de l'aperçu, pas à la résolution d'impression
+            image = page.render(scale=max_size / max(width, height)).to_pil()
+        finally:
+            pdf.close()
+        return image
+
+    if Path(nom_fichier).suffix.lower() not in IMAGE_SUFFIXES:
+        return None
+    image = Image.open(BytesIO(data))
+    image.draft("RGB", (max_size, max_size))  # décodage JPEG réduit
+    return image
+
+
+def render_derivatives(chemin: str, nom_fichier: str) -> Dict[str, str]:
+    """Exécuté dans le pool de processus : produit les dérivés manquants, renvoie {variante: chemin}."""
+    original = Path(chemin)
+    targets = {variant: derivative_path(original, variant) for variant in VARIANTS}
+    if all(path.exists() for path in targets.values()):
+        return {variant: str(path) for variant, path in targets.items()}
+
+    data = b"".join(iter_content(original))
+    image = _first_page(data, nom_fichier, settings.DOCUMENT_PREVIEW_SIZE)
+    if image is None:
+        return {}
+
+    image = image.convert("RGB")
+    sizes = {"apercu": settings.DOCUMENT_PREVIEW_SIZE, "miniature": settings.DOCUMENT_THUMBNAIL_SIZE}
+    for variant in ("apercu", "miniature"):
+        image.thumbnail((sizes[variant], sizes[variant]))
+        tmp = targets[variant].with_name(targets[variant].name + ".part")
+        image.save(tmp, format=VARIANTS[variant][1], quality=80)
+        tmp.replace(targets[variant])
+    return {variant: str(path) for variant, path in targets.items()}
+
+
+class PreviewPipeline:
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self._pool is None:
+            # spawn : pas de fork d'un processus qui fait tourner la boucle asyncio et des threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.DOCUMENT_PREVIEW_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def generate(self, fichier_id: int, chemin: str, nom_fichier: str) -> None:
+        """Tâche de fond lancée après le commit de l'upload."""
+        if self._pool is None:
+            return
+        from app.db.database import AsyncSessionLocal
+
+        try:
+            loop = asyncio.get_running_loop()
+            paths = await loop.run_in_executor(self._pool, render_derivatives, chemin, nom_fichier)
+        except Exception as e:
+            print(f"[GED] Aperçu impossible pour le fichier {fichier_id}: {e}")
+            return
+        if not paths:
+            return
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.Fichier)
+                .where(models.Fichier.id == fichier_id)
+                .values(miniature=paths["miniature"], apercu=paths["apercu"])
+            )
+            await db.commit()
+
+
+preview_pipeline = PreviewPipeline()
+
+
+def backfill() -> int:
+    """Génère les dérivés des documents qui n'en ont pas encore (séquentiel, hors API)."""
+    from app.db.database import SessionLocal
+
+    done = 0
+    with SessionLocal() as db:
+        fichiers = db.execute(
+            select(models.Fichier).filter(models.Fichier.miniature.is_(None)).order_by(models.Fichier.id)
+        ).scalars().all()
+        for fichier in fichiers:
+            path = fichier_path(fichier)
+            if not path.is_file():
+                continue
+            try:
+                paths = render_derivatives(str(path), fichier.nom_fichier)
+            except Exception as e:
+                print(f"[GED] Aperçu impossible pour le fichier {fichier.id}: {e}")
+                continue
+            if paths:
+                fichier.miniature = paths["miniature"]
+                fichier.apercu = paths["apercu"]
+                db.commit()
+                done += 1
+    return done
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Miniatures et aperçus des documents de licence")
+    parser.add_argument("--backfill", action="store_true", help="génère les dérivés manquants des documents existants")
+    args = parser.parse_args(argv)
+
+    if args.backfill:
+        print(f"{backfill()} document(s) traité(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""Stockage sur disque des documents de licence (GED).
+
+Les documents sont stockés par contenu : un fichier par SHA-256 sous
+`{UPLOAD_DIR}/cas/ab/cd/<sha256>`, partagé par tous les `Fichier` de même contenu.
+La table fsbb.contenus_fichier tient le compteur de références ; un contenu qui
+n'est plus référencé est supprimé du disque par `--gc`.
+
+L'upload est copié par blocs de UPLOAD_CHUNK_SIZE dans un fichier temporaire du
+stockage ; les écritures passent par le threadpool pour ne pas bloquer la boucle
+d'événements. La taille et le SHA-256 sont calculés au fil de l'eau et la limite
+de taille est vérifiée à chaque bloc. Le contenu n'apparaît sous son nom définitif
+qu'au renommage atomique.
+
+Migration d'une arborescence existante ({org_id}/{club_id}/{type}/{fichier_id}) :
+    python -m app.services.document_storage --migrate [--dry-run]
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db import models
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle
+    zstandard = None
+
+# Formats déjà compressés : une passe gzip/zstd ne ferait que coûter du CPU
+ALREADY_COMPRESSED = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".zip", ".gz", ".zst", ".docx", ".xlsx", ".odt"}
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+MIN_COMPRESSION_GAIN = 0.9  # on garde la version compressée si elle fait au plus 90 % de l'original
+
+
+@dataclass
+class StagedUpload:
+    path: Path
+    taille: int
+    checksum: str
+
+    def discard(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class StoredContent:
+    checksum: str
+    chemin: str
+    taille: int
+    taille_stockee: int
+    compression: Optional[str]
+
+
+def _human_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):g} Mo"
+    return f"{size / 1024:.0f} Ko"
+
+
+def _compression_setting() -> Optional[str]:
+    compression = settings.DOCUMENT_COMPRESSION
+    if compression == "none":
+        return None
+    if compression == "zstd" and zstandard is None:
+        print("[GED] zstandard non installé — compression gzip utilisée")
+        return "gzip"
+    return compression
+
+
+def compression_of(path: Path) -> Optional[str]:
+    return next((c for c, s in SUFFIXES.items() if s and path.name.endswith(s)), None)
+
+
+# ------------------ Stockage par contenu ------------------
+class ContentStore:
+    def __init__(self, root: Path):
+        self.root = root
+        self.staging_dir = root / ".staging"
+
+    def path_for(self, checksum: str, compression: Optional[str] = None) -> Path:
+        return self.root / checksum[:2] / checksum[2:4] / f"{checksum}{SUFFIXES[compression]}"
+
+    def find(self, checksum: str) -> Optional[Path]:
+        for compression in SUFFIXES:
+            path = self.path_for(checksum, compression)
+            if path.exists():
+                return path
+        return None
+
+    def _compress(self, src: Path, compression: str) -> Path:
+        fd, name = tempfile.mkstemp(dir=self.staging_dir, suffix=SUFFIXES[compression])
+        with open(src, "rb") as fin, os.fdopen(fd, "wb") as fout:
+            if compression == "zstd":
+                zstandard.ZstdCompressor().copy_stream(fin, fout)
+            else:
+                with gzip.GzipFile(fileobj=fout, mode="wb", mtime=0) as gz:
+                    shutil.copyfileobj(fin, gz, settings.UPLOAD_CHUNK_SIZE)
+        return Path(name)
+
+    def put(self, src: Path, checksum: str, filename: Optional[str] = None, keep_source: bool = False) -> StoredContent:
+        """Range `src` sous son checksum ; s'il est déjà stocké, le fichier source est simplement écarté.
+
+        Bloquant : à appeler via le threadpool depuis une route async.
+        """
+        taille = src.stat().st_size
+        existing = self.find(checksum)
+        if existing is not None:
+            # Rafraîchit la date pour que le ramasse-miettes ne supprime pas un contenu réutilisé
+            os.utime(existing)
+            if not keep_source:
+                src.unlink()
+            return self._describe(existing, checksum, taille)
+
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        compression = _compression_setting()
+        suffix = Path(filename or "").suffix.lower()
+        candidate = None
+        if compression and suffix not in ALREADY_COMPRESSED:
+            candidate = self._compress(src, compression)
+            if candidate.stat().st_size > taille * MIN_COMPRESSION_GAIN:
+                candidate.unlink()
+                candidate = None
+        if candidate is None:
+            compression = None
+            if keep_source:
+                fd, name = tempfile.mkstemp(dir=self.staging_dir)
+                os.close(fd)
+                shutil.copyfile(src, name)
+                candidate = Path(name)
+            else:
+                candidate = src
+        elif not keep_source:
+            src.unlink()
+
+        destination = self.path_for(checksum, compression)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(candidate, destination)
+        return self._describe(destination, checksum, taille)
+
+    def _describe(self, path: Path, checksum: str, taille: int) -> StoredContent:
+        return StoredContent(
+            checksum=checksum,
+            chemin=str(path),
+            taille=taille,
+            taille_stockee=path.stat().st_size,
+            compression=compression_of(path),
+        )
+
+
+document_store = ContentStore(Path(settings.UPLOAD_DIR) / "cas")
+
+
+def fichier_path(fichier) -> Path:
+    """Chemin sur disque d'un Fichier : contenu partagé, ou {chemin}/{id} s'il n'a pas encore été migré."""
+    path = Path(fichier.chemin)
+    return path / str(fichier.id) if path.is_dir() else path
+
+
+def iter_content(path: Path) -> Iterator[bytes]:
+    """Contenu original (décompressé) par blocs ; itérateur bloquant, consommé via le threadpool."""
+    compression = compression_of(path)
+    with open(path, "rb") as raw:
+        if compression == "zstd":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        elif compression == "gzip":
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        else:
+            stream = raw
+        while chunk := stream.read(settings.UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+def max_size_for(type_fichier) -> int:
+    return type_fichier.taille_max or settings.UPLOAD_MAX_SIZE
+
+
+def _open_temp(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), Path(name)
+
+
+async def stage_upload(file: UploadFile, max_size: Optional[int] = None) -> StagedUpload:
+    """Copie l'upload dans un fichier temporaire du stockage (413 si trop volumineux)."""
+    max_size = max_size or settings.UPLOAD_MAX_SIZE
+    out, tmp_path = await run_in_threadpool(_open_temp, document_store.staging_dir)
+    digest = hashlib.sha256()
+    taille = 0
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            taille += len(chunk)
+            if taille > max_size:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Fichier trop volumineux (maximum {_human_size(max_size)}).",
+                )
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(out.close)
+    except BaseException:
+        out.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return StagedUpload(path=tmp_path, taille=taille, checksum=digest.hexdigest())
+
+
+async def store_upload(file: UploadFile, max_size: Optional[int] = None) -> StoredContent:
+    """Upload en streaming puis rangement dans le stockage par contenu (dédupliqué)."""
+    staged = await stage_upload(file, max_size)
+    try:
+        return await run_in_threadpool(document_store.put, staged.path, staged.checksum, file.filename)
+    except BaseException:
+        staged.discard()
+        raise
+
+
+# ------------------ Compteur de références ------------------
+def add_reference_stmt(stored: StoredContent):
+    """INSERT ... ON CONFLICT qui crée le contenu ou incrémente son compteur (session sync ou async)."""
+    stmt = pg_insert(models.ContenuFichier).values(
+        checksum=stored.checksum,
+        chemin=stored.chemin,
+        taille=stored.taille,
+        taille_stockee=stored.taille_stockee,
+        compression=stored.compression,
+        nb_references=1,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[models.ContenuFichier.checksum],
+        set_={"nb_references": models.ContenuFichier.nb_references + 1},
+    )
+
+
+def release_reference_stmts(checksums: Iterable[str]) -> list:
+    """Décrémente le compteur de chaque checksum (une fois par Fichier supprimé) puis supprime
+    les contenus qui ne sont plus référencés ; les fichiers sur disque partent au prochain `--gc`."""
+    checksums = [c for c in checksums if c]
+    if not checksums:
+        return []
+    stmts = [
+        update(models.ContenuFichier)
+        .where(models.ContenuFichier.checksum == checksum)
+        .values(nb_references=models.ContenuFichier.nb_references - 1)
+        for checksum in checksums
+    ]
+    stmts.append(
+        delete(models.ContenuFichier).where(
+            models.ContenuFichier.checksum.in_(set(checksums)),
+            models.ContenuFichier.nb_references <= 0,
+        )
+    )
+    return stmts
+
+
+# ------------------ Outils (migration, ramasse-miettes) ------------------
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_legacy_tree(dry_run: bool = False) -> dict:
+    """Range dans le stockage par contenu les documents encore sous {chemin}/{fichier_id}.
+
+    Chaque document est copié, la ligne Fichier est mise à jour et validée, puis
+    seulement l'ancien fichier est supprimé : une interruption ne perd rien.
+    """
+    from app.db.database import SessionLocal
+
+    stats = {"migres": 0, "doublons": 0, "manquants": 0, "octets_avant": 0, "octets_apres": 0}
+    seen = set()
+    with SessionLocal() as db:
+        fichiers = db.execute(
+            select(models.Fichier)
+            .filter(~models.Fichier.chemin.startswith(str(document_store.root)))
+            .order_by(models.Fichier.id)
+        ).scalars().all()
+
+        for fichier in fichiers:
+            legacy = Path(fichier.chemin) / str(fichier.id)
+            if not legacy.is_file():
+                stats["manquants"] += 1
+                print(f"[GED] Fichier {fichier.id} introuvable : {legacy}")
+                continue
+
+            checksum = _sha256_file(legacy)
+            taille = legacy.stat().st_size
+            stats["octets_avant"] += taille
+            duplicate = checksum in seen or document_store.find(checksum) is not None
+            seen.add(checksum)
+            if duplicate:
+                stats["doublons"] += 1
+            if dry_run:
+                if not duplicate:
+                    stats["octets_apres"] += taille
+                continue
+
+            stored = document_store.put(legacy, checksum, fichier.nom_fichier, keep_source=True)
+            if not duplicate:
+                stats["octets_apres"] += stored.taille_stockee
+            db.execute(add_reference_stmt(stored))
+            fichier.chemin = stored.chemin
+            fichier.checksum = checksum
+            fichier.taille = taille
+            db.commit()
+            legacy.unlink()
+            stats["migres"] += 1
+
+    return stats
+
+
+def collect_garbage(grace_seconds: Optional[int] = None) -> int:
+    """Supprime les contenus sans ligne contenus_fichier et les uploads temporaires abandonnés."""
+    from app.db.database import SessionLocal
+
+    grace = settings.DOCUMENT_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    limit = time.time() - grace
+    if not document_store.root.exists():
+        return 0
+
+    with SessionLocal() as db:
+        known = set(db.execute(select(models.ContenuFichier.checksum)).scalars())
+
+    removed = 0
+    for path in document_store.root.rglob("*"):
+        # Le contenu et ses dérivés (<sha256>.miniature.webp...) vivent tant que le checksum est référencé
+        if not path.is_file() or path.name.split(".")[0] in known or path.stat().st_mtime > limit:
+            continue
+        path.unlink()
+        removed += 1
+    return removed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stockage par contenu des documents de licence")
+    parser.add_argument("--migrate", action="store_true", help="déduplique l'arborescence historique des uploads")
+    parser.add_argument("--dry-run", action="store_true", help="avec --migrate : calcule le gain sans rien modifier")
+    parser.add_argument("--gc", action="store_true", help="supprime du disque les contenus qui ne sont plus référencés")
+    args = parser.parse_args(argv)
+
+    if args.migrate:
+        stats = migrate_legacy_tree(dry_run=args.dry_run)
+        print(
+            f"{stats['migres']} document(s) migré(s), {stats['doublons']} doublon(s), {stats['manquants']} introuvable(s) ; "
+            f"{_human_size(stats['octets_avant'])} -> {_human_size(stats['octets_apres'])}"
+        )
+    if args.gc:
+        print(f"{collect_garbage()} fichier(s) orphelin(s) supprimé(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
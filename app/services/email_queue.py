@@ -0,0 +1,236 @@
+"""File d'envoi des emails.
+
+Les routes HTTP se contentent d'insérer une ligne dans fsbb.email_outbox (dans leur
+propre transaction) ; un worker en arrière-plan envoie les messages par lots en
+réutilisant une seule connexion SMTP authentifiée, avec nouvelles tentatives et
+backoff exponentiel. Les messages survivent donc aux redémarrages.
+
+Un lot est d'abord réservé (statut envoi_en_cours, bail EMAIL_CLAIM_LEASE_SECONDS) dans
+une transaction courte ; les envois SMTP ont lieu hors transaction, puis leur issue est
+enregistrée dans une seconde transaction.
+"""
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+
+
+def enqueue_email(db, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> models.EmailOutbox:
+    """Ajoute un email à la file ; il part au commit de la transaction de l'appelant."""
+    message = models.EmailOutbox(
+        destinataire=to_email,
+        sujet=subject,
+        corps_html=html_body,
+        corps_texte=text_body,
+        statut="en_attente",
+        tentatives=0,
+        prochaine_tentative=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+def build_mime(message: models.EmailOutbox) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = message.sujet
+    msg["From"] = settings.SMTP_FROM
+    msg["To"] = message.destinataire
+    if message.corps_texte:
+        msg.attach(MIMEText(message.corps_texte, "plain"))
+    msg.attach(MIMEText(message.corps_html, "html"))
+    return msg
+
+
+# ------------------ Transports ------------------
+# Refus propres à un message : le serveur répond, le reste du lot peut partir
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Serveur injoignable, connexion coupée, login refusé... (SMTPException hérite d'OSError)."""
+    return isinstance(error, OSError) and not isinstance(error, MESSAGE_ERRORS)
+
+
+class SmtpTransport:
+    """Connexion SMTP persistante : STARTTLS et login une seule fois pour tout un lot."""
+
+    def __init__(self):
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        if settings.SMTP_STARTTLS:
+            server.starttls()
+        if settings.SMTP_USER and settings.SMTP_PASSWORD:
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        return server
+
+    def send(self, msg: MIMEMultipart) -> None:
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.sendmail(msg["From"], msg["To"], msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # Connexion fermée par le serveur (inactivité) : on se reconnecte une fois
+            self._server = self._connect()
+            self._server.sendmail(msg["From"], msg["To"], msg.as_string())
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
+
+class MemoryTransport:
+    """Remplaçant local du serveur SMTP : garde les messages en mémoire (tests)."""
+
+    def __init__(self):
+        self.outbox: List[MIMEMultipart] = []
+
+    def send(self, msg: MIMEMultipart) -> None:
+        self.outbox.append(msg)
+
+    def close(self) -> None:
+        pass
+
+
+def get_transport():
+    if settings.EMAIL_BACKEND == "memory":
+        return MemoryTransport()
+    return SmtpTransport()
+
+
+# ------------------ Worker ------------------
+class EmailWorker:
+    def __init__(self, transport=None):
+        self.transport = transport or get_transport()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.transport.close()
+
+    def wake(self) -> None:
+        """À appeler après le commit d'un enqueue_email pour un envoi immédiat."""
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sent = self.process_batch()
+            except Exception as e:
+                print(f"[EMAIL] Erreur du worker: {e}")
+                sent = 0
+            if sent < settings.EMAIL_BATCH_SIZE:
+                # File vide (ou presque) : on libère la connexion SMTP et on attend
+                self.transport.close()
+                self._wakeup.wait(settings.EMAIL_WORKER_POLL_SECONDS)
+                self._wakeup.clear()
+
+    def process_batch(self) -> int:
+        """Envoie un lot de messages dus ; renvoie le nombre de messages traités."""
+        batch = self._claim()
+        sent: List[int] = []
+        failed: Dict[int, Exception] = {}
+        released: List[int] = []
+        for index, (message_id, msg) in enumerate(batch):
+            try:
+                self.transport.send(msg)
+            except Exception as e:
+                self.transport.close()
+                failed[message_id] = e
+                if is_connection_error(e):
+                    # Serveur injoignable : inutile d'essayer le reste du lot, rendu tel quel à la file
+                    released = [other_id for other_id, _ in batch[index + 1:]]
+                    print(f"[EMAIL] Serveur SMTP indisponible, {len(released)} message(s) remis en file: {e}")
+                    break
+            else:
+                sent.append(message_id)
+                print(f"[EMAIL] Envoyé à {msg['To']}: {msg['Subject']}")
+        if batch:
+            self._record(sent, failed, released)
+        return len(sent) + len(failed)
+
+    def _claim(self) -> List[Tuple[int, MIMEMultipart]]:
+        """Réserve un lot puis valide aussitôt : aucun verrou n'est tenu pendant les envois SMTP.
+
+        Les messages réservés passent en envoi_en_cours avec un bail (prochaine_tentative) ;
+        si l'instance s'arrête en plein lot, ils redeviennent disponibles à son expiration."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            # SKIP LOCKED : plusieurs instances peuvent dépiler la même file sans doublon
+            messages = db.execute(
+                select(models.EmailOutbox)
+                .filter(
+                    models.EmailOutbox.statut.in_(("en_attente", "envoi_en_cours")),
+                    models.EmailOutbox.prochaine_tentative <= now,
+                )
+                .order_by(models.EmailOutbox.id)
+                .limit(settings.EMAIL_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+
+            batch = [(message.id, build_mime(message)) for message in messages]
+            for message in messages:
+                message.statut = "envoi_en_cours"
+                message.prochaine_tentative = now + timedelta(seconds=settings.EMAIL_CLAIM_LEASE_SECONDS)
+            db.commit()
+            return batch
+
+    def _record(self, sent: List[int], failed: Dict[int, Exception], released: List[int]) -> None:
+        """Enregistre l'issue des envois d'un lot réservé par _claim."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            messages = db.execute(
+                select(models.EmailOutbox)
+                .filter(
+                    models.EmailOutbox.id.in_(sent + list(failed) + released),
+                    models.EmailOutbox.statut == "envoi_en_cours",
+                )
+                .with_for_update()
+            ).scalars().all()
+
+            for message in messages:
+                if message.id in failed:
+                    error = failed[message.id]
+                    message.tentatives += 1
+                    message.derniere_erreur = str(error)[:500]
+                    if message.tentatives >= settings.EMAIL_MAX_ATTEMPTS:
+                        message.statut = "echec"
+                        print(f"[EMAIL] Abandon de l'envoi à {message.destinataire}: {error}")
+                    else:
+                        delay = settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (message.tentatives - 1)
+                        message.statut = "en_attente"
+                        message.prochaine_tentative = now + timedelta(seconds=delay)
+                elif message.id in released:
+                    message.statut = "en_attente"
+                    message.prochaine_tentative = now
+                else:
+                    message.statut = "envoye"
+                    message.date_envoi = now
+            db.commit()
+
+email_worker = EmailWorker()
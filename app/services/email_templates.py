@@ -0,0 +1,78 @@
+"""Templates d'emails, chargés et compilés une seule fois à l'import.
+
+Chaque message partage la mise en page et le CSS de layout.html ; le corps HTML est
+injecté dans la mise en page au chargement, si bien qu'un rendu se résume à une
+substitution de variables. Chaque template fournit aussi une version texte.
+
+Les variables sont échappées pour le HTML, sauf celles suffixées par `_html`
+(fragments déjà construits et échappés par l'appelant).
+"""
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from string import Template
+from typing import Dict, Iterable, List
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "emails"
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplate:
+    def __init__(self, subject: str, html: str, text: str):
+        self.subject = Template(subject)
+        self.html = Template(html)
+        self.text = Template(text)
+
+    def render(self, **context) -> RenderedEmail:
+        html_context = {
+            key: value if key.endswith("_html") else escape(str(value))
+            for key, value in context.items()
+        }
+        return RenderedEmail(
+            subject=self.subject.substitute(context),
+            html=self.html.substitute(html_context),
+            text=self.text.safe_substitute(context),
+        )
+
+    def render_batch(self, contexts: Iterable[dict]) -> List[RenderedEmail]:
+        """Rendu d'un lot de destinataires (invitations en masse...)."""
+        return [self.render(**context) for context in contexts]
+
+
+def _read(name: str) -> str:
+    return (TEMPLATES_DIR / name).read_text(encoding="utf-8")
+
+
+def _load(name: str, subject: str, header_subtitle: str) -> EmailTemplate:
+    layout = Template(_read("layout.html"))
+    # La mise en page est résolue une fois ; seules les variables du message restent
+    html = layout.safe_substitute(header_subtitle=header_subtitle, content=_read(f"{name}.html").rstrip("\n"))
+    return EmailTemplate(subject=subject, html=html, text=_read(f"{name}.txt"))
+
+
+TEMPLATES: Dict[str, EmailTemplate] = {
+    "devis_confirmation": _load(
+        "devis_confirmation",
+        subject="SportivAI — Confirmation de votre demande $reference",
+        header_subtitle="Votre partenaire de gestion sportive",
+    ),
+    "invitation": _load(
+        "invitation",
+        subject="Licencia — Invitation à rejoindre la plateforme",
+        header_subtitle="Invitation à rejoindre la plateforme",
+    ),
+}
+
+
+def render(name: str, **context) -> RenderedEmail:
+    return TEMPLATES[name].render(**context)
+
+
+def render_batch(name: str, contexts: Iterable[dict]) -> List[RenderedEmail]:
+    return TEMPLATES[name].render_batch(contexts)
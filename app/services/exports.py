@@ -0,0 +1,202 @@
+"""Exports CSV / XLSX en flux des listes volumineuses (licences, adhérents).
+
+Les lignes sont lues par un curseur côté serveur (yield_per) et écrites au fur et à
+mesure : la mémoire reste constante quelle que soit la taille de l'export et l'en-tête
+part avant la fin de la requête. Le CSV est compressé gzip à la volée si le client
+l'accepte ; le XLSX (déjà une archive zip) est écrit en flux, sans dépendance externe.
+"""
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Sequence
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "oui" if value else "non"
+    return str(value)
+
+
+async def _batches(query) -> AsyncIterator[Sequence]:
+    """Lots de EXPORT_YIELD_PER lignes lus par un curseur côté serveur.
+
+    Session propre au flux : celle de la requête est fermée avant l'envoi du corps."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+        async for rows in result.partitions():
+            yield rows
+
+
+# ------------------ CSV ------------------
+# Début de cellule interprété comme une formule par Excel / LibreOffice
+_FORMULE = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_text(value) -> str:
+    """Texte saisi commençant comme une formule : préfixé par une apostrophe (injection CSV)."""
+    texte = _text(value)
+    if isinstance(value, str) and texte.startswith(_FORMULE):
+        return "'" + texte
+    return texte
+
+
+async def csv_chunks(query, columns: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")  # séparateur attendu par Excel en français
+    writer.writerow(columns)
+    yield ("\ufeff" + buffer.getvalue()).encode()  # BOM : accents lus correctement par Excel
+    async for rows in _batches(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_text(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compression gzip à la volée ; chaque lot est vidé (Z_SYNC_FLUSH) pour partir tout de suite."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ------------------ XLSX ------------------
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nom}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+# Caractères de contrôle interdits en XML 1.0
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _Sink:
+    """Sortie non « seekable » de zipfile : les octets écrits sont récupérés lot par lot."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _xlsx_row(number: int, values: Iterable) -> str:
+    cells = []
+    for index, value in enumerate(values):
+        ref = f"{_column_letter(index)}{number}"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        elif value is not None:
+            texte = escape(_INVALID_XML.sub("", _text(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{texte}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+async def xlsx_chunks(query, columns: List[str], sheet_name: str = "Export") -> AsyncIterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _RELS)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK.format(nom=escape(sheet_name[:31], {'"': "&quot;"})))
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row(1, columns)).encode())
+            yield sink.drain()
+            number = 1
+            async for rows in _batches(query):
+                sheet.write("".join(_xlsx_row(number + i, row) for i, row in enumerate(rows, start=1)).encode())
+                number += len(rows)
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(_SHEET_TAIL.encode())
+    yield sink.drain()
+
+
+# ------------------ Réponse ------------------
+def export_response(request: Request, query, format: str, filename: str) -> StreamingResponse:
+    """Réponse en flux pour `query` (select de colonnes nommées : les libellés servent d'en-tête)."""
+    columns = [column.name for column in query.selected_columns]
+    headers = {
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}.{format}",
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",  # pas de mise en tampon par un proxy nginx : le flux part tout de suite
+    }
+    if format == "xlsx":
+        body = xlsx_chunks(query, columns, filename)
+    else:
+        body = csv_chunks(query, columns)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            body = gzip_chunks(body)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type=FORMATS[format], headers=headers)
@@ -0,0 +1,100 @@
+"""Envoi temps réel des notifications après le commit.
+
+Les écritures de notifications déposent leurs messages WebSocket dans `session.info` :
+ils ne partent qu'une fois la transaction validée (hook after_commit) et sont oubliés
+sur rollback, un client ne reçoit donc jamais une notification absente de la base.
+Au commit, les messages sont remis à une tâche de fond qui les publie par lots sur le
+backplane : la requête n'attend ni le NOTIFY ni les envois aux sockets.
+"""
+import asyncio
+from typing import List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.websocket_backplane import backplane
+
+SESSION_KEY = "notifications_sortantes"
+
+
+def queue_after_commit(db, deliveries: List[dict]) -> None:
+    """Messages [{"topic": ..., "message": {...}}] à publier quand la transaction de `db` sera validée."""
+    if deliveries:
+        session = getattr(db, "sync_session", db)  # AsyncSession ou Session
+        session.info.setdefault(SESSION_KEY, []).extend(deliveries)
+
+
+class NotificationOutbox:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self._worker is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Publie ce qui est encore en file puis arrête la tâche."""
+        if self._worker is None:
+            return
+        self._queue.put_nowait(None)
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._loop = self._queue = self._worker = None
+
+    def submit(self, deliveries: List[dict]) -> None:
+        """Dépose des messages sans attendre ; appelable depuis la boucle ou un thread (routes sync)."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._queue.put_nowait, deliveries)
+            return
+        # Outbox non démarrée (scripts, tests sans lifespan) : publication directe si une boucle tourne
+        try:
+            task = asyncio.get_running_loop().create_task(self._publish(deliveries))
+        except RuntimeError:
+            print(f"[NOTIF] {len(deliveries)} message(s) temps réel non envoyé(s) : aucune boucle active")
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _publish(self, deliveries: List[dict]) -> None:
+        try:
+            await backplane.publish_many(deliveries)
+        except Exception as e:
+            # Les notifications sont en base : le client les relira à la prochaine consultation
+            print(f"[NOTIF] Envoi temps réel impossible : {e}")
+
+    async def _run(self) -> None:
+        running = True
+        while running:
+            batch = await self._queue.get()
+            if batch is None:
+                return
+            batch = list(batch)
+            # Ce qui est arrivé pendant la publication précédente part dans le même lot
+            while not self._queue.empty() and len(batch) < settings.NOTIFICATIONS_PUSH_BATCH_SIZE:
+                suivant = self._queue.get_nowait()
+                if suivant is None:
+                    running = False
+                    break
+                batch.extend(suivant)
+            await self._publish(batch)
+
+
+notification_outbox = NotificationOutbox()
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_after_commit(session) -> None:
+    deliveries = session.info.pop(SESSION_KEY, None)
+    if deliveries:
+        notification_outbox.submit(deliveries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop(SESSION_KEY, None)
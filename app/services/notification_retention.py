@@ -0,0 +1,292 @@
+"""Rétention des notifications : partitions mensuelles, archivage compressé, purge.
+
+fsbb.notifications est partitionnée par mois sur created_at (notifications_pAAAA_MM,
+plus une partition par défaut qui ne sert que de filet de sécurité). Le job :
+
+1. crée à l'avance les partitions des NOTIFICATIONS_PARTITIONS_AHEAD prochains mois ;
+2. archive les notifications personnelles lues de plus de
+   NOTIFICATIONS_ARCHIVE_READ_AFTER_DAYS jours ;
+3. archive puis détache et supprime les partitions de plus de
+   NOTIFICATIONS_RETENTION_MONTHS mois.
+
+Les lignes archivées partent dans fsbb.notification_archives (JSON compressé gzip) et
+les compteurs de non lues sont corrigés d'autant. Un verrou consultatif garantit une
+seule exécution à la fois quand plusieurs instances tournent.
+
+Exécution manuelle :
+    python -m app.services.notification_retention --run
+"""
+import argparse
+import gzip
+import json
+import re
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import engine
+
+PARTITION_PREFIX = "notifications_p"
+DEFAULT_PARTITION = "notifications_defaut"
+ADVISORY_LOCK_ID = 0x6E6F7469  # "noti"
+COLONNES = ("id", "user_id", "portee", "portee_id", "titre", "message", "type", "lien", "read", "created_at")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """Premier jour du mois de `day`, décalé de `offset` mois."""
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+
+def hot_window_start(now: Optional[datetime] = None) -> datetime:
+    """Début de la fenêtre chaude lue en premier par la boîte de réception."""
+    now = now or datetime.utcnow()
+    return datetime.combine(month_start(now.date(), -(settings.NOTIFICATIONS_HOT_MONTHS - 1)), datetime.min.time())
+
+
+# ------------------ Partitions ------------------
+def try_lock(conn) -> bool:
+    """Verrou consultatif du job, libéré à la fin de la transaction ; False s'il est déjà pris."""
+    return bool(conn.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": ADVISORY_LOCK_ID}).scalar())
+
+
+def is_partitioned(conn) -> bool:
+    """False pour une base créée avant le partitionnement (migration 5e9a3d7b4c21 non appliquée)."""
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'fsbb.notifications'::regclass)"
+    )).scalar())
+
+
+def list_partitions(conn) -> List[date]:
+    names = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'fsbb.notifications'::regclass
+    """)).scalars()
+    months = []
+    for name in names:
+        match = re.fullmatch(rf"{PARTITION_PREFIX}(\d{{4}})_(\d{{2}})", name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def ensure_default_partition(conn) -> None:
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS fsbb.{DEFAULT_PARTITION} PARTITION OF fsbb.notifications DEFAULT"))
+
+
+def create_partition(conn, month: date) -> None:
+    """Crée la partition d'un mois ; les lignes tombées entre-temps dans la partition par
+    défaut y sont déplacées avant l'attachement (sinon ATTACH échoue)."""
+    name, debut, fin = partition_name(month), month, month_start(month, 1)
+    conn.execute(text(f"CREATE TABLE fsbb.{name} (LIKE fsbb.notifications INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(f"""
+            WITH deplacees AS (
+                DELETE FROM fsbb.{DEFAULT_PARTITION} WHERE created_at >= :debut AND created_at < :fin RETURNING *
+            )
+            INSERT INTO fsbb.{name} SELECT * FROM deplacees
+        """),
+        {"debut": debut, "fin": fin},
+    )
+    conn.execute(text(
+        f"ALTER TABLE fsbb.notifications ATTACH PARTITION fsbb.{name} "
+        f"FOR VALUES FROM ('{debut.isoformat()}') TO ('{fin.isoformat()}')"
+    ))
+
+
+def ensure_partitions(conn, today: Optional[date] = None, months_ahead: Optional[int] = None) -> List[date]:
+    """Partition par défaut + partitions du mois courant et des mois suivants ; renvoie celles créées."""
+    today = today or datetime.utcnow().date()
+    months_ahead = settings.NOTIFICATIONS_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    ensure_default_partition(conn)
+    existing = set(list_partitions(conn))
+    created = []
+    for offset in range(0, months_ahead + 1):
+        month = month_start(today, offset)
+        if month not in existing:
+            create_partition(conn, month)
+            created.append(month)
+    return created
+
+
+# ------------------ Archivage ------------------
+def pack(rows: List[dict]) -> bytes:
+    lines = "\n".join(json.dumps(row, default=str, ensure_ascii=False) for row in rows)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+def unpack(donnees: bytes) -> Iterator[dict]:
+    """Relit un lot archivé (une notification par ligne JSON)."""
+    for line in gzip.decompress(donnees).decode("utf-8").splitlines():
+        yield json.loads(line)
+
+
+def _outgoing_table(conn) -> None:
+    conn.execute(text("CREATE TEMPORARY TABLE sortantes (LIKE fsbb.notifications) ON COMMIT DROP"))
+    conn.execute(text("CREATE INDEX ON sortantes (created_at, id)"))
+
+
+def _archive_outgoing(conn, motif: str) -> int:
+    """Archive les lignes de la table temporaire `sortantes` par lots de
+    NOTIFICATIONS_ARCHIVE_BATCH_SIZE, corrige les compteurs et purge les lectures associées.
+    Renvoie le nombre de notifications archivées."""
+    archived, cursor = 0, (datetime.min, 0)
+    while True:
+        rows = [dict(row) for row in conn.execute(
+            text(f"""
+                SELECT {', '.join(COLONNES)} FROM sortantes
+                WHERE (created_at, id) > (:date, :id)
+                ORDER BY created_at, id LIMIT :limite
+            """),
+            {"date": cursor[0], "id": cursor[1], "limite": settings.NOTIFICATIONS_ARCHIVE_BATCH_SIZE},
+        ).mappings()]
+        if not rows:
+            break
+        conn.execute(
+            models.NotificationArchive.__table__.insert().values(
+                motif=motif,
+                premiere_date=rows[0]["created_at"],
+                derniere_date=rows[-1]["created_at"],
+                nombre=len(rows),
+                donnees=pack(rows),
+                date_archivage=datetime.utcnow(),
+            )
+        )
+        archived += len(rows)
+        cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    if not archived:
+        return 0
+
+    # Compteurs : publiées par sujet, lues par utilisateur et par sujet
+    conn.execute(text("""
+        UPDATE fsbb.notification_compteurs c SET publiees = c.publiees - s.n
+        FROM (
+            SELECT CASE WHEN portee = 'user' THEN 'user:' || user_id ELSE portee || ':' || portee_id END AS sujet, count(*) AS n
+            FROM sortantes GROUP BY 1
+        ) s
+        WHERE c.sujet = s.sujet
+    """))
+    conn.execute(text("""
+        UPDATE fsbb.notification_compteurs_lus c SET lues = c.lues - s.n
+        FROM (
+            SELECT user_id, 'user:' || user_id AS sujet, count(*) AS n
+            FROM sortantes WHERE portee = 'user' AND read GROUP BY user_id
+            UNION ALL
+            SELECT l.user_id, s.portee || ':' || s.portee_id, count(*)
+            FROM fsbb.notification_lectures l JOIN sortantes s ON s.id = l.notification_id
+            WHERE s.portee <> 'user'
+            GROUP BY l.user_id, s.portee, s.portee_id
+        ) s
+        WHERE c.user_id = s.user_id AND c.sujet = s.sujet
+    """))
+    conn.execute(text("""
+        DELETE FROM fsbb.notification_lectures l USING sortantes s
+        WHERE l.notification_id = s.id AND s.portee <> 'user'
+    """))
+    return archived
+
+
+def archive_read(conn, older_than: datetime) -> int:
+    """Archive les notifications personnelles lues antérieures à `older_than`."""
+    _outgoing_table(conn)
+    conn.execute(text("""
+        WITH supprimees AS (
+            DELETE FROM fsbb.notifications
+            WHERE portee = 'user' AND read AND created_at < :limite
+            RETURNING *
+        )
+        INSERT INTO sortantes SELECT * FROM supprimees
+    """), {"limite": older_than})
+    archived = _archive_outgoing(conn, "lues")
+    conn.execute(text("DROP TABLE sortantes"))
+    return archived
+
+
+def drop_expired_partitions(conn, before: date) -> int:
+    """Archive puis détache et supprime les partitions des mois antérieurs à `before`."""
+    archived = 0
+    for month in list_partitions(conn):
+        if month >= before:
+            continue
+        name = partition_name(month)
+        _outgoing_table(conn)
+        conn.execute(text(f"INSERT INTO sortantes SELECT * FROM fsbb.{name}"))
+        archived += _archive_outgoing(conn, "partition")
+        conn.execute(text("DROP TABLE sortantes"))
+        conn.execute(text(f"ALTER TABLE fsbb.notifications DETACH PARTITION fsbb.{name}"))
+        conn.execute(text(f"DROP TABLE fsbb.{name}"))
+        print(f"[NOTIF] Partition {name} archivée et supprimée")
+    return archived
+
+
+def run_retention(now: Optional[datetime] = None) -> Optional[dict]:
+    """Une passe complète ; None si une autre instance est déjà en train de la faire."""
+    now = now or datetime.utcnow()
+    with engine.begin() as conn:
+        if not try_lock(conn):
+            return None
+        created = ensure_partitions(conn, now.date())
+        lues = archive_read(conn, now - timedelta(days=settings.NOTIFICATIONS_ARCHIVE_READ_AFTER_DAYS))
+        expirees = drop_expired_partitions(conn, month_start(now.date(), -settings.NOTIFICATIONS_RETENTION_MONTHS))
+    return {"partitions_creees": len(created), "lues_archivees": lues, "partitions_archivees": expirees}
+
+
+# ------------------ Job planifié ------------------
+class RetentionJob:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                result = run_retention()
+                if result:
+                    print(f"[NOTIF] Rétention : {result}")
+            except Exception as e:
+                print(f"[NOTIF] Erreur du job de rétention: {e}")
+            self._stop.wait(settings.NOTIFICATIONS_RETENTION_INTERVAL_HOURS * 3600)
+
+
+retention_job = RetentionJob()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rétention des notifications")
+    parser.add_argument("--run", action="store_true", help="crée les partitions à venir, archive et purge")
+    parser.add_argument("--ensure-partitions", action="store_true", help="crée seulement les partitions manquantes")
+    args = parser.parse_args(argv)
+
+    if args.ensure_partitions:
+        with engine.begin() as conn:
+            print(f"{len(ensure_partitions(conn))} partition(s) créée(s).")
+    if args.run:
+        result = run_retention()
+        print(result if result else "Rétention déjà en cours sur une autre instance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,284 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, exists, func, insert, literal, or_, select, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 from app.db import models
-from app.core.websocket_manager import manager
-
-async def notify_user(db, user_id, titre, message, type, lien=None):
-    notif = models.Notification(
-        user_id=user_id,
-        titre=titre,
-        message=message,
-        type=type,
-        lien=lien
+from app.services.notification_outbox import queue_after_commit
+from app.services.notification_retention import hot_window_start
+
+
+def topic_key(portee: str, portee_id: int) -> str:
+    """Sujet WebSocket d'une portée de notification ("club:12", "user:5"...)."""
+    return f"{portee}:{portee_id}"
+
+
+def user_portees(principal: dict) -> List[Tuple[str, int]]:
+    """Portées d'un utilisateur : lui-même, son club, sa ligue, sa fédération."""
+    portees = [("user", principal["id"])]
+    if principal.get("club_id"):
+        portees.append(("club", principal["club_id"]))
+    if principal.get("ligue"):
+        portees.append(("ligue", principal["ligue"]["id"]))
+    if principal.get("federation"):
+        portees.append(("federation", principal["federation"]["id"]))
+    return portees
+
+
+def user_topics(principal: dict) -> List[str]:
+    """Sujets WebSocket auxquels un utilisateur est abonné."""
+    return [topic_key(portee, portee_id) for portee, portee_id in user_portees(principal)]
+
+
+def _portee_filter(portee: str, portee_id: int):
+    N = models.Notification
+    if portee == "user":
+        return N.user_id == portee_id  # seules les notifications personnelles ont un user_id
+    return and_(N.portee == portee, N.portee_id == portee_id)
+
+
+def inbox_filter(principal: dict):
+    """Notifications visibles par l'utilisateur : les siennes et celles de ses portées."""
+    return or_(*(_portee_filter(portee, portee_id) for portee, portee_id in user_portees(principal)))
+
+
+def _lecture_exists(user_id: int):
+    N = models.Notification
+    return exists().where(
+        models.NotificationLecture.notification_id == N.id,
+        models.NotificationLecture.user_id == user_id,
     )
-    db.add(notif)
-    db.commit()
-    db.refresh(notif)
 
-    # 🔥 PUSH temps réel
-    await manager.send_personal_message(
-        user_id,
-        {
-            "id": notif.id,
-            "titre": notif.titre,
-            "message": notif.message,
-            "type": notif.type,
-            "lien": notif.lien,
+
+def read_expression(user_id: int):
+    """État de lu pour user_id : colonne `read` pour une notification personnelle, notification_lectures sinon."""
+    N = models.Notification
+    return case((N.portee == "user", N.read), else_=_lecture_exists(user_id))
+
+
+def inbox_select(
+    principal: dict,
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    non_lues: bool = False,
+    depuis: Optional[datetime] = None,
+    avant: Optional[datetime] = None,
+):
+    """Page de la boîte de réception, du plus récent au plus ancien.
+
+    Une branche par portée, chacune servie par son index (ix_notifications_user_read_created
+    pour les notifications personnelles, ix_notifications_portee pour les autres) et bornée
+    à `limit` lignes, puis fusion : le coût ne dépend pas de la taille de la table.
+    Les bornes `depuis` / `avant` (et la date du curseur) limitent les partitions lues.
+    """
+    N = models.Notification
+    branches = []
+    for portee, portee_id in user_portees(principal):
+        branche = select(
+            N.id, N.titre, N.message, N.type, N.lien, N.portee, N.created_at,
+            read_expression(principal["id"]).label("read"),
+        ).filter(_portee_filter(portee, portee_id))
+        if non_lues:
+            branche = branche.filter(N.read == False if portee == "user" else ~_lecture_exists(principal["id"]))
+        if depuis:
+            branche = branche.filter(N.created_at >= depuis)
+        if avant:
+            branche = branche.filter(N.created_at < avant)
+        if cursor:
+            branche = branche.filter(N.created_at <= cursor[0], tuple_(N.created_at, N.id) < tuple_(*cursor))
+        branches.append(branche.order_by(N.created_at.desc(), N.id.desc()).limit(limit))
+    page = union_all(*branches).subquery()
+    return select(page).order_by(page.c.created_at.desc(), page.c.id.desc()).limit(limit)
+
+
+async def inbox_page(db, principal: dict, limit: int, cursor: Optional[Tuple[datetime, int]] = None, non_lues: bool = False) -> list:
+    """Jusqu'à `limit` notifications : les partitions chaudes d'abord, les plus anciennes
+    seulement si la page n'est pas remplie ou si le curseur y est déjà."""
+    chaud = hot_window_start()
+    if cursor and cursor[0] < chaud:
+        return (await db.execute(inbox_select(principal, limit, cursor, non_lues))).mappings().all()
+    rows = (await db.execute(inbox_select(principal, limit, cursor, non_lues, depuis=chaud))).mappings().all()
+    if len(rows) < limit:
+        rows += (await db.execute(inbox_select(principal, limit - len(rows), None, non_lues, avant=chaud))).mappings().all()
+    return rows
+
+
+# ------------------ Compteurs de non lues ------------------
+# Non lues d'un utilisateur = somme, sur ses portées, de (publiées - lues par lui) :
+# deux petites tables mises à jour à l'écriture, lues en une requête sur quelques lignes.
+def count_published_stmt(sujets: Dict[str, int]):
+    C = models.NotificationCompteur
+    stmt = pg_insert(C).values([{"sujet": sujet, "publiees": n} for sujet, n in sujets.items()])
+    return stmt.on_conflict_do_update(index_elements=[C.sujet], set_={"publiees": C.publiees + stmt.excluded.publiees})
+
+
+def count_read_stmt(user_id: int, sujets: Dict[str, int]):
+    L = models.NotificationCompteurLu
+    stmt = pg_insert(L).values([{"user_id": user_id, "sujet": sujet, "lues": n} for sujet, n in sujets.items()])
+    return stmt.on_conflict_do_update(index_elements=[L.user_id, L.sujet], set_={"lues": L.lues + stmt.excluded.lues})
+
+
+async def unread_count(db, principal: dict) -> int:
+    C, L = models.NotificationCompteur, models.NotificationCompteurLu
+    count = await db.scalar(
+        select(func.coalesce(func.sum(C.publiees - func.coalesce(L.lues, 0)), 0))
+        .select_from(C)
+        .outerjoin(L, and_(L.sujet == C.sujet, L.user_id == principal["id"]))
+        .filter(C.sujet.in_(user_topics(principal)))
+    )
+    return max(int(count), 0)
+
+
+def unread_count_message(count: int) -> dict:
+    return {"type": "unread_count", "count": count}
+
+
+def push_unread_count(db, user_id: int, count: int) -> None:
+    """Nouveau total de non lues, poussé à toutes les connexions de l'utilisateur après le commit."""
+    queue_after_commit(db, [{"topic": topic_key("user", user_id), "message": unread_count_message(count)}])
+
+
+async def mark_read(db, principal: dict, notification: models.Notification) -> bool:
+    """Marque une notification comme lue pour l'utilisateur ; False si elle l'était déjà."""
+    N = models.Notification
+    if notification.portee == "user":
+        sujet = topic_key("user", principal["id"])
+        result = await db.execute(
+            update(N)
+            .where(N.id == notification.id, N.read == False)
+            .values(read=True)
+            .returning(N.id)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        sujet = topic_key(notification.portee, notification.portee_id)
+        result = await db.execute(
+            pg_insert(models.NotificationLecture)
+            .values(notification_id=notification.id, user_id=principal["id"], date_lecture=datetime.utcnow())
+            .on_conflict_do_nothing()
+            .returning(models.NotificationLecture.notification_id)
+        )
+    if result.first() is None:
+        return False
+    await db.execute(count_read_stmt(principal["id"], {sujet: 1}))
+    return True
+
+
+async def mark_all_read(db, principal: dict) -> int:
+    """Marque toute la boîte comme lue pour l'utilisateur ; renvoie le nombre de notifications concernées."""
+    N = models.Notification
+    user_id = principal["id"]
+    lues: Counter = Counter()
+
+    result = await db.execute(
+        update(N)
+        .where(N.user_id == user_id, N.read == False)
+        .values(read=True)
+        .returning(N.id)
+        .execution_options(synchronize_session=False)
+    )
+    lues[topic_key("user", user_id)] += len(result.all())
+
+    # Portées club / ligue / fédération : une ligne de lecture par notification, comptée par sujet
+    nouvelles = (
+        pg_insert(models.NotificationLecture)
+        .from_select(
+            ["notification_id", "user_id", "date_lecture"],
+            select(N.id, literal(user_id), literal(datetime.utcnow()))
+            .filter(inbox_filter(principal), N.portee != "user", ~_lecture_exists(user_id)),
+        )
+        .on_conflict_do_nothing()
+        .returning(models.NotificationLecture.notification_id)
+        .cte("nouvelles")
+    )
+    result = await db.execute(
+        select(N.portee, N.portee_id, func.count())
+        .join(nouvelles, nouvelles.c.notification_id == N.id)
+        .group_by(N.portee, N.portee_id)
+    )
+    for portee, portee_id, n in result:
+        lues[topic_key(portee, portee_id)] += n
+
+    lues = {sujet: n for sujet, n in lues.items() if n}
+    if lues:
+        await db.execute(count_read_stmt(user_id, lues))
+    return sum(lues.values())
+
+
+# ------------------ Envoi ------------------
+def notification_payload(id: int, titre: str, message: str, type: str, lien: Optional[str], created_at: datetime, portee: str = "user") -> dict:
+    return {
+        "id": id,
+        "titre": titre,
+        "message": message,
+        "type": type,
+        "lien": lien,
+        "read": False,
+        "portee": portee,
+        "created_at": created_at.isoformat(),
+    }
+
+
+async def add_notifications(db, notifications: List[dict]) -> List[dict]:
+    """Insère un lot de notifications en un seul INSERT ... RETURNING, dans la transaction de
+    l'appelant, et met à jour les compteurs de non lues en une requête.
+
+    Chaque élément porte titre, message, type, lien éventuel et soit user_id (notification
+    personnelle), soit portee + portee_id. Les messages temps réel ({"topic", "message"},
+    aussi renvoyés) ne partent qu'après le commit de l'appelant, sans le retarder.
+    """
+    if not notifications:
+        return []
+    N = models.Notification
+    now = datetime.utcnow()
+    rows = []
+    for n in notifications:
+        portee = n.get("portee", "user")
+        rows.append({
+            "user_id": n["user_id"] if portee == "user" else None,
+            "portee": portee,
+            "portee_id": n.get("portee_id") if portee != "user" else None,
+            "titre": n["titre"],
+            "message": n["message"],
+            "type": n["type"],
+            "lien": n.get("lien"),
             "read": False,
-            "created_at": notif.created_at.isoformat()
-        }
+            "created_at": now,
+        })
+    # Les colonnes utiles sont relues avec l'id : l'ordre du RETURNING n'a pas d'importance
+    result = await db.execute(
+        insert(N).values(rows).returning(N.id, N.user_id, N.portee, N.portee_id, N.titre, N.message, N.type, N.lien)
     )
+    deliveries = [
+        {
+            "topic": topic_key(row.portee, row.user_id if row.portee == "user" else row.portee_id),
+            "message": notification_payload(row.id, row.titre, row.message, row.type, row.lien, now, row.portee),
+        }
+        for row in result
+    ]
+    await db.execute(count_published_stmt(Counter(d["topic"] for d in deliveries)))
+    queue_after_commit(db, deliveries)
+    return deliveries
+
+
+async def notify_users(db, user_ids: List[int], titre: str, message: str, type: str, lien: Optional[str] = None) -> List[dict]:
+    """Même notification personnelle pour plusieurs utilisateurs, dans la transaction de l'appelant."""
+    return await add_notifications(db, [
+        {"user_id": user_id, "titre": titre, "message": message, "type": type, "lien": lien}
+        for user_id in dict.fromkeys(user_ids)
+    ])
+
+
+async def notify_user(db, user_id: int, titre: str, message: str, type: str, lien: Optional[str] = None) -> dict:
+    """Notification personnelle dans la transaction de l'appelant ; poussée après son commit."""
+    return (await notify_users(db, [user_id], titre, message, type, lien))[0]
+
+
+async def add_topic_notification(db, portee: str, portee_id: int, titre: str, message: str, type: str, lien: Optional[str] = None) -> dict:
+    """Une seule ligne pour tous les membres d'un club / d'une ligue / d'une fédération, dans la
+    transaction de l'appelant ; poussée après son commit."""
+    return (await add_notifications(db, [
+        {"portee": portee, "portee_id": portee_id, "titre": titre, "message": message, "type": type, "lien": lien}
+    ]))[0]
@@ -0,0 +1,100 @@
+"""Catalogue des offres en mémoire pour le endpoint public /offres.
+
+Le catalogue est chargé en une requête puis gardé sous forme de JSON déjà sérialisé,
+avec un ETag fort par réponse : une requête servie depuis le cache ne touche ni la
+base ni Pydantic. Toute écriture ORM sur Offre invalide le cache du processus au commit ;
+OFFRES_CACHE_TTL_SECONDS borne la durée de vie pour les modifications faites hors de
+ce processus (autre instance, SQL direct).
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.http_cache import strong_etag
+from app.db import models
+from app.db.database import SessionLocal
+from app.schemas.offre_schema import OffreResponse
+
+_offres_adapter = TypeAdapter(List[OffreResponse])
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+
+def _cached(body: bytes) -> CachedBody:
+    return CachedBody(body=body, etag=strong_etag(hashlib.sha256(body).hexdigest()[:32]))
+
+
+class OffresCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (catalogue, offres par id) : remplacé d'un bloc, jamais modifié sur place
+        self._snapshot: Optional[Tuple[CachedBody, Dict[int, CachedBody]]] = None
+        self._expires_at = 0.0
+
+    def _load(self) -> Tuple[CachedBody, Dict[int, CachedBody]]:
+        with SessionLocal() as db:
+            offres = db.query(models.Offre).order_by(models.Offre.ordre).all()
+            schemas = _offres_adapter.validate_python(offres, from_attributes=True)
+
+        catalogue = _cached(_offres_adapter.dump_json([o for o in schemas if o.actif]))
+        return catalogue, {o.id: _cached(o.model_dump_json().encode()) for o in schemas}
+
+    def _ensure_loaded(self) -> Tuple[CachedBody, Dict[int, CachedBody]]:
+        """Instantané courant ; une invalidation concurrente ne peut pas le vider en cours de lecture."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._expires_at:
+            return snapshot
+        with self._lock:
+            # Un seul chargement même si plusieurs requêtes arrivent sur un cache vide
+            if self._snapshot is None or time.monotonic() >= self._expires_at:
+                self._snapshot = self._load()
+                self._expires_at = time.monotonic() + settings.OFFRES_CACHE_TTL_SECONDS
+            return self._snapshot
+
+    def catalogue(self) -> CachedBody:
+        catalogue, _ = self._ensure_loaded()
+        return catalogue
+
+    def offre(self, offre_id: int) -> Optional[CachedBody]:
+        _, offres = self._ensure_loaded()
+        return offres.get(offre_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+offres_cache = OffresCache()
+
+
+# Invalidation au commit (et non au flush) : une requête concurrente ne peut pas
+# recharger l'ancien catalogue entre l'écriture et sa validation
+@event.listens_for(models.Offre, "after_insert")
+@event.listens_for(models.Offre, "after_update")
+@event.listens_for(models.Offre, "after_delete")
+def _mark_offres_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["offres_modifiees"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop("offres_modifiees", False):
+        offres_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop("offres_modifiees", None)
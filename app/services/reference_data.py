@@ -0,0 +1,155 @@
+"""Référentiel en mémoire : types de fichier, types d'info club, catégories, saisons.
+
+Ces tables ne changent presque jamais mais sont lues à chaque opération sur une
+licence. Elles sont chargées en une fois (quelques requêtes) dans un instantané
+immuable, indexé par id, par nom et par fédération ; les recherches deviennent de
+simples accès dictionnaire. Les objets sont détachés de leur session : lecture seule.
+
+L'instantané est rechargé à l'expiration de REFERENCE_DATA_TTL_SECONDS ou dès que sa
+version est incrémentée : écriture ORM validée sur l'une de ces tables, ou appel
+explicite à `reference_data.invalidate()`.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+
+WATCHED_MODELS = (
+    models.TypeFichier,
+    models.ClubInfoType,
+    models.Categorie,
+    models.FederationCategorie,
+    models.Saison,
+    models.Federation,
+)
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    version: int
+    federation_ids: FrozenSet[int]
+    types_fichier_by_id: Dict[int, models.TypeFichier]
+    types_fichier_by_nom: Dict[str, models.TypeFichier]
+    club_info_types: List[models.ClubInfoType]
+    club_info_types_by_id: Dict[int, models.ClubInfoType]
+    categories_by_id: Dict[int, models.Categorie]
+    categories_by_nom: Dict[str, models.Categorie]
+    categories_by_federation: Dict[int, List[models.Categorie]]
+    saison_active_by_federation: Dict[int, models.Saison]
+
+    def saison_active(self, federation_id: int) -> Optional[models.Saison]:
+        return self.saison_active_by_federation.get(federation_id)
+
+    def type_fichier(self, nom: str) -> Optional[models.TypeFichier]:
+        return self.types_fichier_by_nom.get(nom)
+
+    def categorie(self, categorie_id: int) -> Optional[models.Categorie]:
+        return self.categories_by_id.get(categorie_id)
+
+
+def _load(version: int) -> ReferenceData:
+    with SessionLocal() as db:
+        federation_ids = frozenset(db.execute(select(models.Federation.id)).scalars())
+        types_fichier = db.execute(select(models.TypeFichier).order_by(models.TypeFichier.id)).scalars().all()
+        club_info_types = db.execute(select(models.ClubInfoType).order_by(models.ClubInfoType.id)).scalars().all()
+        categories = db.execute(select(models.Categorie).order_by(models.Categorie.id)).scalars().all()
+        liens = db.execute(
+            select(models.FederationCategorie.federation_id, models.FederationCategorie.categorie_id)
+            .order_by(models.FederationCategorie.id)
+        ).all()
+        saisons = db.execute(
+            select(models.Saison)
+            .filter(models.Saison.active == True)
+            .order_by(models.Saison.date_debut.desc(), models.Saison.id.desc())
+        ).scalars().all()
+        db.expunge_all()
+
+    categories_by_id = {c.id: c for c in categories}
+    categories_by_federation: Dict[int, List[models.Categorie]] = {}
+    for federation_id, categorie_id in liens:
+        categories_by_federation.setdefault(federation_id, []).append(categories_by_id[categorie_id])
+
+    saison_active_by_federation: Dict[int, models.Saison] = {}
+    for saison in saisons:
+        # Plusieurs saisons actives : la plus récente l'emporte
+        saison_active_by_federation.setdefault(saison.federation_id, saison)
+
+    return ReferenceData(
+        version=version,
+        federation_ids=federation_ids,
+        types_fichier_by_id={t.id: t for t in types_fichier},
+        types_fichier_by_nom={t.nom: t for t in types_fichier},
+        club_info_types=list(club_info_types),
+        club_info_types_by_id={t.id: t for t in club_info_types},
+        categories_by_id=categories_by_id,
+        categories_by_nom={c.nom: c for c in categories},
+        categories_by_federation=categories_by_federation,
+        saison_active_by_federation=saison_active_by_federation,
+    )
+
+
+class ReferenceDataRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Optional[ReferenceData] = None
+        self._version = 0
+        self._expires_at = 0.0
+
+    def _is_fresh(self) -> bool:
+        data = self._data
+        return data is not None and data.version == self._version and time.monotonic() < self._expires_at
+
+    def get(self) -> ReferenceData:
+        """Instantané courant (chargement synchrone si nécessaire : routes sync, scripts)."""
+        if not self._is_fresh():
+            with self._lock:
+                # Un seul chargement même si plusieurs requêtes arrivent sur un référentiel périmé
+                if not self._is_fresh():
+                    version = self._version
+                    self._data = _load(version)
+                    self._expires_at = time.monotonic() + settings.REFERENCE_DATA_TTL_SECONDS
+        return self._data
+
+    async def aget(self) -> ReferenceData:
+        """Variante pour les routes async : le rechargement éventuel ne bloque pas la boucle."""
+        if self._is_fresh():
+            return self._data
+        return await run_in_threadpool(self.get)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+
+
+reference_data = ReferenceDataRegistry()
+
+
+# Même principe que le cache des offres : nouvelle version au commit, pas au flush
+def _mark_reference_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["referentiel_modifie"] = True
+
+
+for _model in WATCHED_MODELS:
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _mark_reference_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop("referentiel_modifie", False):
+        reference_data.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session) -> None:
+    session.info.pop("referentiel_modifie", None)
@@ -0,0 +1,8 @@
+"""Benchmarks reproductibles, lancés à la main (pytest ne les collecte pas).
+
+    python -m tests.bench.<module> [--help]
+
+Chacun démarre un PostgreSQL jetable (voir tests.postgres), crée son jeu de données et
+affiche ses mesures ; les chiffres dépendent de la machine, seules les comparaisons
+entre variantes d'un même lancement ont un sens.
+"""
@@ -0,0 +1,182 @@
+"""Charge concurrente : latences p50 / p95 / p99 sous N clients simultanés (200 par défaut).
+
+L'API tourne dans un serveur uvicorn séparé (un processus, une boucle asyncio, comme un
+worker de production) et chaque client enchaîne ses requêtes. Trois routes de banc, ajoutées à l'application
+pour l'occasion, exécutent la même page de licences :
+- « async + Session » : ancien schéma de update_statut / validate_licence, une route
+  async qui fait des appels SQLAlchemy bloquants sur la boucle ;
+- « def + Session » : route synchrone, exécutée dans le threadpool de Starlette ;
+- « async + AsyncSession » : moteur asyncpg, ce que font désormais les routes licences.
+La route réelle GET /licences/demandes_licence/ est mesurée en dernier. --latence-ms
+ajoute un pg_sleep à chaque requête de banc pour simuler une base distante.
+"""
+from tests.postgres import reset_schema, start_postgres
+
+start_postgres()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import os  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from datetime import date  # noqa: E402
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.database import SessionLocal, engine, get_async_db, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from tests.bench.mesures import resume_ms  # noqa: E402
+
+LATENCE_SECONDES = float(os.environ.get("BENCH_LATENCE_MS", "20")) / 1000
+L = models.Licence
+
+
+def _page(club_id: int):
+    return (
+        select(L.id, L.numero, L.nom, L.prenom, L.statut, L.date_creation)
+        .filter(L.club_id == club_id)
+        .order_by(L.date_creation.desc(), L.id.desc())
+        .limit(50)
+    )
+
+
+def _ligne(row) -> dict:
+    return {"id": row.id, "nom": row.nom, "prenom": row.prenom, "statut": row.statut}
+
+
+@app.get("/bench/async-session-sync/{club_id}", include_in_schema=False)
+async def bench_bloquant(club_id: int):
+    with SessionLocal() as db:
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": LATENCE_SECONDES})
+        return [_ligne(r) for r in db.execute(_page(club_id))]
+
+
+@app.get("/bench/threadpool/{club_id}", include_in_schema=False)
+def bench_threadpool(club_id: int, db: Session = Depends(get_db)):
+    db.execute(text("SELECT pg_sleep(:s)"), {"s": LATENCE_SECONDES})
+    return [_ligne(r) for r in db.execute(_page(club_id))]
+
+
+@app.get("/bench/async/{club_id}", include_in_schema=False)
+async def bench_async(club_id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT pg_sleep(:s)"), {"s": LATENCE_SECONDES})
+    return [_ligne(r) for r in await db.execute(_page(club_id))]
+
+
+def seed(licences: int) -> tuple:
+    with SessionLocal() as db:
+        federation = models.Federation(name="FSBB", code="FSBB")
+        db.add(federation)
+        db.flush()
+        saison = models.Saison(code="2025-2026", federation_id=federation.id, date_debut=date(2025, 9, 1), date_fin=date(2026, 8, 31), active=True)
+        club = models.Club(nom="Club", email="club@bench.sn", federation_id=federation.id)
+        categorie = models.Categorie(nom="Senior")
+        db.add_all([saison, club, categorie])
+        db.flush()
+        user = models.User(nom="Admin", prenom="Club", email="admin@bench.sn", hashed_password="x", role="admin_club", club_id=club.id, federation_id=federation.id)
+        db.add(user)
+        db.commit()
+        ids = {"club": club.id, "saison": saison.id, "categorie": categorie.id}
+        token = security.create_access_token({"id": user.id, "email": user.email})
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO fsbb.adherents (nom, prenom, date_naissance, club_id)"
+            " SELECT 'Nom' || g, 'Prenom' || g, date '2000-01-01', :club FROM generate_series(1, :n) g"
+        ), {"club": ids["club"], "n": licences})
+        conn.execute(text(
+            "INSERT INTO fsbb.licences (statut, type_demande, nom, prenom, date_naissance, categorie_id,"
+            "  club_id, saison_id, adherent_id, date_creation)"
+            " SELECT 'soumise', 'Nouvelle', a.nom, a.prenom, a.date_naissance, :categorie, a.club_id, :saison, a.id,"
+            "        timestamp '2025-09-01' + a.id * interval '1 minute'"
+            " FROM fsbb.adherents a"
+        ), ids)
+        conn.execute(text("ANALYZE"))
+    return ids["club"], token
+
+
+def _port_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur(latence_ms: float) -> tuple:
+    """uvicorn dans un autre processus (pas de GIL partagé avec les clients), même base."""
+    port = _port_libre()
+    env = {**os.environ, "TEST_DATABASE_URL": os.environ["DATABASE_URL"], "BENCH_LATENCE_MS": str(latence_ms)}
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{__spec__.name}:app", "--port", str(port), "--log-level", "warning", "--timeout-keep-alive", "120"],
+        env=env,
+    )
+    while True:
+        if serveur.poll() is not None:
+            raise RuntimeError("Le serveur uvicorn s'est arrêté au démarrage")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return serveur, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+
+
+async def charge(base_url: str, chemin: str, headers: dict, clients: int, requetes: int) -> tuple:
+    durees = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as http:
+
+        async def client() -> None:
+            for _ in range(requetes):
+                debut = time.perf_counter()
+                response = await http.get(chemin)
+                durees.append(time.perf_counter() - debut)
+                assert response.status_code == 200, response.text
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return durees, len(durees) / (time.perf_counter() - debut)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requetes", type=int, default=5, help="requêtes par client")
+    parser.add_argument("--licences", type=int, default=5000)
+    parser.add_argument("--latence-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    reset_schema()
+    club_id, token = seed(args.licences)
+    variantes = [
+        ("async + Session", f"/bench/async-session-sync/{club_id}"),
+        ("def + Session", f"/bench/threadpool/{club_id}"),
+        ("async + AsyncSession", f"/bench/async/{club_id}"),
+        ("route licences", "/licences/demandes_licence/?limit=50"),
+    ]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    serveur, base_url = demarrer_serveur(args.latence_ms)
+    try:
+        print(
+            f"{args.clients} clients × {args.requetes} requêtes, latence simulée {args.latence_ms} ms,"
+            f" pool {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} connexions par moteur"
+        )
+        for nom, chemin in variantes:
+            asyncio.run(charge(base_url, chemin, headers, 10, 2))  # préchauffage
+            durees, debit = asyncio.run(charge(base_url, chemin, headers, args.clients, args.requetes))
+            print(f"{nom:<22}{debit:>8.0f} req/s  {resume_ms(durees)}")
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+
+if __name__ == "__main__":
+    main()
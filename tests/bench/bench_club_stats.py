@@ -0,0 +1,142 @@
+"""GET /clubs/{club_id}/stats : latence avant / après l'agrégation conditionnelle.
+
+Jeu de données : CLUBS clubs × 2 saisons × LICENCES licences par club et par saison
+(200 × 2 × 500 par défaut, soit 200 000 licences). « avant » rejoue les requêtes de
+l'ancienne implémentation (trois count() par statut, un count distinct, un group by
+par catégorie, deux sous-requêtes distinct + intersect pour le renouvellement) ;
+« après » appelle la route actuelle. Les deux résultats sont comparés club par club.
+"""
+from tests.postgres import compter_requetes, reset_schema, start_postgres
+
+start_postgres()
+
+import argparse  # noqa: E402
+import random  # noqa: E402
+from datetime import date  # noqa: E402
+
+from sqlalchemy import distinct, func, text  # noqa: E402
+
+from app.api.v1.routes.clubs import get_club_stats  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.database import SessionLocal, engine  # noqa: E402
+from tests.bench.mesures import chrono, resume_ms  # noqa: E402
+
+ADMIN = {"role": "admin_federation", "club_id": None}
+
+
+def seed(clubs: int, licences: int) -> list:
+    """Remplit la base en SQL (generate_series) ; renvoie les id des clubs."""
+    with SessionLocal() as db:
+        federation = models.Federation(name="FSBB", code="FSBB")
+        db.add(federation)
+        db.flush()
+        db.add_all([
+            models.Saison(code="2024-2025", federation_id=federation.id, date_debut=date(2024, 9, 1), date_fin=date(2025, 8, 31), active=False),
+            models.Saison(code="2025-2026", federation_id=federation.id, date_debut=date(2025, 9, 1), date_fin=date(2026, 8, 31), active=True),
+        ])
+        db.add_all([models.Categorie(nom=nom) for nom in ("Senior", "Junior", "Cadet", "Minime")])
+        db.commit()
+        federation_id = federation.id
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO fsbb.clubs (nom, email, federation_id)"
+            " SELECT 'Club ' || g, 'club' || g || '@bench.sn', :federation FROM generate_series(1, :clubs) g"
+        ), {"federation": federation_id, "clubs": clubs})
+        conn.execute(text(
+            "INSERT INTO fsbb.adherents (nom, prenom, date_naissance, club_id)"
+            " SELECT 'Nom' || g, 'Prenom' || g, date '2000-01-01' + g % 3000, c.id"
+            " FROM fsbb.clubs c, generate_series(1, :licences) g"
+        ), {"licences": licences})
+        # Saison courante : tous les adhérents ; précédente : 4 sur 5 (les autres sont nouveaux)
+        conn.execute(text(
+            "INSERT INTO fsbb.licences (statut, type_demande, nom, prenom, date_naissance,"
+            "  categorie_id, club_id, saison_id, adherent_id, date_creation)"
+            " SELECT (ARRAY['brouillon', 'soumise', 'validee', 'validee', 'validee', 'refusee'])"
+            "          [1 + (a.id * 7 + s.id) % 6]::statut_demande,"
+            "        'Nouvelle', a.nom, a.prenom, a.date_naissance,"
+            "        (SELECT min(id) FROM fsbb.categories) + a.id % 4, a.club_id, s.id, a.id, s.date_debut"
+            " FROM fsbb.adherents a CROSS JOIN fsbb.saisons s"
+            " WHERE s.active OR a.id % 5 <> 0"
+        ))
+        conn.execute(text("ANALYZE"))
+        return list(conn.execute(text("SELECT id FROM fsbb.clubs ORDER BY id")).scalars())
+
+
+def stats_avant(db, club_id: int) -> dict:
+    """Requêtes de l'ancienne implémentation de get_club_stats, à l'identique."""
+    L = models.Licence
+    club = db.query(models.Club).filter(models.Club.id == club_id).first()
+    saison_courante = db.query(models.Saison).filter(models.Saison.active == True).first()  # noqa: E712
+    licences_saison = db.query(L).filter(L.club_id == club.id).filter(L.saison_id == saison_courante.id)
+    valides = licences_saison.filter(L.statut == "validee").count()
+    attente = licences_saison.filter(L.statut == "soumise").count()
+    refusees = licences_saison.filter(L.statut == "refusee").count()
+    adherents = (
+        db.query(distinct(L.adherent_id)).filter(L.club_id == club_id).filter(L.saison_id == saison_courante.id).count()
+    )
+    par_categorie = (
+        db.query(models.Categorie.nom.label("categorie"), func.count(L.id).label("total"))
+        .join(L, L.categorie_id == models.Categorie.id)
+        .filter(L.club_id == club_id, L.saison_id == saison_courante.id, L.statut == "validee")
+        .group_by(models.Categorie.nom)
+        .all()
+    )
+    saison_precedente = (
+        db.query(models.Saison).filter(models.Saison.id != saison_courante.id).order_by(models.Saison.date_debut.desc()).first()
+    )
+    taux = "0%"
+    if saison_precedente:
+        anciens = db.query(distinct(L.adherent_id)).filter(L.club_id == club_id, L.saison_id == saison_precedente.id, L.statut == "validee")
+        nouveaux = db.query(distinct(L.adherent_id)).filter(L.club_id == club_id, L.saison_id == saison_courante.id, L.statut == "validee")
+        total_anciens = anciens.count()
+        renouveles = anciens.intersect(nouveaux).count()
+        if total_anciens > 0:
+            taux = f"{round(renouveles / total_anciens * 100)}%"
+    return {
+        "adherents": adherents,
+        "licencesValides": valides,
+        "licencesEnAttente": attente,
+        "licencesExpirees": refusees,
+        "tauxRenouvellement": taux,
+        "parCategorie": [{"categorie": c.categorie, "total": c.total} for c in par_categorie],
+    }
+
+
+def stats_apres(db, club_id: int) -> dict:
+    return get_club_stats(club_id, db=db, current_user=ADMIN)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clubs", type=int, default=200)
+    parser.add_argument("--licences", type=int, default=500, help="licences par club et par saison")
+    parser.add_argument("--appels", type=int, default=400)
+    args = parser.parse_args()
+
+    reset_schema()
+    club_ids = seed(args.clubs, args.licences)
+    tirages = random.Random(42).choices(club_ids, k=args.appels)
+
+    with SessionLocal() as db:
+        for club_id in club_ids[:20]:
+            a, b = stats_avant(db, club_id), stats_apres(db, club_id)
+            b["parCategorie"] = sorted(b["parCategorie"], key=lambda c: c["categorie"])
+            a["parCategorie"] = sorted(a["parCategorie"], key=lambda c: c["categorie"])
+            assert a == b, (club_id, a, b)
+
+    print(f"{args.clubs} clubs × 2 saisons × {args.licences} licences, {args.appels} appels")
+    for nom, stats in (("avant", stats_avant), ("après", stats_apres)):
+        with SessionLocal() as db, compter_requetes() as requetes:
+            stats(db, club_ids[0])
+        durees = []
+        with SessionLocal() as db:
+            for club_id in tirages:
+                with chrono(durees):
+                    stats(db, club_id)
+                db.rollback()
+        print(f"{nom:<6} {len(requetes):>2} requêtes  {resume_ms(durees)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""File d'envoi des emails : débit (messages/s) du worker selon le mode d'envoi.
+
+Un serveur SMTP local minimal reçoit les messages ; --cout-connexion-ms retarde son
+accueil pour représenter l'ouverture d'une session réelle (TCP + STARTTLS + login).
+Variantes : une connexion par message (ancien email_service), puis le worker avec une
+connexion réutilisée pour des lots de plusieurs tailles.
+"""
+from tests.postgres import reset_schema, start_postgres
+
+start_postgres()
+
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import io  # noqa: E402
+import socketserver  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.database import SessionLocal, engine  # noqa: E402
+from app.services.email_queue import EmailWorker, SmtpTransport, enqueue_email  # noqa: E402
+
+
+class SmtpLocal(socketserver.ThreadingTCPServer):
+    """Serveur SMTP réduit au strict nécessaire (EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, cout_connexion: float):
+        self.cout_connexion = cout_connexion
+        self.recus = 0
+        self._verrou = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _SessionSmtp)
+
+
+class _SessionSmtp(socketserver.StreamRequestHandler):
+    def _repondre(self, ligne: str) -> None:
+        self.wfile.write(ligne.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        time.sleep(self.server.cout_connexion)
+        self._repondre("220 bench ESMTP")
+        while True:
+            ligne = self.rfile.readline()
+            if not ligne:
+                return
+            commande = ligne[:4].upper()
+            if commande in (b"EHLO", b"HELO"):
+                self._repondre("250 bench")
+            elif commande == b"DATA":
+                self._repondre("354 fin par <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.server._verrou:
+                    self.server.recus += 1
+                self._repondre("250 OK")
+            elif commande == b"QUIT":
+                self._repondre("221 bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self._repondre("250 OK")
+
+
+class ConnexionParMessage(SmtpTransport):
+    """Ancien comportement : une session SMTP ouverte puis fermée pour chaque message."""
+
+    def send(self, msg) -> None:
+        try:
+            super().send(msg)
+        finally:
+            self.close()
+
+
+def remplir(messages: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE fsbb.email_outbox"))
+    with SessionLocal() as db:
+        for i in range(messages):
+            enqueue_email(db, f"contact{i}@bench.sn", f"Confirmation {i}", f"<p>Demande {i} bien reçue.</p>", f"Demande {i} bien reçue.")
+        db.commit()
+
+
+def vider(worker: EmailWorker) -> int:
+    envoyes = 0
+    while True:
+        traites = worker.process_batch()
+        if not traites:
+            return envoyes
+        envoyes += traites
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--cout-connexion-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    reset_schema()
+    serveur = SmtpLocal(args.cout_connexion_ms / 1000)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    settings.SMTP_HOST, settings.SMTP_PORT = serveur.server_address
+    settings.SMTP_STARTTLS = False
+    settings.SMTP_USER = ""
+
+    variantes = [
+        ("connexion par message", 50, ConnexionParMessage),
+        ("lots de 10", 10, SmtpTransport),
+        ("lots de 50", 50, SmtpTransport),
+        ("lots de 200", 200, SmtpTransport),
+    ]
+    print(f"{args.messages} messages, ouverture de session SMTP {args.cout_connexion_ms} ms")
+    try:
+        for nom, taille, transport in variantes:
+            remplir(args.messages)
+            settings.EMAIL_BATCH_SIZE = taille
+            worker = EmailWorker(transport())
+            recus = serveur.recus
+            debut = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # une ligne [EMAIL] par message
+                envoyes = vider(worker)
+            duree = time.perf_counter() - debut
+            worker.transport.close()
+            assert envoyes == args.messages == serveur.recus - recus
+            print(f"{nom:<24}{envoyes / duree:>8.0f} messages/s")
+    finally:
+        serveur.shutdown()
+
+
+if __name__ == "__main__":
+    main()
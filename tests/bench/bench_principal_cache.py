@@ -0,0 +1,98 @@
+"""GET /users/me : débit et taux de hit du cache des principaux (get_current_user).
+
+Les requêtes tirent leurs utilisateurs selon une loi de Zipf (quelques comptes très
+actifs, beaucoup de comptes rares) ; une requête sans SELECT sur fsbb.users est un hit.
+"""
+from tests.postgres import compter_requetes, reset_schema, start_postgres
+
+start_postgres()
+
+import argparse  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.v1.routes.users import build_principal  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def seed(utilisateurs: int) -> list:
+    """Crée les comptes ; renvoie (token, token avec claim principal) par utilisateur."""
+    with SessionLocal() as db:
+        federation = models.Federation(name="FSBB", code="FSBB")
+        db.add(federation)
+        db.flush()
+        ligue = models.Ligue(name="Dakar", code="DK", federation_id=federation.id)
+        role = models.Role(name="admin_club")
+        db.add_all([ligue, role])
+        db.flush()
+        users = []
+        for i in range(utilisateurs):
+            club = models.Club(nom=f"Club {i}", email=f"club{i}@bench.sn", federation_id=federation.id)
+            user = models.User(
+                nom=f"Nom{i}", prenom=f"Prenom{i}", email=f"user{i}@bench.sn", hashed_password="x",
+                role="admin_club", club=club, federation_id=federation.id, ligue_id=ligue.id,
+            )
+            user.roles.append(models.UserRole(role=role))
+            users.append(user)
+        db.add_all(users)
+        db.commit()
+        tokens = []
+        for user in users:
+            claims = {"id": user.id, "email": user.email, "role": user.role}
+            tokens.append((
+                security.create_access_token(claims),
+                security.create_access_token({**claims, "principal": build_principal(user)}),
+            ))
+        return tokens
+
+
+def run(client, tokens, tirages, avec_claims: bool) -> tuple:
+    debut = time.perf_counter()
+    with compter_requetes() as requetes:
+        for i in tirages:
+            token = tokens[i][1 if avec_claims else 0]
+            response = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 200, response.text
+    duree = time.perf_counter() - debut
+    chargements = sum(1 for r in requetes if "FROM fsbb.users" in r)
+    return len(tirages) / duree, chargements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utilisateurs", type=int, default=500)
+    parser.add_argument("--requetes", type=int, default=5000)
+    args = parser.parse_args()
+
+    reset_schema()
+    tokens = seed(args.utilisateurs)
+    poids = [1 / (rang + 1) for rang in range(args.utilisateurs)]
+    tirages = random.Random(42).choices(range(args.utilisateurs), weights=poids, k=args.requetes)
+
+    variantes = [
+        ("sans cache", 0, False),
+        ("cache", settings.PRINCIPAL_CACHE_MAXSIZE, False),
+        (f"cache borné à {args.utilisateurs // 10}", args.utilisateurs // 10, False),
+        ("claims du token", 0, True),
+    ]
+    print(f"{args.requetes} requêtes, {args.utilisateurs} utilisateurs (Zipf)")
+    print(f"{'variante':<24}{'req/s':>10}{'SELECT users':>14}{'hit':>8}")
+    with TestClient(app) as client:
+        run(client, tokens, tirages[:100], False)  # préchauffage
+        for nom, maxsize, avec_claims in variantes:
+            principal_cache.clear()
+            principal_cache.maxsize = maxsize
+            settings.AUTH_TRUST_TOKEN_CLAIMS = avec_claims
+            debit, chargements = run(client, tokens, tirages, avec_claims)
+            print(f"{nom:<24}{debit:>10.0f}{chargements:>14}{1 - chargements / len(tirages):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Diffusion WebSocket : latence de fan-out d'un message de club vers 10 000 connexions.
+
+Les connexions sont tenues par le vrai ConnectionManager, avec des WebSocket en mémoire
+(pas de sockets réseau : on mesure la diffusion, pas la pile TCP). Une fraction de
+clients lents (--lents, --delai-lent-ms) montre qu'ils ne retardent plus les autres.
+Variantes :
+- « séquentiel (avant) » : l'ancienne boucle, un await send par connexion ;
+- « backplane local » : files par connexion, un seul processus ;
+- « backplane postgres » : même chose via NOTIFY / LISTEN sur la base.
+Les percentiles portent sur les clients rapides, du publish à la réception.
+"""
+from tests.postgres import reset_schema, start_postgres
+
+start_postgres()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+
+from sqlalchemy import text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.websocket_backplane import LocalBackplane, PostgresBackplane  # noqa: E402
+from app.core.websocket_manager import manager  # noqa: E402
+from app.db.database import async_engine  # noqa: E402
+from tests.bench.mesures import resume_ms  # noqa: E402
+
+SUJET = "club:1"
+
+
+class FauxWebSocket:
+    """WebSocket en mémoire : note l'heure de réception de chaque message de diffusion."""
+
+    def __init__(self, delai: float, mesure):
+        self.delai = delai
+        self.mesure = mesure
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, texte: str) -> None:
+        if self.delai:
+            await asyncio.sleep(self.delai)
+        self.mesure(self, texte)
+
+    async def receive_text(self) -> str:
+        await asyncio.Event().wait()  # le client n'envoie rien
+
+    async def close(self) -> None:
+        pass
+
+
+class Mesure:
+    """Attend la réception d'un message par tous les clients rapides et collecte les latences."""
+
+    def __init__(self, rapides: int):
+        self.rapides = rapides
+        self.depart = 0.0
+        self.latences = []
+        self.complet = asyncio.Event()
+
+    def nouveau_message(self) -> None:
+        self.latences = []
+        self.complet.clear()
+        self.depart = time.perf_counter()
+
+    def __call__(self, websocket: FauxWebSocket, texte: str) -> None:
+        if websocket.delai or '"ping"' in texte:
+            return
+        self.latences.append(time.perf_counter() - self.depart)
+        if len(self.latences) == self.rapides:
+            self.complet.set()
+
+
+async def attendre_listen() -> None:
+    """Un NOTIFY émis avant le LISTEN est perdu : on attend que la connexion d'écoute soit prête."""
+    requete = text("SELECT count(*) FROM pg_stat_activity WHERE query = :listen")
+    while True:
+        async with async_engine.connect() as conn:
+            if await conn.scalar(requete, {"listen": f'LISTEN "{settings.WS_NOTIFY_CHANNEL}"'}):
+                return
+        await asyncio.sleep(0.05)
+
+
+async def diffuser(variante: str, backplane, sockets: list, mesure: Mesure, messages: int) -> list:
+    latences, totales = [], []
+    for numero in range(messages):
+        message = {"type": "licence", "titre": "Licence validée", "numero": numero}
+        mesure.nouveau_message()
+        if variante == "sequentiel":
+            for websocket in sockets:
+                await websocket.send_text(json.dumps(message))
+        else:
+            await backplane.publish_many([{"topic": SUJET, "message": message}])
+        await mesure.complet.wait()
+        latences.extend(mesure.latences)
+        totales.append(max(mesure.latences))
+    return latences, totales
+
+
+async def lancer(variante: str, connexions: int, lents: int, delai_lent: float, messages: int) -> None:
+    mesure = Mesure(connexions - lents)
+    sockets = [FauxWebSocket(delai_lent if i < lents else 0, mesure) for i in range(connexions)]
+    backplane = None
+    if variante == "postgres":
+        backplane = PostgresBackplane(settings.WS_NOTIFY_CHANNEL)
+    elif variante == "local":
+        backplane = LocalBackplane()
+
+    taches = []
+    if backplane is not None:
+        await backplane.start()
+        taches = [asyncio.create_task(manager.serve(i, ws, [f"user:{i}", SUJET])) for i, ws in enumerate(sockets)]
+        while len(manager.active_connections.get(SUJET, ())) < connexions:
+            await asyncio.sleep(0.01)
+        if variante == "postgres":
+            await attendre_listen()
+    try:
+        latences, totales = await diffuser(variante, backplane, sockets, mesure, messages)
+    finally:
+        manager.close_all()
+        await asyncio.gather(*taches, return_exceptions=True)
+        if backplane is not None:
+            await backplane.stop()
+    print(f"{variante:<12} {resume_ms(latences)}   dernier client {sum(totales) / len(totales) * 1000:8.2f} ms")
+
+
+async def main_async(args) -> None:
+    lents = int(args.connexions * args.lents)
+    print(
+        f"{args.connexions} connexions dont {lents} lentes ({args.delai_lent_ms} ms par envoi),"
+        f" {args.messages} messages"
+    )
+    try:
+        for variante in ("sequentiel", "local", "postgres"):
+            await lancer(variante, args.connexions, lents, args.delai_lent_ms / 1000, args.messages)
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connexions", type=int, default=10000)
+    parser.add_argument("--lents", type=float, default=0.01, help="fraction de clients lents")
+    parser.add_argument("--delai-lent-ms", type=float, default=20)
+    parser.add_argument("--messages", type=int, default=5)
+    args = parser.parse_args()
+
+    reset_schema()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
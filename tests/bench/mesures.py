@@ -0,0 +1,26 @@
+"""Petits outils de mesure partagés par les benchmarks."""
+import time
+from contextlib import contextmanager
+from typing import List
+
+
+def percentile(valeurs: List[float], p: float) -> float:
+    """Percentile `p` (0-100) par rang le plus proche ; `valeurs` n'a pas besoin d'être triée."""
+    ordonnees = sorted(valeurs)
+    rang = max(0, min(len(ordonnees) - 1, round(p / 100 * len(ordonnees)) - 1))
+    return ordonnees[rang]
+
+
+def resume_ms(durees: List[float]) -> str:
+    """Durées en secondes -> « p50 … p95 … p99 … » en millisecondes."""
+    return "  ".join(f"p{p} {percentile(durees, p) * 1000:7.2f} ms" for p in (50, 95, 99))
+
+
+@contextmanager
+def chrono(durees: List[float]):
+    """Ajoute à `durees` la durée du bloc, en secondes."""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        durees.append(time.perf_counter() - debut)
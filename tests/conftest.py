@@ -0,0 +1,26 @@
+from tests.postgres import start_postgres
+
+start_postgres()
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from tests.postgres import reset_schema, truncate_all  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    reset_schema()
+
+
+@pytest.fixture(autouse=True)
+def clean_db(schema):
+    truncate_all()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,58 @@
+"""Jeux de données minimaux partagés par les tests d'API."""
+from datetime import date
+from typing import List
+
+from app.core import security
+from app.db import models
+from app.db.database import SessionLocal
+
+
+def federation(code: str = "FSBB") -> int:
+    with SessionLocal() as db:
+        federation = models.Federation(name=f"Fédération {code}", code=code)
+        db.add(federation)
+        db.commit()
+        return federation.id
+
+
+def club(federation_id: int, nom: str) -> int:
+    with SessionLocal() as db:
+        club = models.Club(nom=nom, email=f"{nom.lower().replace(' ', '.')}@club.sn", federation_id=federation_id)
+        db.add(club)
+        db.commit()
+        return club.id
+
+
+def en_tetes(role: str, email: str, club_id: int = None, federation_id: int = None) -> dict:
+    """Crée l'utilisateur et renvoie l'en-tête Authorization de son jeton."""
+    with SessionLocal() as db:
+        db.add(models.User(
+            nom=role, prenom=email, email=email, hashed_password="x",
+            role=role, club_id=club_id, federation_id=federation_id,
+        ))
+        db.commit()
+    return {"Authorization": f"Bearer {security.create_access_token({'email': email})}"}
+
+
+def licences(club_id: int, federation_id: int, nombre: int, statut: str = "soumise") -> List[int]:
+    """`nombre` licences (adhérents distincts) sur une saison et une catégorie créées pour l'occasion."""
+    with SessionLocal() as db:
+        saison = models.Saison(code="2025-2026", federation_id=federation_id, date_debut=date(2025, 9, 1), date_fin=date(2026, 8, 31), active=True)
+        categorie = models.Categorie(nom=f"Senior {club_id}")
+        db.add_all([saison, categorie])
+        db.flush()
+        ids = []
+        for i in range(nombre):
+            adherent = models.Adherent(club_id=club_id, nom=f"Nom{i}", prenom="Awa", date_naissance=date(2000, 1, 1))
+            db.add(adherent)
+            db.flush()
+            licence = models.Licence(
+                statut=statut, type_demande="nouvelle", nom=adherent.nom, prenom=adherent.prenom,
+                date_naissance=adherent.date_naissance, categorie_id=categorie.id, club_id=club_id,
+                saison_id=saison.id, adherent_id=adherent.id,
+            )
+            db.add(licence)
+            db.flush()
+            ids.append(licence.id)
+        db.commit()
+        return ids
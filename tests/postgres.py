@@ -0,0 +1,92 @@
+"""PostgreSQL jetable pour les tests et les benchmarks.
+
+start_postgres() doit être appelé avant le premier import de app : settings lit
+DATABASE_URL à l'import. Avec TEST_DATABASE_URL, la base indiquée est utilisée (son
+schéma fsbb est recréé) ; sinon pgserver démarre un serveur local dans un répertoire
+temporaire, supprimé à la fin du processus.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+_server = None
+
+
+def start_postgres() -> str:
+    global _server
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        import pgserver
+
+        _server = pgserver.get_server(tempfile.mkdtemp(prefix="licencia-pg-"), cleanup_mode="delete")
+        url = _server.get_uri()
+    os.environ.update(
+        DATABASE_URL=url,
+        DB_CREATE_ALL_ON_STARTUP="false",
+        EMAIL_BACKEND="memory",
+        EMAIL_WORKER_ENABLED="false",
+        DOCUMENT_PREVIEWS_ENABLED="false",
+        NOTIFICATIONS_RETENTION_ENABLED="false",
+        WS_BACKPLANE="local",
+    )
+    os.environ.setdefault("JWT_SECRET", "tests")
+    return url
+
+
+def reset_schema() -> None:
+    """Schéma fsbb vierge puis `alembic upgrade head` : les tests passent par les migrations."""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+    from sqlalchemy.engine import make_url
+
+    from app.db.bootstrap import ALEMBIC_INI
+    from app.db.database import engine
+
+    if engine.url != make_url(os.environ["DATABASE_URL"]):
+        # app importé avant start_postgres() : on ne touche pas à la base configurée
+        raise RuntimeError(f"Base inattendue {engine.url!r} : appeler start_postgres() avant d'importer app")
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS fsbb CASCADE"))
+        conn.execute(text("DROP TYPE IF EXISTS statut_demande, statut_devis"))
+        conn.execute(text("CREATE SCHEMA fsbb"))
+    command.upgrade(Config(ALEMBIC_INI), "head")
+
+
+def truncate_all() -> None:
+    """Vide toutes les tables (sauf alembic_version) et les caches en mémoire qui en dépendent."""
+    from sqlalchemy import text
+
+    from app.core.principal_cache import principal_cache
+    from app.db.database import engine
+    from app.services.offres_cache import offres_cache
+    from app.services.reference_data import reference_data
+
+    with engine.begin() as conn:
+        tables = conn.execute(text(
+            "SELECT quote_ident(tablename) FROM pg_tables"
+            " WHERE schemaname = 'fsbb' AND tablename <> 'alembic_version'"
+        )).scalars().all()
+        conn.execute(text(f"TRUNCATE {', '.join('fsbb.' + t for t in tables)} RESTART IDENTITY CASCADE"))
+    principal_cache.clear()
+    offres_cache.invalidate()
+    reference_data.invalidate()
+
+
+@contextmanager
+def compter_requetes():
+    """Requêtes SQL émises par le moteur synchrone pendant le bloc."""
+    from sqlalchemy import event
+
+    from app.db.database import engine
+
+    requetes = []
+
+    def enregistrer(conn, cursor, statement, parameters, context, executemany):
+        requetes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", enregistrer)
+    try:
+        yield requetes
+    finally:
+        event.remove(engine, "before_cursor_execute", enregistrer)
@@ -0,0 +1,47 @@
+from app.db import models
+from app.db.database import SessionLocal
+from tests.donnees import club, en_tetes, federation
+
+
+def _adherent(club_id: int, nom: str, email: str) -> None:
+    with SessionLocal() as db:
+        db.add(models.Adherent(club_id=club_id, nom=nom, prenom="Awa", date_naissance="2000-01-01", email=email))
+        db.commit()
+
+
+def test_export_reserve_au_club_et_a_sa_federation(client):
+    fed, autre_fed = federation("FSBB"), federation("FSHB")
+    club_1, club_2 = club(fed, "Club Un"), club(fed, "Club Deux")
+    _adherent(club_2, "Diop", "diop@mail.sn")
+
+    admin_club_1 = en_tetes("admin_club", "admin1@club.sn", club_id=club_1)
+    assert client.get(f"/clubs/{club_2}/adherents/export", headers=admin_club_1).status_code == 403
+
+    admin_autre_fed = en_tetes("admin_federation", "admin@fshb.sn", federation_id=autre_fed)
+    assert client.get(f"/clubs/{club_2}/adherents/export", headers=admin_autre_fed).status_code == 403
+
+    for en_tete in (en_tetes("admin_club", "admin2@club.sn", club_id=club_2), en_tetes("admin_federation", "admin@fsbb.sn", federation_id=fed)):
+        response = client.get(f"/clubs/{club_2}/adherents/export", headers=en_tete)
+        assert response.status_code == 200
+        assert "diop@mail.sn" in response.text
+
+
+def test_import_reserve_au_club_et_a_sa_federation(client):
+    fed = federation("FSBB")
+    club_1, club_2 = club(fed, "Club Un"), club(fed, "Club Deux")
+    _adherent(club_2, "Diop", "diop@mail.sn")
+    csv = "nom;prenom;date_naissance;email\nDiop;Awa;2000-01-01;pirate@mail.sn\n".encode()
+
+    def importer(en_tete):
+        return client.post(
+            f"/clubs/{club_2}/adherents/import", params={"mettre_a_jour": True},
+            files={"fichier": ("adherents.csv", csv, "text/csv")}, headers=en_tete,
+        )
+
+    assert importer(en_tetes("admin_club", "admin1@club.sn", club_id=club_1)).status_code == 403
+    with SessionLocal() as db:
+        assert db.query(models.Adherent.email).filter_by(club_id=club_2).scalar() == "diop@mail.sn"
+
+    response = importer(en_tetes("admin_federation", "admin@fsbb.sn", federation_id=fed))
+    assert response.status_code == 200, response.text
+    assert response.json()["mis_a_jour"] == 1
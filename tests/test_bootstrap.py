@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.db import bootstrap
+from app.db.database import engine
+from app.services.notification_retention import list_partitions, month_start, partition_name
+from tests.postgres import reset_schema
+
+
+@pytest.fixture
+def base_historique():
+    """fsbb.notifications non partitionnée, comme dans une base créée avant la migration 5e9a3d7b4c21."""
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE fsbb.notifications CASCADE"))
+        conn.execute(text("CREATE TABLE fsbb.notifications (id SERIAL PRIMARY KEY, created_at TIMESTAMP)"))
+    yield
+    reset_schema()
+
+
+def test_create_schema_sur_base_partitionnee_cree_les_partitions():
+    mois = month_start(datetime.utcnow().date())
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE fsbb.{partition_name(mois)}"))
+
+    bootstrap.create_schema()
+
+    with engine.begin() as conn:
+        assert mois in list_partitions(conn)
+
+
+def test_create_schema_sur_table_non_partitionnee_ne_bloque_pas_le_demarrage(base_historique, capsys):
+    bootstrap.create_schema()
+
+    assert "alembic upgrade head" in capsys.readouterr().out
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT count(*) FROM pg_inherits WHERE inhparent = 'fsbb.notifications'::regclass")).scalar() == 0
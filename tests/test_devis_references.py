@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.db import models
+from app.db.database import SessionLocal
+
+
+def _creer_en_parallele(client, nombre: int) -> list:
+    """`nombre` soumissions publiques lancées ensemble ; renvoie les références obtenues."""
+    depart = threading.Barrier(nombre)
+
+    def soumettre(i: int) -> str:
+        depart.wait()
+        response = client.post("/devis", json={"nom_contact": f"Contact {i}", "email_contact": f"c{i}@club.sn"})
+        assert response.status_code == 200, response.text
+        return response.json()["reference"]
+
+    with ThreadPoolExecutor(max_workers=nombre) as pool:
+        return list(pool.map(soumettre, range(nombre)))
+
+
+def _numeros(references: list, annee: int) -> list:
+    assert all(r.startswith(f"DEV-{annee}-") for r in references)
+    return sorted(int(r.rsplit("-", 1)[1]) for r in references)
+
+
+def test_soumissions_concurrentes_uniques_et_sans_trou(client):
+    annee = datetime.utcnow().year
+    references = _creer_en_parallele(client, 30)
+
+    assert len(set(references)) == 30
+    assert _numeros(references, annee) == list(range(1, 31))
+    with SessionLocal() as db:
+        assert db.query(models.Devis).count() == 30
+        assert db.get(models.DevisCompteur, annee).dernier_numero == 30
+
+
+def test_compteur_cree_a_partir_des_references_existantes(client):
+    """Sans ligne de compteur pour l'année, la numérotation reprend après la plus haute référence."""
+    annee = datetime.utcnow().year
+    with SessionLocal() as db:
+        db.add(models.Devis(reference=f"DEV-{annee}-0041", statut="nouveau", nom_contact="Ancien", email_contact="a@club.sn"))
+        db.commit()
+
+    references = _creer_en_parallele(client, 20)
+
+    assert _numeros(references, annee) == list(range(42, 62))
@@ -0,0 +1,55 @@
+from app.db import models
+from app.db.database import SessionLocal
+from tests.postgres import compter_requetes
+
+
+def _offres(nombre: int) -> list:
+    with SessionLocal() as db:
+        offres = [models.Offre(nom=f"Offre {i}") for i in range(nombre)]
+        db.add_all(offres)
+        db.commit()
+        return [o.id for o in offres]
+
+
+def _devis(debut: int, nombre: int, offre_ids: list) -> None:
+    with SessionLocal() as db:
+        for i in range(debut, debut + nombre):
+            devis = models.Devis(reference=f"DEV-2000-{i:04d}", statut="nouveau", nom_contact=f"C{i}", email_contact=f"c{i}@club.sn")
+            devis.items = [models.DevisItem(offre_id=offre_id) for offre_id in offre_ids[: 1 + i % len(offre_ids)]]
+            db.add(devis)
+        db.commit()
+
+
+def _requetes_liste(client, **params) -> int:
+    with compter_requetes() as requetes:
+        response = client.get("/devis", params=params)
+    assert response.status_code == 200, response.text
+    return len(requetes)
+
+
+def test_liste_nombre_de_requetes_constant(client):
+    offre_ids = _offres(3)
+    _devis(0, 2, offre_ids)
+    peu = _requetes_liste(client)
+
+    _devis(2, 40, offre_ids)
+    beaucoup = _requetes_liste(client)
+    page = _requetes_liste(client, limit=10, statut="nouveau")
+
+    # devis puis items + offres (selectinload / joinedload), quel que soit le nombre de lignes
+    assert peu == beaucoup == page <= 2
+    assert len(client.get("/devis").json()) == 42
+
+
+def test_creation_nombre_de_requetes_constant(client):
+    offre_ids = _offres(5)
+
+    def requetes_creation(offres: list) -> int:
+        with compter_requetes() as requetes:
+            response = client.post("/devis", json={"nom_contact": "C", "email_contact": "c@club.sn", "offre_ids": offres})
+        assert response.status_code == 200, response.text
+        assert [item["offre_id"] for item in response.json()["items"]] == offres
+        return len(requetes)
+
+    requetes_creation([])  # premier devis de l'année : création de la ligne de compteur
+    assert requetes_creation(offre_ids[:1]) == requetes_creation(offre_ids)
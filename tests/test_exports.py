@@ -0,0 +1,22 @@
+import csv
+import io
+
+from app.db import models
+from app.db.database import SessionLocal
+from tests.donnees import club, en_tetes, federation
+
+
+def test_export_csv_neutralise_les_formules(client):
+    club_id = club(federation("FSBB"), "Club Un")
+    with SessionLocal() as db:
+        db.add(models.Adherent(club_id=club_id, nom="=cmd|' /C calc'!A0", prenom="@SOMME(1+1)", date_naissance="2000-01-01", telephone="+221 77 000 00 00"))
+        db.commit()
+
+    response = client.get(f"/clubs/{club_id}/adherents/export", headers=en_tetes("admin_club", "admin@club.sn", club_id=club_id))
+
+    assert response.status_code == 200
+    lignes = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig")), delimiter=";"))
+    assert lignes[0]["nom"] == "'=cmd|' /C calc'!A0"
+    assert lignes[0]["prenom"] == "'@SOMME(1+1)"
+    assert lignes[0]["telephone"] == "'+221 77 000 00 00"
+    assert lignes[0]["id"].isdigit()
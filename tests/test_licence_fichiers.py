@@ -0,0 +1,27 @@
+from app.db import models
+from app.db.database import SessionLocal
+from tests.donnees import club, en_tetes, federation, licences
+
+
+def test_apercu_absent_du_stockage_renvoie_404(client, tmp_path):
+    fed = federation("FSBB")
+    club_id = club(fed, "Club Un")
+    licence_id = licences(club_id, fed, 1)[0]
+    with SessionLocal() as db:
+        type_fichier = models.TypeFichier(nom="certificat")
+        db.add(type_fichier)
+        db.flush()
+        fichier = models.Fichier(
+            nom_fichier="certificat.pdf", chemin=str(tmp_path / "certificat.pdf"), id_licence=licence_id,
+            id_type=type_fichier.id, apercu=str(tmp_path / "disparu.jpg"),
+        )
+        db.add(fichier)
+        db.commit()
+        fichier_id = fichier.id
+
+    response = client.get(
+        f"/licences/demandes_licence/{licence_id}/fichiers/{fichier_id}/apercu",
+        headers=en_tetes("admin_club", "admin@club.sn", club_id=club_id),
+    )
+
+    assert response.status_code == 404
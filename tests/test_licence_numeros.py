@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.v1.routes.licences import NUMERO_LICENCE_FORMAT, allouer_numeros_licence
+from app.db import models
+from app.db.database import AsyncSessionLocal, SessionLocal, async_engine
+from tests.donnees import club, en_tetes, federation, licences
+
+
+async def _allouer_en_parallele(transactions: int, par_transaction: int, annulees: set) -> list:
+    """`transactions` sessions ouvertes en même temps, chacune réservant un lot de numéros."""
+    depart = asyncio.Event()
+
+    async def une_transaction(i: int) -> list:
+        async with AsyncSessionLocal() as db:
+            await depart.wait()
+            numeros = await allouer_numeros_licence(db, par_transaction)
+            await asyncio.sleep(0)  # les transactions se chevauchent avant commit / rollback
+            if i in annulees:
+                await db.rollback()
+                return []
+            await db.commit()
+            return numeros
+
+    taches = [asyncio.create_task(une_transaction(i)) for i in range(transactions)]
+    await asyncio.sleep(0)
+    depart.set()
+    try:
+        return [numero for lot in await asyncio.gather(*taches) for numero in lot]
+    finally:
+        await async_engine.dispose()  # connexions asyncpg liées à cette boucle
+
+
+def test_allocations_concurrentes_uniques():
+    numeros = asyncio.run(_allouer_en_parallele(transactions=12, par_transaction=25, annulees={3, 7}))
+
+    assert len(numeros) == 10 * 25
+    assert len(set(numeros)) == len(numeros)
+    assert all(len(n) == len(NUMERO_LICENCE_FORMAT.format(0)) and n.startswith("LC") for n in numeros)
+
+
+def test_lot_trie_et_vide():
+    async def allouer():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await allouer_numeros_licence(db, 0), await allouer_numeros_licence(db, 5)
+            finally:
+                await db.commit()
+                await async_engine.dispose()
+
+    vide, lot = asyncio.run(allouer())
+    assert vide == []
+    assert lot == sorted(lot) and len(set(lot)) == 5
+
+
+def test_validations_concurrentes_par_les_routes(client):
+    """Validations unitaires et lots lancés ensemble, y compris sur les mêmes licences :
+    chaque licence reçoit un seul numéro, celui renvoyé par la route qui l'a validée."""
+    fed = federation("FSBB")
+    ids = licences(club(fed, "Club Un"), fed, 40)
+    admin = en_tetes("admin_federation", "admin@fsbb.sn", federation_id=fed)
+    appels = [("unitaire", licence_id) for licence_id in ids[:30]]
+    appels += [("lot", ids[20:]), ("lot", ids[25:]), ("lot", ids[:10])]
+    depart = threading.Barrier(len(appels))
+
+    def appeler(appel) -> dict:
+        genre, cible = appel
+        depart.wait()
+        if genre == "unitaire":
+            response = client.post(f"/licences/demandes_licence/{cible}/valider", headers=admin)
+            assert response.status_code == 200, response.text
+            return {cible: response.json()["numero"]}
+        response = client.post("/licences/demandes_licence/bulk", json={"action": "valider", "ids": cible}, headers=admin)
+        assert response.status_code == 200, response.text
+        return {r["id"]: r["numero"] for r in response.json()["resultats"] if r["resultat"] == "validee"}
+
+    with ThreadPoolExecutor(max_workers=len(appels)) as pool:
+        renvoyes = list(pool.map(appeler, appels))
+
+    with SessionLocal() as db:
+        en_base = dict(db.query(models.Licence.id, models.Licence.numero).filter(models.Licence.id.in_(ids), models.Licence.statut == "validee"))
+    assert sorted(en_base) == sorted(ids)
+    assert all(en_base.values())
+    assert len(set(en_base.values())) == len(ids)
+    # Aucun numéro renvoyé par une route n'a été remplacé par une validation concurrente
+    for numeros in renvoyes:
+        for licence_id, numero in numeros.items():
+            assert en_base[licence_id] == numero